@@ -0,0 +1,108 @@
+"""
+Output tokens and latency of one compare shard, echoing cv_text vs ids only.
+
+The old prompt asked the model to return every CV's text next to its score, so
+output grew with CV length; the current one returns cv_index, score, strengths
+and weaknesses only. Offline, the script builds both answers for a synthetic
+shard and converts output tokens to latency with a fixed decode rate. With
+--live it sends both prompts to Groq and reports the measured usage and time.
+
+Run from Back-end/:
+    python -m benchmarks.bench_compare_output --cvs 5 --words 600
+    python -m benchmarks.bench_compare_output --live   # needs GROQ_API_KEY
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+
+from benchmarks.bench_prerank import make_cv
+from services.cv_preprocess import compact_cv, estimate_tokens
+
+JOB = {
+    "job_title": "Senior Backend Engineer",
+    "job_requirements": "python fastapi mongodb kubernetes aws",
+    "job_description": "Build and run the services behind our hiring platform.",
+}
+
+OLD_SYSTEM = (
+    "You are an expert recruiter. Score each CV independently against the job requirements on an "
+    "absolute scale, so scores stay comparable across separate requests, and "
+    "provide scores (0-100) with strengths/weaknesses. Return ONLY a single JSON array with one item per CV, "
+    "where each item contains:\n"
+    "- cv_index: The number from the CV's header line\n"
+    "- cv_text: The original CV text\n"
+    "- score: Match score (0-100)\n"
+    "- strengths: 3 key strengths\n"
+    "- weaknesses: 3 key weaknesses\n\n"
+    "Job Title: {job_title}\n"
+    "Requirements: {job_requirements}\n"
+    "Description: {job_description}"
+)
+
+
+def sample_answer(texts, echo: bool) -> str:
+    items = []
+    for i, text in enumerate(texts):
+        item = {"cv_index": i + 1}
+        if echo:
+            item["cv_text"] = text
+        item.update({
+            "score": 72,
+            "strengths": ["Strong Python and FastAPI background", "Owns production services", "Cloud experience on AWS"],
+            "weaknesses": ["Little Kubernetes exposure", "No MongoDB at scale", "Short tenure in last role"],
+        })
+        items.append(item)
+    return json.dumps(items, indent=2)
+
+
+def offline(texts, decode_tps: float, ttft: float):
+    print(f"{'':<10} {'out tokens':>10} {'est. latency':>13}")
+    for label, echo in (("cv_text", True), ("ids", False)):
+        tokens = estimate_tokens(sample_answer(texts, echo))
+        print(f"{label:<10} {tokens:>10d} {ttft + tokens / decode_tps:>12.2f}s")
+
+
+async def live(texts, runs: int):
+    from langchain_core.prompts import ChatPromptTemplate
+
+    from services.compare_service import registry
+
+    llm = registry.get("compare")
+    human = ("human", "CVs to compare:\n{cv_texts}")
+    prompts = {
+        "cv_text": ChatPromptTemplate.from_messages([("system", OLD_SYSTEM), human]),
+        "ids": llm.chain.first,
+    }
+    inputs = dict(JOB, cv_texts="\n\n---\n\n".join(f"CV {i + 1}:\n{t}" for i, t in enumerate(texts)))
+
+    print(f"{'':<10} {'out tokens':>10} {'mean latency':>13}")
+    for label, prompt in prompts.items():
+        chain = prompt | llm.model
+        tokens, elapsed = [], []
+        for _ in range(runs):
+            start = time.perf_counter()
+            message = await chain.ainvoke(inputs)
+            elapsed.append(time.perf_counter() - start)
+            tokens.append((message.usage_metadata or {}).get("output_tokens", 0))
+        print(f"{label:<10} {sum(tokens) / runs:>10.0f} {sum(elapsed) / runs:>12.2f}s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--cvs", type=int, default=5, help="CVs per shard (COMPARE_BATCH_SIZE)")
+    parser.add_argument("--words", type=int, default=600)
+    parser.add_argument("--decode-tps", type=float, default=250.0, help="Assumed output tokens/s offline")
+    parser.add_argument("--ttft", type=float, default=0.3, help="Assumed time to first token offline")
+    parser.add_argument("--live", action="store_true")
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    texts = [compact_cv(make_cv(rng, args.words)).text for _ in range(args.cvs)]
+    print(f"Shard of {args.cvs} CVs, ~{sum(map(estimate_tokens, texts))} prompt tokens of CV text")
+    if args.live:
+        asyncio.run(live(texts, args.runs))
+    else:
+        offline(texts, args.decode_tps, args.ttft)
@@ -0,0 +1,55 @@
+"""
+Scaling and recall of the near-duplicate CV stage that /compare runs before pre-ranking.
+
+Builds a synthetic corpus (see bench_prerank) and plants re-uploads of some
+CVs: re-flowed and upper-cased, as a DOCX of a PDF tends to come out, with a
+share of their words edited. Reports the wall time, how many pairs LSH sent
+to a signature comparison against all n(n-1)/2, and how many planted copies
+were clustered with their original.
+
+Run from Back-end/:
+    python -m benchmarks.bench_dedup --cvs 1000,5000,10000 --edit 0.02
+"""
+import argparse
+import random
+import time
+
+from benchmarks.bench_prerank import FILLER, make_cv
+from services.dedup_service import find_duplicates
+
+
+def reupload(rng: random.Random, text: str, edit: float) -> str:
+    words = text.split()
+    for _ in range(int(len(words) * edit)):
+        words[rng.randrange(len(words))] = rng.choice(FILLER)
+    return "\n".join(" ".join(words[i:i + 12]).upper() for i in range(0, len(words), 12))
+
+
+def main(args):
+    print(f"{'cvs':>7} {'copies':>7} {'time':>9} {'per CV':>9} {'compared':>10} {'all pairs':>13} {'recall':>7}")
+    for cvs in args.cvs:
+        rng = random.Random(args.seed)
+        originals = [make_cv(rng, args.words) for _ in range(cvs)]
+        copies = int(cvs * args.copies)
+        texts = originals + [reupload(rng, originals[i], args.edit) for i in range(copies)]
+
+        start = time.perf_counter()
+        result = find_duplicates(texts)
+        elapsed = time.perf_counter() - start
+
+        found = sum(result.representative[cvs + i] == i for i in range(copies))
+        pairs = len(texts) * (len(texts) - 1) // 2
+        print(
+            f"{len(texts):>7,} {copies:>7,} {elapsed * 1000:>7.0f}ms {elapsed / len(texts) * 1e6:>7.0f}us "
+            f"{result.compared:>10,} {pairs:>13,} {found / max(1, copies):>7.1%}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--cvs", type=lambda v: [int(n) for n in v.split(",")], default=[1000, 5000, 10000])
+    parser.add_argument("--words", type=int, default=400)
+    parser.add_argument("--copies", type=float, default=0.1, help="Share of CVs uploaded a second time")
+    parser.add_argument("--edit", type=float, default=0.02, help="Share of words changed in a re-upload")
+    parser.add_argument("--seed", type=int, default=7)
+    main(parser.parse_args())
@@ -0,0 +1,87 @@
+"""
+Event-loop latency while CV uploads are being parsed.
+
+Compares the old inline parsing (PyMuPDF inside the coroutine) against the
+process-pool extraction service. A ticker coroutine sleeps for 10 ms in a loop
+and records how late it wakes up; that overshoot is what every other request on
+the worker experiences.
+
+Run from Back-end/:
+    python -m benchmarks.bench_extraction --pages 40 --uploads 8
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import fitz
+
+from services import extraction_service
+from services.cv_parsers import parse_pdf_bytes
+
+TICK = 0.010
+
+
+def make_pdf(pages: int) -> bytes:
+    doc = fitz.open()
+    line = "Senior Python engineer with FastAPI, MongoDB and distributed systems experience. "
+    for i in range(pages):
+        page = doc.new_page()
+        page.insert_textbox(fitz.Rect(36, 36, 560, 800), f"Page {i + 1}\n" + line * 40, fontsize=9)
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+async def ticker(lags: list, stop: asyncio.Event):
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(TICK)
+        lags.append(time.perf_counter() - start - TICK)
+
+
+async def inline_upload(pdf: bytes) -> str:
+    return parse_pdf_bytes(pdf)
+
+
+async def pooled_upload(pdf: bytes) -> str:
+    # Bypass the CV text cache so every upload is really parsed
+    return await extraction_service._parse_in_pool(parse_pdf_bytes, "cv.pdf", pdf, 60)
+
+
+async def run(label: str, upload, pdf: bytes, uploads: int):
+    lags: list = []
+    stop = asyncio.Event()
+    tick_task = asyncio.create_task(ticker(lags, stop))
+    start = time.perf_counter()
+    await asyncio.gather(*(upload(pdf) for _ in range(uploads)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await tick_task
+
+    lags_ms = sorted(lag * 1000 for lag in lags) or [0.0]
+    p99 = lags_ms[min(len(lags_ms) - 1, int(len(lags_ms) * 0.99))]
+    print(
+        f"{label:<8} wall={elapsed:6.2f}s  ticks={len(lags_ms):4d}  "
+        f"lag mean={statistics.mean(lags_ms):7.1f}ms  p99={p99:7.1f}ms  max={lags_ms[-1]:7.1f}ms"
+    )
+
+
+async def main(pages: int, uploads: int):
+    pdf = make_pdf(pages)
+    print(f"{uploads} concurrent uploads of a {pages}-page PDF ({len(pdf) / 1024:.0f} KiB)")
+
+    # Warm the pool so worker start-up is not counted against it
+    await pooled_upload(pdf)
+
+    await run("inline", inline_upload, pdf, uploads)
+    await run("pool", pooled_upload, pdf, uploads)
+    extraction_service.shutdown_extraction_pool()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, default=40)
+    parser.add_argument("--uploads", type=int, default=8)
+    args = parser.parse_args()
+    asyncio.run(main(args.pages, args.uploads))
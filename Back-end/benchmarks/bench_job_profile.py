@@ -0,0 +1,83 @@
+"""
+Prompt tokens and request size saved by sending a job_id instead of the job fields.
+
+Builds synthetic postings the way job boards write them: a bulleted requirements
+list with a nice-to-have section, and a description padded with company
+boilerplate, benefits and an equal-opportunity statement. For each one it
+reports the estimated prompt tokens of the job fields before and after
+build_profile, the time the profile takes to build, and the form payload of
+an /interview/upload request without the CV itself.
+
+Run from Back-end/:
+    python -m benchmarks.bench_job_profile --postings 200
+"""
+import argparse
+import random
+import statistics
+import time
+from urllib.parse import urlencode
+
+from benchmarks.bench_prerank import SKILLS
+from services.job_postings import build_profile
+
+BOILERPLATE = [
+    "{company} was founded in {year} and has grown to more than {size} people across {offices} offices.",
+    "We believe great products come from diverse teams who care about each other.",
+    "Our mission is to make hiring fair, fast and human for companies of every size.",
+    "We offer a competitive salary, equity, private health insurance and a generous learning budget.",
+    "Enjoy flexible hours, remote-friendly work, a gym membership and team offsites twice a year.",
+    "{company} is an equal opportunity employer and values diversity at every level.",
+    "All qualified applicants will receive consideration without regard to race, religion, gender or age.",
+]
+DUTIES = [
+    "You will design and build {a} services on {b} that power our core platform.",
+    "You will own the {a} data layer and work with the platform team on {b} deployments.",
+    "You will improve observability of our {a} stack and drive down latency.",
+    "You will mentor engineers, review code and help shape our {a} and {b} roadmap.",
+]
+
+
+def make_posting(rng: random.Random):
+    skills = rng.sample(SKILLS, 10)
+    must = [
+        f"- {rng.randint(2, 8)}+ years of professional experience with {skills[0]} and {skills[1]}",
+        f"- Strong knowledge of {skills[2]} or {skills[3]}; experience designing {skills[4]} systems",
+        f"- Hands-on experience with {skills[5]} in production",
+        f"- Excellent communication skills and a track record of shipping with {skills[6]}",
+    ]
+    nice = [f"- Familiarity with {skills[7]} or {skills[8]}", f"- {skills[9]} certification is a plus"]
+    requirements = "Requirements:\n" + "\n".join(must) + "\nNice to have:\n" + "\n".join(nice)
+    fill = dict(company="Acme", year=rng.randint(1990, 2020), size=rng.randint(50, 5000), offices=rng.randint(2, 20))
+    paragraphs = [b.format(**fill) for b in rng.sample(BOILERPLATE, 4)]
+    paragraphs += [d.format(a=rng.choice(skills), b=rng.choice(skills)) for d in rng.sample(DUTIES, 3)]
+    paragraphs += [b.format(**fill) for b in rng.sample(BOILERPLATE, 3)]
+    title = f"Senior {skills[0].title()} Engineer"
+    return title, requirements, " ".join(paragraphs)
+
+
+def main(args):
+    rng = random.Random(args.seed)
+    before, after, build_ms, form_before, form_after = [], [], [], [], []
+    for _ in range(args.postings):
+        title, requirements, description = make_posting(rng)
+        start = time.perf_counter()
+        profile = build_profile(title, requirements, description)
+        build_ms.append((time.perf_counter() - start) * 1000)
+        before.append(profile["tokens_before"])
+        after.append(profile["tokens_after"])
+        form = {"user_id": "u", "job_title": title, "job_requirements": requirements, "job_description": description}
+        form_before.append(len(urlencode(form)))
+        form_after.append(len(urlencode({"user_id": "u", "job_id": "0" * 32})))
+
+    mean = statistics.mean
+    print(f"{args.postings} postings")
+    print(f"job prompt tokens   {mean(before):7.0f} -> {mean(after):5.0f}  ({1 - mean(after) / mean(before):.0%} fewer)")
+    print(f"form fields bytes   {mean(form_before):7.0f} -> {mean(form_after):5.0f}")
+    print(f"profile build       {statistics.median(build_ms):7.2f} ms median, once per posting")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--postings", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=11)
+    main(parser.parse_args())
@@ -0,0 +1,85 @@
+"""
+Tail latency of LLM calls with and without hedging, against the fake LLM server.
+
+Starts benchmarks/fake_llm_server.py in-process with a heavy-tailed primary and
+a faster secondary model, then sends the same stream of requests through a
+gateway that only retries and through one that also hedges after the
+primary's observed p95. Prints p50/p95/p99 and how often the hedge fired and won.
+Hedges take llm_scheduler slots like any other call, so they only help while
+--concurrency stays below LLM_MAX_CONCURRENCY.
+
+Run from Back-end/:
+    python -m benchmarks.bench_llm_gateway --requests 300 --concurrency 6 --tail-rate 0.05 --tail 6
+"""
+import argparse
+import asyncio
+import os
+import time
+
+os.environ.setdefault("GROQ_API_KEY", "fake")
+
+from langchain_groq import ChatGroq
+
+from benchmarks.fake_llm_server import FakeLLMConfig, FakeLLMServer
+from services import llm_gateway
+from services.llm_gateway import LLMGateway, percentile
+
+PRIMARY = "llama-3.3-70b-versatile"
+SECONDARY = "llama-3.1-8b-instant"
+
+
+def gateway(base_url: str, hedge: bool) -> LLMGateway:
+    models = [ChatGroq(model=m, groq_api_base=base_url, max_retries=0) for m in (PRIMARY, SECONDARY)]
+    return LLMGateway(models, timeout=30, hedge=hedge)
+
+
+async def run(label: str, gw: LLMGateway, requests: int, concurrency: int):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one(i: int):
+        async with semaphore:
+            start = time.perf_counter()
+            await gw.ainvoke(f"Generate interview questions, request {i}")
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    elapsed = time.perf_counter() - start
+    stats = gw.stats()
+    wins = {name: s["wins"] for name, s in stats["models"].items()}
+    print(
+        f"{label:<10} p50={percentile(latencies, 0.5):5.2f}s  p95={percentile(latencies, 0.95):5.2f}s  "
+        f"p99={percentile(latencies, 0.99):5.2f}s  max={max(latencies):5.2f}s  "
+        f"wall={elapsed:5.1f}s  hedges={stats['hedges']}  wins={wins}"
+    )
+
+
+async def main(args):
+    config = FakeLLMConfig(
+        latency={PRIMARY: f"lognormal:{args.primary},0.3", SECONDARY: f"lognormal:{args.secondary},0.3"},
+        tail_rate=args.tail_rate,
+        tail_seconds=args.tail,
+        seed=7,
+    )
+    # Learn the p95 quickly so the hedged run uses it for most requests
+    llm_gateway.LLM_HEDGE_MIN_SAMPLES = 10
+    with FakeLLMServer(config, port=args.port) as server:
+        print(
+            f"{args.requests} requests, {args.concurrency} concurrent; primary median {args.primary}s, "
+            f"secondary median {args.secondary}s, {args.tail_rate:.0%} stalls of +{args.tail}s"
+        )
+        await run("retry only", gateway(server.base_url, hedge=False), args.requests, args.concurrency)
+        await run("hedged", gateway(server.base_url, hedge=True), args.requests, args.concurrency)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=6)
+    parser.add_argument("--primary", type=float, default=1.0, help="Median primary latency (s)")
+    parser.add_argument("--secondary", type=float, default=0.5, help="Median secondary latency (s)")
+    parser.add_argument("--tail-rate", type=float, default=0.05)
+    parser.add_argument("--tail", type=float, default=6.0)
+    parser.add_argument("--port", type=int, default=8901)
+    asyncio.run(main(parser.parse_args()))
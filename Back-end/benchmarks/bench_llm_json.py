@@ -0,0 +1,183 @@
+"""
+Fuzz and benchmark the LLM JSON extraction in utils/llm_json.py.
+
+1. Corpus: malformed answers of the kinds models really produce (fences, prose,
+   trailing commas, truncation, envelopes, braces inside strings). For each one it
+   prints how many items the old regex/fence parsers and the new scanner recover.
+2. Fuzz: random truncations and corruptions of a valid answer. The parser must
+   never raise, keep every object before a truncation, and find the same items
+   whether the answer arrives in one piece or in streamed chunks.
+3. Throughput: parse time as the answer grows, to check it stays linear.
+
+Every item recovered here is an LLM retry avoided.
+
+Run from Back-end/:
+    python -m benchmarks.bench_llm_json --fuzz 5000
+"""
+import argparse
+import json
+import random
+import re
+import time
+
+from schemas.compare import CVShardScore
+from schemas.interview import QAItem
+from utils.llm_json import JSONItemScanner, extract_json_items, parse_llm_items
+
+
+def qa(i: int) -> dict:
+    return {
+        "question": f"How would you design service {i} for {{high}} load?",
+        "answer": 'Start with "stateless" workers behind a queue [then shard].',
+        "difficulty": "medium",
+    }
+
+
+def score(i: int) -> dict:
+    return {
+        "cv_index": i,
+        "score": 70 + i,
+        "strengths": ["Python", "FastAPI", "AWS"],
+        "weaknesses": ["Kubernetes", "MongoDB", "Leadership"],
+    }
+
+
+def dumps(items, indent=2) -> str:
+    return json.dumps(items, indent=indent)
+
+
+VALID = dumps([qa(i) for i in range(1, 6)])
+CASES = [
+    ("plain array", VALID, 5),
+    ("json fence", f"```json\n{VALID}\n```", 5),
+    ("prose around", f"Sure! Here's what I came up with:\n{VALID}\nLet me know if you'd like more.", 5),
+    ("trailing commas", VALID.replace('"medium"\n', '"medium",\n').replace("}\n]", "},\n]"), 5),
+    ("truncated", VALID[:int(len(VALID) * 0.7)], 3),
+    ("envelope", dumps({"questions": [qa(i) for i in range(1, 6)]}), 5),
+    ("objects, no array", "\n\n".join(dumps(qa(i)) for i in range(1, 4)), 3),
+    ("raw newline in string", VALID.replace("Start with", "Start\nwith"), 5),
+    # Models that restate their answer should not double the items
+    ("second array ignored", f"```json\n{dumps([qa(1), qa(2)])}\n```\nOr:\n```json\n{dumps([qa(3)])}\n```", 2),
+    ("nested arrays", dumps([score(i) for i in range(1, 6)]), 5),
+    ("one bad object", VALID.replace('"difficulty": "medium"', '"difficulty": medium', 1), 4),
+]
+
+
+# ---- The parsers this module replaced, kept here for comparison ----
+
+def legacy_compare(text: str) -> list:
+    array_match = re.search(r"\[\s*{.*?}\s*]", text, re.DOTALL)
+    if array_match:
+        try:
+            return json.loads(array_match.group(0))
+        except json.JSONDecodeError:
+            pass
+    block_match = re.search(r"```json\s*(.*?)\s*```", text, re.DOTALL)
+    if not block_match:
+        raise ValueError("No JSON block found in model output")
+    # Python's re has no (?R); this raises re.error on every call
+    object_strings = re.findall(r"{[^{}]*?(?:(?R)|[^{}])*}", block_match.group(1), re.DOTALL)
+    return [json.loads(s) for s in object_strings]
+
+
+def legacy_interview(text: str) -> list:
+    cleaned = re.sub(r"```(?:json)?(.*?)```", r"\1", text, flags=re.DOTALL).strip()
+    return json.loads(cleaned)
+
+
+def recovered(parse, text: str, model) -> str:
+    try:
+        items = parse(text)
+        if not isinstance(items, list):
+            items = [items]
+        valid = 0
+        for item in items:
+            try:
+                model(**item)
+                valid += 1
+            except Exception:
+                pass
+        return str(valid)
+    except Exception as e:
+        return type(e).__name__
+
+
+def corpus():
+    print(f"{'case':<24} {'expected':>8} {'old compare':>14} {'old interview':>14} {'new':>5}  dropped")
+    for name, text, expected in CASES:
+        model = CVShardScore if name == "nested arrays" else QAItem
+        parsed = parse_llm_items(text, model)
+        print(
+            f"{name:<24} {expected:>8} {recovered(legacy_compare, text, model):>14} "
+            f"{recovered(legacy_interview, text, model):>14} {len(parsed.items):>5}  "
+            f"{[d.reason for d in parsed.dropped]}"
+        )
+        assert len(parsed.items) == expected, name
+
+
+def mutate(rng: random.Random, text: str):
+    """Return the damaged text and, for truncations, how much of `text` survived."""
+    kind = rng.randrange(4)
+    cut = rng.randrange(1, len(text))
+    if kind == 0:
+        return text[:cut], cut
+    if kind == 1:
+        return text[:cut] + text[cut + rng.randrange(1, 20):], None
+    if kind == 2:
+        return text[:cut] + rng.choice('{}[]",:\\') + text[cut:], None
+    suffix = rng.choice(["", "\n```", "...", "\n\nI hope this helps!"])
+    return "Here you go:\n```json\n" + text[:cut] + suffix, cut
+
+
+def fuzz(runs: int, seed: int):
+    rng = random.Random(seed)
+    source = [qa(i) for i in range(1, 11)]
+    text = dumps(source)
+    # End offset of every object in the source, to check none before the damage is lost
+    ends = [m.end() for m in re.finditer(r"\n  }", text)]
+    total = 0
+    start = time.perf_counter()
+    for _ in range(runs):
+        damaged, kept = mutate(rng, text)
+        parsed = parse_llm_items(damaged, QAItem)
+        assert len(parsed.items) <= len(source)
+        if kept is not None:
+            # Truncation can lose items but never alter or invent them
+            assert [item.model_dump(exclude={"type"}) for item in parsed.items] == source[:len(parsed.items)]
+            assert len(parsed.items) >= sum(1 for end in ends if end <= kept)
+        total += len(parsed.items)
+
+        # Streaming in arbitrary chunks must find exactly what one pass over the whole answer finds
+        scanner, chunked, pos = JSONItemScanner(), [], 0
+        while pos < len(damaged):
+            step = rng.randrange(1, 40)
+            chunked.extend(scanner.feed(damaged[pos:pos + step]))
+            pos += step
+        assert chunked == extract_json_items(damaged).items
+    elapsed = time.perf_counter() - start
+    print(f"\nfuzz: {runs} damaged answers, {total / runs:.1f}/10 items recovered on average, "
+          f"{elapsed / runs * 1e6:.0f} us/answer, no exceptions")
+
+
+def throughput():
+    print(f"\n{'items':>7} {'KiB':>8} {'new ms':>8} {'us/item':>8} {'old ms':>8}")
+    for n in (10, 100, 1000, 10000):
+        text = "```json\n" + dumps([qa(i) for i in range(n)]) + "\n```"
+        start = time.perf_counter()
+        items = extract_json_items(text).items
+        new = time.perf_counter() - start
+        start = time.perf_counter()
+        legacy_interview(text)
+        old = time.perf_counter() - start
+        assert len(items) == n
+        print(f"{n:>7} {len(text) / 1024:>8.0f} {new * 1000:>8.2f} {new / n * 1e6:>8.1f} {old * 1000:>8.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--fuzz", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    corpus()
+    fuzz(args.fuzz, args.seed)
+    throughput()
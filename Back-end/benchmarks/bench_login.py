@@ -0,0 +1,68 @@
+"""
+Login throughput and event-loop lag at 1/8/64 concurrent logins.
+
+Compares verifying PBKDF2 inline in the coroutine (the old authenticate_user)
+with the bounded PasswordHasher pool. Mongo is left out on purpose: the lookup
+is I/O and does not block the loop, the hash is what used to.
+
+Run from Back-end/:
+    python -m benchmarks.bench_login --logins 256
+"""
+import argparse
+import asyncio
+import time
+
+from services.password_hasher import PasswordHasher, hash_password, verify_password
+
+TICK = 0.005
+
+
+async def ticker(lags: list, stop: asyncio.Event):
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(TICK)
+        lags.append(time.perf_counter() - start - TICK)
+
+
+async def run(label: str, login, concurrency: int, logins: int):
+    gate = asyncio.Semaphore(concurrency)
+    lags: list = []
+    stop = asyncio.Event()
+    tick_task = asyncio.create_task(ticker(lags, stop))
+
+    async def one():
+        async with gate:
+            assert await login()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(logins)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await tick_task
+
+    worst = max(lags, default=0.0) * 1000
+    print(f"{label:<7} c={concurrency:<3} {logins / elapsed:8.1f} logins/s   max loop lag {worst:7.1f} ms")
+
+
+async def main(logins: int, workers: int):
+    stored = hash_password("correct horse battery staple")
+    hasher = PasswordHasher(workers=workers, max_queue=logins)
+
+    async def inline():
+        return verify_password("correct horse battery staple", stored)
+
+    async def pooled():
+        return await hasher.verify("correct horse battery staple", stored)
+
+    for concurrency in (1, 8, 64):
+        await run("inline", inline, concurrency, logins)
+        await run("pool", pooled, concurrency, logins)
+    hasher.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--logins", type=int, default=128)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+    asyncio.run(main(args.logins, args.workers))
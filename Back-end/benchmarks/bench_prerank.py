@@ -0,0 +1,61 @@
+"""
+Indexing and scoring throughput of the BM25 pre-ranking stage.
+
+Builds a synthetic corpus of CVs drawn from a skills vocabulary, then times
+index construction, a single job query, and the full prerank() call that
+/compare/upload runs before the LLM.
+
+Run from Back-end/:
+    python -m benchmarks.bench_prerank --cvs 10000
+"""
+import argparse
+import random
+import time
+
+from services.prerank_service import BM25Index, job_query, prerank
+
+SKILLS = (
+    "python java kotlin golang rust typescript javascript react angular vue node.js fastapi django flask "
+    "spring kubernetes docker terraform aws gcp azure postgresql mysql mongodb redis kafka rabbitmq spark "
+    "hadoop airflow pandas numpy pytorch tensorflow scikit-learn nlp llm langchain graphql grpc rest ci/cd "
+    "jenkins github gitlab linux bash microservices observability prometheus grafana security oauth "
+    "agile scrum leadership mentoring stakeholder communication testing pytest selenium figma c++ c#"
+).split()
+FILLER = (
+    "delivered built designed led improved migrated scaled maintained owned shipped platform service "
+    "pipeline customers revenue latency reliability product features architecture data analytics"
+).split()
+
+
+def make_cv(rng: random.Random, words: int) -> str:
+    skills = rng.sample(SKILLS, 12)
+    return " ".join(rng.choice(skills) if rng.random() < 0.3 else rng.choice(FILLER) for _ in range(words))
+
+
+def timed(label: str, fn, items: int):
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<16} {elapsed * 1000:9.1f} ms  ({items / elapsed:,.0f} CVs/s)")
+    return result
+
+
+def main(cvs: int, words: int, seed: int):
+    rng = random.Random(seed)
+    corpus = [make_cv(rng, words) for _ in range(cvs)]
+    job = ("Senior Python Backend Engineer", "python fastapi mongodb kubernetes aws", "Build LLM services with langchain")
+    print(f"{cvs:,} CVs x {words} words")
+
+    index = timed("index build", lambda: BM25Index(corpus), cvs)
+    query = job_query(*job)
+    timed("query score", lambda: index.score(query), cvs)
+    timed("prerank total", lambda: prerank(corpus, *job), cvs)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--cvs", type=int, default=10_000)
+    parser.add_argument("--words", type=int, default=600)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    main(args.cvs, args.words, args.seed)
@@ -0,0 +1,143 @@
+"""
+Question bank item reuse and latency saved on /interview/upload.
+
+Replays a stream of interview requests over a set of roles, the popular ones
+requested far more often than the rest (Zipf), each with a fresh CV built
+from the role's skills plus a few of its own. The stream runs twice through
+the app, against mongomock and the in-process fake LLM: once with the bank
+off, once with it on. The fake model titles every question with its role
+and numbers it, so the script can also report how many banked questions
+were served to a request for a different role, and check that no
+non-technical (CV-specific) question is ever served twice.
+
+The fake model's latency is per call, not per token: the time a top-up saves
+by writing fewer questions shows in the questions-written column, not in the
+latency ones.
+
+Run from Back-end/:
+    python -m benchmarks.bench_question_bank --requests 100 --roles 12 --llm-latency fixed:1
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import random
+import re
+import statistics
+import time
+
+from benchmarks import load_test
+from benchmarks.bench_prerank import FILLER, SKILLS
+
+LEVELS = ("Junior", "Senior", "Staff", "Lead")
+KINDS = ("Backend", "Frontend", "Data", "Platform", "Mobile", "ML")
+TYPES = ("technical", "behavioral", "scenario", "project")
+
+
+def make_roles(rng: random.Random, count: int):
+    titles = rng.sample([f"{level} {kind} Engineer" for level in LEVELS for kind in KINDS], count)
+    return [(title, rng.sample(SKILLS, 6)) for title in titles]
+
+
+def make_request(rng: random.Random, role, words: int):
+    title, core = role
+    requirements = "\n".join(f"- Experience with {skill}" for skill in core)
+    skills = rng.sample(core, 5) + rng.sample(SKILLS, 3)
+    cv = " ".join(rng.choice(skills) if rng.random() < 0.3 else rng.choice(FILLER) for _ in range(words))
+    return title, requirements, cv
+
+
+def responder():
+    numbers = itertools.count(1)
+
+    def answer(prompt: str) -> str:
+        title = re.search(r"Job Title: (.*)", prompt).group(1).strip()
+        wanted = re.search(r"Generate exactly (\d+)", prompt)
+        items = []
+        for i in range(int(wanted.group(1)) if wanted else 10):
+            n = next(numbers)
+            items.append({
+                "question": f"[{title}] Question {n}?",
+                "answer": "A plausible answer.",
+                "type": TYPES[i % len(TYPES)],
+                "difficulty": ("easy", "medium", "hard")[n % 3],
+            })
+        return "```json\n" + json.dumps(items) + "\n```"
+
+    return answer
+
+
+async def replay(client, stream, pdfs):
+    latencies, foreign, served, leaked = [], 0, 0, 0
+    seen = set()
+    for (title, requirements, _), pdf in zip(stream, pdfs):
+        start = time.perf_counter()
+        response = await client.post(
+            "/interview/upload",
+            files={"cv_file": ("cv.pdf", pdf, "application/pdf")},
+            data={"user_id": "bench", "job_title": title, "job_requirements": requirements, "job_description": "-"},
+        )
+        latencies.append(time.perf_counter() - start)
+        response.raise_for_status()
+        for item in response.json()["items"]:
+            foreign += not item["question"].startswith(f"[{title}]")
+            leaked += item["question"] in seen and item["type"] != "technical"
+            seen.add(item["question"])
+            served += 1
+    return latencies, foreign / max(1, served), leaked
+
+
+async def run(args):
+    import httpx
+    import main
+    import services.question_bank as bank_module
+    from services.llm_cache import llm_cache
+    from services.llm_registry import registry
+
+    answer = responder()
+    for name in ("interview", "interview_topup"):
+        for route in registry.get(name).model.routes:
+            route.model.responder = answer
+
+    rng = random.Random(args.seed)
+    roles = make_roles(rng, args.roles)
+    weights = [1 / (rank + 1) for rank in range(len(roles))]
+    stream = [make_request(rng, rng.choices(roles, weights)[0], args.words) for _ in range(args.requests)]
+    pdfs = [load_test.make_pdf(cv) for _, _, cv in stream]
+
+    print(f"{args.requests} requests over {args.roles} roles, threshold {bank_module.question_bank.threshold}")
+    async with main.lifespan(main.app):
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://bench", timeout=None) as client:
+            for enabled in (False, True):
+                bank_module.QUESTION_BANK_ENABLED = enabled
+                # Same CVs both times: start each run without the exact-match response cache
+                llm_cache._memory.clear()
+                await llm_cache.collection.delete_many({})
+                bank = bank_module.question_bank
+                served_before = bank.items_served
+                latencies, foreign, leaked = await replay(client, stream, pdfs)
+                written = args.requests * bank_module.QUESTION_BANK_SET_SIZE - (bank.items_served - served_before)
+                print(
+                    f"bank {'on ' if enabled else 'off'}  mean {statistics.mean(latencies):6.2f}s  "
+                    f"p50 {statistics.median(latencies):6.2f}s  total {sum(latencies):7.1f}s  "
+                    f"questions written {written}  other-role questions {foreign:.1%}  "
+                    f"reused non-technical {leaked}"
+                )
+    print(json.dumps(bank_module.question_bank.stats(), indent=1))
+
+
+def main(args):
+    load_test.configure_environment(argparse.Namespace(mongo_uri=None))
+    import services.llm  # noqa: F401  Registers the interview chains
+    load_test.install_fake_llm(argparse.Namespace(llm_latency=args.llm_latency, tail_rate=0, tail_seconds=0, seed=args.seed))
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--roles", type=int, default=12)
+    parser.add_argument("--words", type=int, default=250)
+    parser.add_argument("--llm-latency", default="fixed:1")
+    parser.add_argument("--seed", type=int, default=3)
+    main(parser.parse_args())
@@ -0,0 +1,76 @@
+"""
+LLM calls and latency of growing a job's ranking incrementally vs rescoring every CV.
+
+CVs for one posting arrive in rounds. Each round is added with add_candidates,
+which scores only the new CVs, and the top N is then read from job_rankings.
+The baseline is what /compare costs for the same ranking: every CV seen so
+far is rescored on each round (with a fresh cache namespace, as a new mix of
+CVs per shard would miss the cache). Runs against mongomock and the in-process
+fake LLM with a fixed per-call latency.
+
+Run from Back-end/:
+    python -m benchmarks.bench_ranking --rounds 5 --per-round 20 --llm-latency fixed:0.2
+"""
+import argparse
+import asyncio
+import random
+import time
+
+from benchmarks import load_test
+from benchmarks.bench_prerank import make_cv
+
+
+async def run(args):
+    # Imported here: these bind the Mongo collections, which configure_environment swaps first
+    from benchmarks.bench_job_profile import make_posting
+    from services.compare_service import CVComparator
+    from services.cv_preprocess import compact_cv
+    from services.job_postings import create_job_posting, profile_fields
+    from services.ranking_service import add_candidates, rubric_scorer, top_candidates
+
+    rng = random.Random(args.seed)
+    posting = await create_job_posting(*make_posting(rng))
+    job = profile_fields(posting["title"], posting["profile"])
+    texts = []
+
+    print(f"{'round':>5} {'ranked':>7} {'calls':>6} {'add':>8} {'top-N':>8} {'rescore calls':>14} {'rescore':>9}")
+    for round_number in range(1, args.rounds + 1):
+        batch = [make_cv(rng, args.words) for _ in range(args.per_round)]
+        texts += batch
+
+        start = time.perf_counter()
+        update = await add_candidates(posting, batch, [None] * len(batch))
+        add_ms = (time.perf_counter() - start) * 1000
+        calls = rubric_scorer.estimated_calls(len(update.added), top_k=len(update.added)) if update.added else 0
+
+        start = time.perf_counter()
+        total, _ = await top_candidates(posting["_id"], args.top)
+        read_ms = (time.perf_counter() - start) * 1000
+
+        baseline = CVComparator(batch_size=rubric_scorer.batch_size, chain="rank", cache_namespace=f"bench:{round_number}")
+        start = time.perf_counter()
+        await baseline.score_pool([compact_cv(text).text for text in texts], job.title, job.requirements, job.description)
+        rescore_ms = (time.perf_counter() - start) * 1000
+
+        print(
+            f"{round_number:>5} {total:>7} {calls:>6} {add_ms:>6.0f}ms {read_ms:>6.1f}ms "
+            f"{baseline.estimated_calls(len(texts), top_k=len(texts)):>14} {rescore_ms:>7.0f}ms"
+        )
+
+
+def main(args):
+    load_test.configure_environment(argparse.Namespace(mongo_uri=None))
+    import services.ranking_service  # noqa: F401  Registers the "rank" chain
+    load_test.install_fake_llm(argparse.Namespace(llm_latency=args.llm_latency, tail_rate=0, tail_seconds=0, seed=args.seed))
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--per-round", type=int, default=20)
+    parser.add_argument("--words", type=int, default=400)
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--llm-latency", default="fixed:0.2")
+    parser.add_argument("--seed", type=int, default=5)
+    main(parser.parse_args())
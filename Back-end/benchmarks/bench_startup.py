@@ -0,0 +1,146 @@
+"""
+Cold start: import time of main, lifespan startup and the first requests.
+
+Each sample runs in a fresh interpreter, as a new worker or autoscaled
+replica would. The child imports main, runs the lifespan hook against the
+in-memory Mongo stand-in from load_test and the fake LLM server, started
+once in its own process (so no quota is used but the real ChatGroq clients
+are built), then times the first
+and second /interview/upload and /compare/upload. The median of --runs
+samples is reported.
+
+--save and --baseline work as in load_test: any metric slower than the
+baseline by more than --tolerance makes the run exit 1.
+
+Run from Back-end/:
+    python -m benchmarks.bench_startup --runs 5
+    python -m benchmarks.bench_startup --runs 5 --warmup   # LLM_WARMUP=true
+"""
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+BACK_END = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHILD = r"""
+import asyncio, json, os, time
+from benchmarks import load_test
+
+
+async def main():
+    timings = {}
+    args = load_test.argparse.Namespace(mongo_uri=None)
+    load_test.configure_environment(args)
+    t = time.perf_counter()
+    import main as app_module
+    timings["import_ms"] = (time.perf_counter() - t) * 1000
+    import httpx
+
+    pdf = load_test.make_pdf("Backend engineer, Python and FastAPI")
+    form = {"user_id": "u", "job_title": "Backend", "job_requirements": "Python", "job_description": "APIs"}
+    t = time.perf_counter()
+    async with app_module.lifespan(app_module.app):
+        timings["startup_ms"] = (time.perf_counter() - t) * 1000
+        transport = httpx.ASGITransport(app=app_module.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+            for attempt in ("first", "second"):
+                for route, files in (
+                    ("interview", [("cv_file", (f"{attempt}.pdf", pdf, "application/pdf"))]),
+                    ("compare", [("cv_files", (f"{attempt}{n}.pdf", pdf + bytes([n]), "application/pdf")) for n in range(3)]),
+                ):
+                    data = dict(form, job_description=f"APIs {attempt} {route}")
+                    path = "/interview/upload" if route == "interview" else "/compare/upload"
+                    t = time.perf_counter()
+                    response = await client.post(path, files=files, data=data)
+                    response.raise_for_status()
+                    timings[f"{attempt}_{route}_ms"] = (time.perf_counter() - t) * 1000
+    print(json.dumps(timings))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
+"""
+
+
+def sample(port: int, warmup: bool) -> dict:
+    env = dict(
+        os.environ,
+        PYTHONPATH=BACK_END,
+        LLM_BASE_URL=f"http://127.0.0.1:{port}",
+        LLM_WARMUP="true" if warmup else "false",
+        GROQ_API_KEY="bench",
+    )
+    # A real file rather than -c, so the spawned extraction workers can re-import it
+    with tempfile.NamedTemporaryFile("w", suffix=".py", delete=False) as f:
+        f.write(CHILD)
+    try:
+        output = subprocess.run(
+            [sys.executable, f.name], env=env, cwd=BACK_END, capture_output=True, text=True, check=True
+        ).stdout
+    finally:
+        os.unlink(f.name)
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def start_fake_llm(port: int) -> subprocess.Popen:
+    """The fake LLM runs in its own process so the child's import time is not shared with it."""
+    server = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.fake_llm_server", "--port", str(port), "--latency", "fixed:0"],
+        cwd=BACK_END, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+            return server
+        except OSError:
+            time.sleep(0.1)
+    server.kill()
+    raise RuntimeError(f"Fake LLM server did not start on port {port}")
+
+
+def main(args) -> int:
+    server = start_fake_llm(args.port)
+    try:
+        samples = [sample(args.port, args.warmup) for _ in range(args.runs)]
+    finally:
+        server.terminate()
+        server.wait()
+    results = {key: round(statistics.median(s[key] for s in samples), 1) for key in samples[0]}
+    print(f"median of {args.runs} cold starts, warm-up {'on' if args.warmup else 'off'}")
+    for key, value in results.items():
+        print(f"  {key:<22} {value:8.1f} ms")
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=2)
+            f.write("\n")
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        slower = [
+            f"{key}: {baseline[key]}ms -> {value}ms"
+            for key, value in results.items()
+            if key in baseline and value > baseline[key] * (1 + args.tolerance)
+        ]
+        for line in slower:
+            print(f"REGRESSION {line}")
+        return 1 if slower else 0
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--warmup", action="store_true", help="Build chains and start workers in the lifespan hook")
+    parser.add_argument("--port", type=int, default=8911)
+    parser.add_argument("--save")
+    parser.add_argument("--baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    sys.exit(main(parser.parse_args()))
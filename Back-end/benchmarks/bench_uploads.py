@@ -0,0 +1,98 @@
+"""
+Peak memory of the API process while a batch of CV uploads is extracted.
+
+Compares the old path (await file.read(), bytes pickled to the worker) with
+spooled uploads (copied to a temp file in chunks, the worker opens it by path).
+The PDFs are scanned-style, an incompressible image and one line of text per
+page. Uploads are built the way Starlette hands them over, as SpooledTemporaryFiles
+that roll to disk past 1 MB. Each file gets unique trailing bytes so the CV
+text cache never answers. tracemalloc's peak counts Python allocations in this
+process only, which is where the bytes used to pile up.
+
+Run from Back-end/:
+    python -m benchmarks.bench_uploads --pages 8 --batches 5,20,50
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+import tracemalloc
+
+import fitz
+from starlette.datastructures import UploadFile
+
+from services import extraction_service
+from services.cv_parsers import parse_pdf_bytes
+
+SPOOL_MAX_SIZE = 1024 * 1024  # Starlette's multipart spool threshold
+
+
+def make_scanned_pdf(pages: int) -> bytes:
+    doc = fitz.open()
+    for i in range(pages):
+        page = doc.new_page()
+        # Random pixels do not compress, like a photographed page
+        scan = fitz.Pixmap(fitz.csRGB, 400, 500, os.urandom(400 * 500 * 3), False)
+        page.insert_image(page.rect, pixmap=scan)
+        page.insert_text((72, 72), f"Page {i + 1}: Senior Python engineer, FastAPI and MongoDB")
+    data = doc.tobytes(deflate=False)
+    doc.close()
+    return data
+
+
+def make_upload(pdf: bytes, n: int) -> UploadFile:
+    data = pdf + f"\n% upload {n}\n".encode()
+    spooled = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+    spooled.write(data)
+    spooled.seek(0)
+    return UploadFile(file=spooled, filename=f"cv{n}.pdf", size=len(data))
+
+
+async def read_whole(file: UploadFile) -> str:
+    # The old extract_upload: whole file in memory, then a pickled copy to the worker
+    file_bytes = await file.read()
+    return await extraction_service._parse_in_pool(parse_pdf_bytes, file.filename, file_bytes, 60)
+
+
+async def spooled(file: UploadFile) -> str:
+    upload = await extraction_service.spool_upload(file)
+    try:
+        return await extraction_service._parse_in_pool(
+            extraction_service.FILE_PARSERS[upload.kind], upload.filename, upload.path, 60
+        )
+    finally:
+        upload.cleanup()
+
+
+async def run(label: str, extract, pdf: bytes, batch: int):
+    uploads = [make_upload(pdf, n) for n in range(batch)]
+    tracemalloc.start()
+    start = time.perf_counter()
+    texts = await asyncio.gather(*(extract(f) for f in uploads))
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    for f in uploads:
+        await f.close()
+    print(
+        f"{label:<8} batch={batch:<3} peak={peak / 1024 / 1024:7.1f} MiB  "
+        f"wall={elapsed:5.2f}s  chars={sum(map(len, texts))}"
+    )
+
+
+async def main(args):
+    pdf = make_scanned_pdf(args.pages)
+    print(f"{args.pages}-page PDF of {len(pdf) / 1024 / 1024:.1f} MiB per upload")
+    await spooled(make_upload(pdf, -1))  # Start the pool outside the measurement
+    for batch in args.batches:
+        await run("read", read_whole, pdf, batch)
+        await run("spooled", spooled, pdf, batch)
+    extraction_service.shutdown_extraction_pool()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, default=8)
+    parser.add_argument("--batches", type=lambda v: [int(b) for b in v.split(",")], default=[5, 20, 50])
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,81 @@
+"""
+In-process stand-in for ChatGroq: a LangChain chat model with injectable latency.
+
+Answers come from fake_llm_server.fake_answer (CV scores for compare prompts,
+Q&A items otherwise) unless another `responder` is given, and carry
+usage_metadata like the real provider. Unlike the fake HTTP server it skips
+the network stack, so a load test measures the app rather than the stub.
+
+    gateway.routes = [ModelRoute(FakeChatModel(model_name="m", latency="fixed:0.5"))]
+"""
+import asyncio
+import random
+import time
+from typing import Any, AsyncIterator, Callable, List, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from pydantic import PrivateAttr
+
+from benchmarks.fake_llm_server import fake_answer, parse_distribution
+
+STREAM_PIECE = 40
+
+
+class FakeChatModel(BaseChatModel):
+    model_name: str = "fake"
+    temperature: Optional[float] = None
+    latency: str = "fixed:0.5"  # See fake_llm_server.parse_distribution
+    tail_rate: float = 0.0
+    tail_seconds: float = 0.0
+    questions: int = 10
+    seed: Optional[int] = None
+    responder: Optional[Callable[[str], str]] = None
+
+    _rng: random.Random = PrivateAttr()
+    _draw: Callable = PrivateAttr()
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self._rng = random.Random(self.seed)
+        self._draw = parse_distribution(self.latency)
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat"
+
+    def _delay(self) -> float:
+        delay = self._draw(self._rng)
+        if self._rng.random() < self.tail_rate:
+            delay += self.tail_seconds
+        return delay
+
+    def _answer(self, messages: List[BaseMessage]) -> AIMessage:
+        prompt = "\n".join(str(m.content) for m in messages)
+        content = self.responder(prompt) if self.responder else fake_answer(prompt, self.questions)
+        usage = {"input_tokens": len(prompt) // 4, "output_tokens": len(content) // 4}
+        usage["total_tokens"] = usage["input_tokens"] + usage["output_tokens"]
+        return AIMessage(content=content, usage_metadata=usage)
+
+    def _generate(self, messages: List[BaseMessage], stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        time.sleep(self._delay())
+        return ChatResult(generations=[ChatGeneration(message=self._answer(messages))])
+
+    async def _agenerate(self, messages: List[BaseMessage], stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        await asyncio.sleep(self._delay())
+        return ChatResult(generations=[ChatGeneration(message=self._answer(messages))])
+
+    async def _astream(
+        self, messages: List[BaseMessage], stop=None, run_manager=None, **kwargs: Any
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        # A fifth of the latency before the first token, the rest spread over the answer
+        delay = self._delay()
+        message = self._answer(messages)
+        pieces = [message.content[i:i + STREAM_PIECE] for i in range(0, len(message.content), STREAM_PIECE)]
+        await asyncio.sleep(delay * 0.2)
+        for n, piece in enumerate(pieces):
+            last = n == len(pieces) - 1
+            chunk = AIMessageChunk(content=piece, usage_metadata=message.usage_metadata if last else None)
+            yield ChatGenerationChunk(message=chunk)
+            await asyncio.sleep(delay * 0.8 / len(pieces))
@@ -0,0 +1,214 @@
+"""
+Local stand-in for the Groq chat completions API, with injectable latency.
+
+Serves POST /openai/v1/chat/completions (plain and streamed) in the shape the
+groq SDK expects, so the app or a benchmark can point at it with
+LLM_BASE_URL=http://127.0.0.1:8900 and no API quota. Answers are canned but
+valid: CV scores for compare prompts and Q&A items for everything else.
+
+Latency is drawn per request from a distribution per model:
+    fixed:0.5              always 0.5 s
+    uniform:0.2,1.5        uniform between 0.2 s and 1.5 s
+    lognormal:0.8,0.5      median 0.8 s, sigma 0.5
+and --tail 0.05:6 adds 6 s to 5% of requests, the stalls hedging is meant to hide.
+
+Run from Back-end/:
+    python -m benchmarks.fake_llm_server --port 8900 \\
+        --latency llama-3.3-70b-versatile=lognormal:1.2,0.3 --tail 0.05:6 \\
+        --latency llama-3.1-8b-instant=lognormal:0.4,0.3
+"""
+import argparse
+import asyncio
+import json
+import math
+import random
+import re
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+DEFAULT_MODEL = "*"
+
+
+def parse_distribution(spec: str):
+    kind, _, args = spec.partition(":")
+    values = [float(v) for v in args.split(",") if v]
+    if kind == "fixed":
+        return lambda rng: values[0]
+    if kind == "uniform":
+        return lambda rng: rng.uniform(values[0], values[1])
+    if kind == "lognormal":
+        median, sigma = values
+        return lambda rng: rng.lognormvariate(math.log(median), sigma)
+    raise ValueError(f"Unknown latency distribution: {spec}")
+
+
+@dataclass
+class FakeLLMConfig:
+    latency: Dict[str, str] = field(default_factory=lambda: {DEFAULT_MODEL: "lognormal:0.8,0.4"})
+    tail_rate: float = 0.0
+    tail_seconds: float = 0.0
+    error_rate: float = 0.0
+    questions: int = 10
+    seed: Optional[int] = None
+
+
+def fake_answer(prompt: str, questions: int) -> str:
+    cvs = len(re.findall(r"^CV \d+:", prompt, re.MULTILINE))
+    if cvs:
+        items = [
+            {
+                "cv_index": i,
+                "score": 55 + (i * 17) % 40,
+                "strengths": ["Relevant stack", "Shipped production services", "Clear impact"],
+                "weaknesses": ["Limited cloud depth", "No team lead experience", "Short tenures"],
+            }
+            for i in range(1, cvs + 1)
+        ]
+    else:
+        items = [
+            {
+                "question": f"Walk me through a system you designed ({i}).",
+                "answer": "I would start from the requirements, then the data model and failure modes.",
+                "type": ("technical", "behavioral", "scenario", "project")[i % 4],
+                "difficulty": ("easy", "medium", "hard")[i % 3],
+            }
+            for i in range(1, questions + 1)
+        ]
+    return "```json\n" + json.dumps(items, indent=2) + "\n```"
+
+
+def create_app(config: FakeLLMConfig) -> FastAPI:
+    app = FastAPI()
+    rng = random.Random(config.seed)
+    distributions = {model: parse_distribution(spec) for model, spec in config.latency.items()}
+    app.state.requests = 0
+
+    def latency_for(model: str) -> float:
+        draw = distributions.get(model) or distributions.get(DEFAULT_MODEL) or (lambda _: 0.0)
+        delay = draw(rng)
+        if rng.random() < config.tail_rate:
+            delay += config.tail_seconds
+        return delay
+
+    @app.post("/openai/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        app.state.requests += 1
+        model = body.get("model", "")
+        prompt = "\n".join(str(m.get("content", "")) for m in body.get("messages", []))
+        delay = latency_for(model)
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+        created = int(time.time())
+
+        if rng.random() < config.error_rate:
+            await asyncio.sleep(delay / 4)
+            return JSONResponse({"error": {"message": "Service unavailable (injected)"}}, status_code=503)
+
+        content = fake_answer(prompt, config.questions)
+        usage = {
+            "prompt_tokens": len(prompt) // 4,
+            "completion_tokens": len(content) // 4,
+            "total_tokens": (len(prompt) + len(content)) // 4,
+        }
+
+        if not body.get("stream"):
+            await asyncio.sleep(delay)
+            return {
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+                "usage": usage,
+            }
+
+        async def chunks():
+            # A fifth of the latency before the first token, the rest spread over the answer
+            await asyncio.sleep(delay * 0.2)
+            pieces = [content[i:i + 40] for i in range(0, len(content), 40)]
+            for n, piece in enumerate(pieces):
+                delta = {"content": piece}
+                if n == 0:
+                    delta["role"] = "assistant"
+                chunk = {
+                    "id": completion_id,
+                    "object": "chat.completion.chunk",
+                    "created": created,
+                    "model": model,
+                    "choices": [{"index": 0, "delta": delta, "finish_reason": None}],
+                }
+                yield f"data: {json.dumps(chunk)}\n\n"
+                await asyncio.sleep(delay * 0.8 / len(pieces))
+            final = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
+                "x_groq": {"id": completion_id, "usage": usage},
+            }
+            yield f"data: {json.dumps(final)}\n\n"
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(chunks(), media_type="text/event-stream")
+
+    return app
+
+
+class FakeLLMServer:
+    """Runs the fake API on a background thread, for benchmarks that drive the app in-process."""
+
+    def __init__(self, config: FakeLLMConfig, port: int = 8900):
+        self.app = create_app(config)
+        self.port = port
+        self._server = uvicorn.Server(uvicorn.Config(self.app, host="127.0.0.1", port=port, log_level="warning"))
+        self._thread = threading.Thread(target=self._server.run, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def __enter__(self):
+        self._thread.start()
+        while not self._server.started:
+            time.sleep(0.01)
+        return self
+
+    def __exit__(self, *exc):
+        self._server.should_exit = True
+        self._thread.join()
+
+
+def parse_latency_args(values) -> Dict[str, str]:
+    latency = {}
+    for value in values or []:
+        model, sep, spec = value.rpartition("=")
+        latency[model if sep else DEFAULT_MODEL] = spec
+    return latency or FakeLLMConfig().latency
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--latency", action="append", help="[model=]distribution, repeatable")
+    parser.add_argument("--tail", default="0:0", help="rate:seconds added to a fraction of requests")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    tail_rate, tail_seconds = (float(v) for v in args.tail.split(":"))
+    config = FakeLLMConfig(
+        latency=parse_latency_args(args.latency),
+        tail_rate=tail_rate,
+        tail_seconds=tail_seconds,
+        error_rate=args.error_rate,
+        seed=args.seed,
+    )
+    uvicorn.run(create_app(config), host="127.0.0.1", port=args.port)
@@ -0,0 +1,336 @@
+"""
+Offline load test of main.app: no Groq, no Atlas.
+
+Every LLM gateway is pointed at FakeChatModel (deterministic answers with the
+configured latency) and MongoDB is replaced by mongomock-motor in memory, or by
+a local mongod with --mongo-uri. A seeded corpus of synthetic PDF and DOCX CVs
+is generated up front, then each endpoint is driven in-process over httpx at
+fixed concurrency levels:
+
+    login           POST /auth/login
+    interview       POST /interview/upload
+    generate-type   POST /interview/generate-type (two types per request)
+    compare         POST /compare/upload (--compare-cvs CVs per request)
+
+Each request carries a unique job description, so the LLM response cache
+misses unless --cache-hits is given; CV texts are shared across the corpus and
+hit the CV text cache after their first parse, as they do in production.
+Rate limits are lifted so the numbers show capacity rather than 429s.
+
+Results (p50/p95/p99 latency, requests per second, errors) are printed and
+can be saved as JSON. Compared against a saved baseline, any p95 or throughput
+worse than --tolerance makes the run exit 1, so it can gate a change:
+
+Run from Back-end/:
+    python -m benchmarks.load_test --save benchmarks/load_baseline.json
+    python -m benchmarks.load_test --baseline benchmarks/load_baseline.json
+"""
+import argparse
+import asyncio
+import io
+import json
+import os
+import random
+import sys
+import time
+from dataclasses import asdict, dataclass
+from typing import Dict, List
+
+ENDPOINTS = ("login", "interview", "generate-type", "compare")
+PASSWORD = "load-test-password"
+
+SKILLS = [
+    "Python", "FastAPI", "Django", "MongoDB", "PostgreSQL", "Redis", "Docker", "Kubernetes",
+    "AWS", "GCP", "React", "Next.js", "TypeScript", "Go", "Kafka", "Airflow", "Spark",
+    "Terraform", "CI/CD", "GraphQL", "PyTorch", "LangChain", "Celery", "Linux",
+]
+ROLES = ["Backend Engineer", "Data Engineer", "Full-stack Developer", "ML Engineer", "Platform Engineer"]
+
+
+# ---- Synthetic corpus ----
+
+def cv_text(rng: random.Random, n: int) -> str:
+    skills = rng.sample(SKILLS, 8)
+    lines = [f"Candidate {n}", f"{rng.choice(ROLES)} with {rng.randint(1, 12)} years of experience", ""]
+    lines.append("Skills: " + ", ".join(skills))
+    for job in range(rng.randint(2, 4)):
+        lines.append("")
+        lines.append(f"{rng.choice(ROLES)} at Company {rng.randint(1, 500)} ({2024 - 2 * job - 2}-{2024 - 2 * job})")
+        for _ in range(rng.randint(3, 6)):
+            a, b = rng.sample(skills, 2)
+            lines.append(f"- Built and operated {a} services backed by {b}, cutting latency by {rng.randint(10, 60)}%")
+    lines.extend(["", "Education: BSc Computer Science"])
+    return "\n".join(lines)
+
+
+def make_pdf(text: str) -> bytes:
+    import fitz
+
+    doc = fitz.open()
+    page = doc.new_page()
+    page.insert_textbox(fitz.Rect(36, 36, 560, 800), text, fontsize=9)
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+def make_docx(text: str) -> bytes:
+    import docx
+
+    document = docx.Document()
+    for line in text.splitlines():
+        document.add_paragraph(line)
+    buffer = io.BytesIO()
+    document.save(buffer)
+    return buffer.getvalue()
+
+
+def make_corpus(size: int, seed: int) -> List[tuple]:
+    """(filename, bytes, content type) triples, alternating PDF and DOCX."""
+    rng = random.Random(seed)
+    corpus = []
+    for n in range(size):
+        text = cv_text(rng, n)
+        if n % 2:
+            corpus.append((f"cv{n}.docx", make_docx(text), "application/vnd.openxmlformats-officedocument.wordprocessingml.document"))
+        else:
+            corpus.append((f"cv{n}.pdf", make_pdf(text), "application/pdf"))
+    return corpus
+
+
+# ---- App wiring ----
+
+def configure_environment(args):
+    """Must run before main is imported: module-level clients and limits read these."""
+    os.environ.setdefault("GROQ_API_KEY", "load-test")
+    unlimited = {p: [10 ** 9, 10 ** 9] for p in ("interactive", "bulk")}
+    os.environ["TENANT_RATE_LIMITS"] = json.dumps({t: unlimited for t in ("personal", "enterprise", "anonymous")})
+    if args.mongo_uri:
+        os.environ["MONGO_URI"] = args.mongo_uri
+        return
+
+    try:
+        from mongomock_motor import AsyncMongoMockClient
+    except ImportError:
+        sys.exit("mongomock-motor is not installed: pip install mongomock-motor, or pass --mongo-uri")
+    from database import connection
+
+    connection.client = AsyncMongoMockClient()
+    connection.db = connection.client["evaluno_db"]
+    for attribute in (
+        "user_collection", "cv_results", "cv_text_cache", "llm_cache_collection",
+        "compare_jobs", "compare_job_files", "compare_candidates", "job_postings", "job_rankings",
+        "question_bank_collection",
+    ):
+        collection = getattr(connection, attribute)
+        setattr(connection, attribute, connection.db[collection.name])
+
+
+def install_fake_llm(args):
+    from benchmarks.fake_chat_model import FakeChatModel
+    from services.llm_gateway import ModelRoute
+    from services.llm_registry import registry
+
+    # Build every chain now, then swap the Groq models behind each gateway
+    for position, name in enumerate(sorted(registry.stats()["registered"])):
+        gateway = registry.get(name).model
+        gateway.routes = [
+            ModelRoute(FakeChatModel(
+                model_name=route.name,
+                temperature=getattr(route.model, "temperature", None),
+                latency=args.llm_latency,
+                tail_rate=args.tail_rate,
+                tail_seconds=args.tail_seconds,
+                seed=args.seed + position * 100 + n,
+            ))
+            for n, route in enumerate(gateway.routes)
+        ]
+
+
+# ---- Load generation ----
+
+@dataclass
+class Result:
+    requests: int
+    errors: int
+    rps: float
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+
+
+class LoadTest:
+    def __init__(self, client, corpus: List[tuple], args):
+        self.client = client
+        self.corpus = corpus
+        self.args = args
+        self.sequence = 0
+        self.headers: Dict[str, str] = {}
+        self.email = "load-test@example.com"
+
+    async def setup(self):
+        await self.client.post("/auth/register", json={
+            "username": "load-test",
+            "email": self.email,
+            "user_type": "enterprise",
+            "password": PASSWORD,
+        })
+        response = await self.client.post("/auth/login", json={"email": self.email, "password": PASSWORD})
+        response.raise_for_status()
+        self.headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    def _job(self) -> dict:
+        self.sequence += 1
+        suffix = "" if self.args.cache_hits else f" (requisition {self.sequence})"
+        return {
+            "job_title": "Senior Backend Engineer",
+            "job_requirements": "Python, FastAPI, MongoDB, Docker, AWS",
+            "job_description": "Own the APIs behind our hiring platform" + suffix,
+        }
+
+    def _cv(self, offset: int = 0) -> tuple:
+        return self.corpus[(self.sequence + offset) % len(self.corpus)]
+
+    async def request(self, endpoint: str):
+        if endpoint == "login":
+            return await self.client.post("/auth/login", json={"email": self.email, "password": PASSWORD})
+        job = self._job()
+        if endpoint == "interview":
+            return await self.client.post(
+                "/interview/upload", headers=self.headers,
+                files=[("cv_file", self._cv())], data={"user_id": "load-test", **job},
+            )
+        if endpoint == "generate-type":
+            return await self.client.post(
+                "/interview/generate-type", headers=self.headers,
+                files=[("cv_file", self._cv())], data={"types": ["technical", "behavioral"], **job},
+            )
+        if endpoint == "compare":
+            files = [("cv_files", self._cv(i)) for i in range(self.args.compare_cvs)]
+            return await self.client.post("/compare/upload", headers=self.headers, files=files, data=job)
+        raise ValueError(f"Unknown endpoint: {endpoint}")
+
+    async def run(self, endpoint: str, concurrency: int, requests: int) -> Result:
+        from services.llm_scheduler import percentile
+
+        latencies: List[float] = []
+        errors = 0
+        remaining = iter(range(requests))
+
+        async def worker():
+            nonlocal errors
+            for _ in remaining:
+                start = time.perf_counter()
+                try:
+                    response = await self.request(endpoint)
+                    failed = response.status_code >= 400
+                except Exception:
+                    failed = True
+                latencies.append(time.perf_counter() - start)
+                errors += failed
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+        return Result(
+            requests=requests,
+            errors=errors,
+            rps=round(requests / elapsed, 2),
+            p50_ms=round(percentile(latencies, 0.5) * 1000, 1),
+            p95_ms=round(percentile(latencies, 0.95) * 1000, 1),
+            p99_ms=round(percentile(latencies, 0.99) * 1000, 1),
+        )
+
+
+# ---- Regression check ----
+
+def regressions(results: Dict[str, dict], baseline: Dict[str, dict], tolerance: float) -> List[str]:
+    found = []
+    for key, result in results.items():
+        before = baseline.get(key)
+        if before is None:
+            continue
+        if result["p95_ms"] > before["p95_ms"] * (1 + tolerance):
+            found.append(f"{key}: p95 {before['p95_ms']}ms -> {result['p95_ms']}ms")
+        if result["rps"] < before["rps"] * (1 - tolerance):
+            found.append(f"{key}: throughput {before['rps']}/s -> {result['rps']}/s")
+        if result["errors"] > before["errors"]:
+            found.append(f"{key}: errors {before['errors']} -> {result['errors']}")
+    return found
+
+
+async def main(args) -> int:
+    configure_environment(args)
+    import httpx
+
+    import main as app_module
+    from services.extraction_service import extract_text
+
+    install_fake_llm(args)
+    corpus = make_corpus(args.cvs, args.seed)
+    print(
+        f"{len(corpus)} synthetic CVs, LLM latency {args.llm_latency}, "
+        f"mongo {'at ' + args.mongo_uri if args.mongo_uri else 'in memory'}"
+    )
+
+    results: Dict[str, dict] = {}
+    async with app_module.lifespan(app_module.app):
+        transport = httpx.ASGITransport(app=app_module.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://load-test", timeout=300) as client:
+            load = LoadTest(client, corpus, args)
+            await load.setup()
+            # Start the extraction pool and fill the CV text cache before timing
+            await asyncio.gather(*(extract_text(name, data) for name, data, _ in corpus))
+            for endpoint in args.endpoints:
+                for concurrency in args.concurrency:
+                    result = await load.run(endpoint, concurrency, args.requests)
+                    results[f"{endpoint}@c{concurrency}"] = asdict(result)
+                    print(
+                        f"{endpoint:<14} c={concurrency:<3} {result.rps:8.2f} req/s  "
+                        f"p50={result.p50_ms:8.1f}ms  p95={result.p95_ms:8.1f}ms  "
+                        f"p99={result.p99_ms:8.1f}ms  errors={result.errors}"
+                    )
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=2)
+            f.write("\n")
+        print(f"Saved results to {args.save}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        found = regressions(results, baseline, args.tolerance)
+        for line in found:
+            print(f"REGRESSION {line}")
+        if found:
+            return 1
+        print(f"No regressions beyond {args.tolerance:.0%} against {args.baseline}")
+    return 0
+
+
+def csv_list(kind):
+    return lambda value: [kind(v) for v in value.split(",") if v]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--endpoints", type=csv_list(str), default=list(ENDPOINTS))
+    parser.add_argument("--concurrency", type=csv_list(int), default=[1, 8, 32])
+    parser.add_argument("--requests", type=int, default=32, help="Requests per endpoint and concurrency level")
+    parser.add_argument("--cvs", type=int, default=24, help="Size of the synthetic CV corpus")
+    parser.add_argument("--compare-cvs", type=int, default=8, help="CVs per /compare/upload request")
+    parser.add_argument("--llm-latency", default="lognormal:0.8,0.3", help="See fake_llm_server.parse_distribution")
+    parser.add_argument("--tail-rate", type=float, default=0.0)
+    parser.add_argument("--tail-seconds", type=float, default=0.0)
+    parser.add_argument("--cache-hits", action="store_true", help="Repeat job inputs so the LLM cache answers")
+    parser.add_argument("--mongo-uri", help="Use a local mongod instead of the in-memory stand-in")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--save", help="Write results as JSON")
+    parser.add_argument("--baseline", help="Compare against results saved earlier")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args()
+    unknown = set(args.endpoints) - set(ENDPOINTS)
+    if unknown:
+        parser.error(f"Unknown endpoints: {', '.join(sorted(unknown))}")
+    sys.exit(asyncio.run(main(args)))
@@ -22,6 +22,14 @@ client = AsyncIOMotorClient(
 db = client["evaluno_db"]
 user_collection = db["users"]
 cv_results = db["CVResult"]
+cv_text_cache = db["CVTextCache"]
+llm_cache_collection = db["LLMCache"]
+compare_jobs = db["CompareJobs"]
+compare_job_files = db["CompareJobFiles"]
+compare_candidates = db["CompareCandidates"]
+job_postings = db["JobPostings"]
+job_rankings = db["JobRankings"]
+question_bank_collection = db["QuestionBank"]
 
 def get_db():
     return db
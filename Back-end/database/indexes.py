@@ -0,0 +1,166 @@
+import logging
+import os
+from typing import List
+
+from pymongo import ASCENDING, DESCENDING
+
+from database.connection import (
+    compare_candidates,
+    compare_job_files,
+    compare_jobs,
+    cv_results,
+    cv_text_cache,
+    job_postings,
+    job_rankings,
+    llm_cache_collection,
+    question_bank_collection,
+    user_collection,
+)
+
+# Optional retention for stored interview results; unset keeps them forever
+CV_RESULTS_TTL_DAYS = os.getenv("CV_RESULTS_TTL_DAYS")
+
+CV_RESULTS_TTL_INDEX = "created_at_ttl"
+
+# CV texts behind compare candidate ids; refreshed on every comparison that sees them
+COMPARE_CANDIDATES_TTL_DAYS = os.getenv("COMPARE_CANDIDATES_TTL_DAYS", "30")
+
+# Compare jobs (and any uploads a crashed job left behind), counted from submission
+COMPARE_JOBS_TTL_DAYS = os.getenv("COMPARE_JOBS_TTL_DAYS", "7")
+
+# Extracted CV texts by upload hash; written again whenever a miss re-extracts one
+CV_TEXT_CACHE_TTL_DAYS = os.getenv("CV_TEXT_CACHE_TTL_DAYS", "30")
+
+logger = logging.getLogger(__name__)
+
+
+async def _sync_ttl_index(collection, field: str, name: str, seconds):
+    """Create, update or drop a TTL index so it always matches the configuration."""
+    existing = await collection.index_information()
+    if seconds is None:
+        if name in existing:
+            await collection.drop_index(name)
+        return
+    if name not in existing:
+        await collection.create_index(field, name=name, expireAfterSeconds=seconds)
+    elif existing[name].get("expireAfterSeconds") != seconds:
+        await collection.database.command(
+            "collMod", collection.name, index={"name": name, "expireAfterSeconds": seconds}
+        )
+
+
+async def _create_index(collection, keys, name: str, **options) -> bool:
+    try:
+        await collection.create_index(keys, name=name, **options)
+        return True
+    except Exception:
+        # Most likely data that breaks the index (e.g. duplicate emails); the rest still get built
+        logger.exception("Could not create index %s on %s", name, collection.name)
+        return False
+
+
+async def _drop_index(collection, name: str) -> bool:
+    try:
+        if name in await collection.index_information():
+            await collection.drop_index(name)
+        return True
+    except Exception:
+        logger.exception("Could not drop index %s on %s", name, collection.name)
+        return False
+
+
+async def _sync_ttl(collection, field: str, name: str, seconds) -> bool:
+    try:
+        await _sync_ttl_index(collection, field, name, seconds)
+        return True
+    except Exception:
+        logger.exception("Could not sync TTL index %s on %s", name, collection.name)
+        return False
+
+
+async def ensure_indexes() -> List[str]:
+    """
+    Idempotent index bootstrap, run once from the FastAPI lifespan hook. Each
+    index is attempted on its own, so one failure does not leave the rest
+    unbuilt; returns the names of those that failed.
+    """
+    results = {}
+
+    # Login and registration look users up by email; unique also makes registration race-free
+    results["email_unique"] = await _create_index(user_collection, "email", "email_unique", unique=True)
+
+    # Interview history per user, newest first; _id breaks created_at ties exactly
+    # as the history keyset cursor does, so each page is an index walk with no sort
+    results["user_id_created_at_id"] = await _create_index(
+        cv_results,
+        [("user_id", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)],
+        "user_id_created_at_id",
+    )
+    if results["user_id_created_at_id"]:
+        # Its predecessor is a prefix of it
+        results["drop user_id_created_at"] = await _drop_index(cv_results, "user_id_created_at")
+    ttl_seconds = int(float(CV_RESULTS_TTL_DAYS) * 86400) if CV_RESULTS_TTL_DAYS else None
+    results[CV_RESULTS_TTL_INDEX] = await _sync_ttl(cv_results, "created_at", CV_RESULTS_TTL_INDEX, ttl_seconds)
+
+    # Cached LLM responses expire at their own expires_at
+    results["expires_at_ttl"] = await _create_index(
+        llm_cache_collection, "expires_at", "expires_at_ttl", expireAfterSeconds=0
+    )
+
+    # Compare job sweep and per-job file scans
+    results["status_lease"] = await _create_index(
+        compare_jobs, [("status", ASCENDING), ("lease_until", ASCENDING)], "status_lease"
+    )
+    results["job_id_cv_index"] = await _create_index(
+        compare_job_files, [("job_id", ASCENDING), ("cv_index", ASCENDING)], "job_id_cv_index"
+    )
+
+    # A recruiter's job postings, newest first
+    results["job_postings_user_id_created_at"] = await _create_index(
+        job_postings, [("user_id", ASCENDING), ("created_at", DESCENDING)], "user_id_created_at"
+    )
+    # Ranked candidates per posting: top-N is a walk down this index, no sort in memory
+    results["job_rubric_score"] = await _create_index(
+        job_rankings,
+        [("job_id", ASCENDING), ("rubric_version", ASCENDING), ("score", DESCENDING), ("candidate_id", ASCENDING)],
+        "job_rubric_score",
+    )
+
+    # Question bank candidates share the job title or a skill; the newest are compared first
+    results["title_key_created_at"] = await _create_index(
+        question_bank_collection, [("title_key", ASCENDING), ("created_at", DESCENDING)], "title_key_created_at"
+    )
+    results["skills_created_at"] = await _create_index(
+        question_bank_collection, [("skills", ASCENDING), ("created_at", DESCENDING)], "skills_created_at"
+    )
+
+    candidates_ttl = int(float(COMPARE_CANDIDATES_TTL_DAYS) * 86400) if COMPARE_CANDIDATES_TTL_DAYS else None
+    results["compare_candidates_updated_at_ttl"] = await _sync_ttl(
+        compare_candidates, "updated_at", "updated_at_ttl", candidates_ttl
+    )
+
+    jobs_ttl = int(float(COMPARE_JOBS_TTL_DAYS) * 86400) if COMPARE_JOBS_TTL_DAYS else None
+    results["compare_jobs_created_at_ttl"] = await _sync_ttl(compare_jobs, "created_at", "created_at_ttl", jobs_ttl)
+    results["compare_job_files_created_at_ttl"] = await _sync_ttl(
+        compare_job_files, "created_at", "created_at_ttl", jobs_ttl
+    )
+
+    cv_text_ttl = int(float(CV_TEXT_CACHE_TTL_DAYS) * 86400) if CV_TEXT_CACHE_TTL_DAYS else None
+    results["cv_text_cache_updated_at_ttl"] = await _sync_ttl(
+        cv_text_cache, "updated_at", "updated_at_ttl", cv_text_ttl
+    )
+    return [name for name, ok in results.items() if not ok]
+
+
+async def bootstrap_indexes():
+    try:
+        await user_collection.database.command("ping")
+    except Exception:
+        # One check instead of a server-selection timeout per index
+        logger.exception("Index bootstrap skipped, MongoDB unavailable")
+        return
+    failed = await ensure_indexes()
+    if failed:
+        logger.error("Index bootstrap incomplete, missing: %s", ", ".join(failed))
+    if "email_unique" in failed:
+        logger.error("Without email_unique, registration falls back to a racy lookup before insert")
@@ -1,27 +1,72 @@
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from routes import auth
 from routes import interviewRoute
 from database.connection import get_db, client
+from database.indexes import bootstrap_indexes
 from pymongo.errors import ConnectionFailure
 from routes import compareRoute
 from routes import interview_question_type
+from routes import compareJobRoute
+from routes import historyRoute
+from routes import jobRoute
+from services.extraction_service import shutdown_extraction_pool, warm_up_pool
+from services.compare_jobs import job_workers
+from services.password_hasher import password_hasher
+from services.result_writer import result_writer
+from services.cv_preprocess import compaction_totals
+from services.cv_cache import cv_cache
+from services.llm_cache import llm_cache
+from services.llm_registry import LLM_WARMUP, registry
+from services.llm_scheduler import llm_scheduler
+from services.question_bank import question_bank
+from services.uploads import UploadLimitMiddleware
+from utils.metrics import REGISTRY, MetricsMiddleware
 from dotenv import load_dotenv
 load_dotenv()
 
-app = FastAPI()
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await bootstrap_indexes()
+    await result_writer.start()
+    job_workers.start()
+    if LLM_WARMUP:
+        # Chains and extraction workers are otherwise built by the first request that needs them
+        await asyncio.gather(registry.warm_up(), warm_up_pool())
+    yield
+    await job_workers.stop()
+    await result_writer.stop()
+    shutdown_extraction_pool()
+    await registry.close()
+    password_hasher.shutdown()
+
+
+app = FastAPI(lifespan=lifespan)
+
+# Each add_middleware wraps the ones added before it: the last one added runs first
+app.add_middleware(UploadLimitMiddleware)
+# Outside the upload limit, so the request histogram and Server-Timing include its 413s
+app.add_middleware(MetricsMiddleware)
+# Outermost, so every response, the upload limit's 413 included, carries the CORS headers
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],  # Next.js frontend
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing"],
 )
 
 # Include all routers
 app.include_router(auth.router, prefix="/auth", tags=["Auth"])
+app.include_router(historyRoute.router)
+app.include_router(jobRoute.router)
 app.include_router(interviewRoute.router)
+app.include_router(compareJobRoute.router)
 app.include_router(compareRoute.router)
 app.include_router(interview_question_type.router)
 
@@ -38,3 +83,23 @@ async def check_db_connection():
         return {"status": "success", "message": "Connected to MongoDB Atlas!"}
     except ConnectionFailure as e:
         raise HTTPException(status_code=500, detail=f"Failed to connect to MongoDB: {str(e)}")
+
+# Cache hit/miss counters
+@app.get("/stats")
+def read_stats():
+    return {
+        "cv_text_cache": cv_cache.stats(),
+        "llm_cache": llm_cache.stats(),
+        "password_hasher": password_hasher.stats(),
+        "result_writer": result_writer.stats(),
+        "cv_compaction": compaction_totals,
+        "llm_chains": registry.stats(),
+        "llm_gateway": registry.gateway_stats(),
+        "llm_scheduler": llm_scheduler.stats(),
+        "question_bank": question_bank.stats(),
+    }
+
+# Per-route and per-stage latency histograms, token and cache counters for Prometheus
+@app.get("/metrics", include_in_schema=False)
+def read_metrics():
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
@@ -0,0 +1,78 @@
+from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from typing import List, Optional
+from schemas.compare import CompareJobStatus
+from services.compare_jobs import create_job, get_job
+from services.compare_service import comparator
+from services.llm_scheduler import admit
+import asyncio
+import json
+
+router = APIRouter(prefix="/compare/jobs", tags=["CV Comparison"])
+
+STREAM_POLL_INTERVAL = 1.0
+
+
+def to_status(job: dict) -> CompareJobStatus:
+    return CompareJobStatus(
+        job_id=job["_id"],
+        status=job["status"],
+        progress=job["progress"],
+        results=job.get("results", []),
+        unscored=sorted(job.get("unscored", [])),
+        error=job.get("error"),
+    )
+
+
+@router.post("/", status_code=202)
+async def submit_compare_job(
+    request: Request,
+    cv_files: List[UploadFile] = File(...),
+    job_title: str = Form(...),
+    job_requirements: str = Form(...),
+    job_description: str = Form(...),
+    top_k: Optional[int] = Form(None)
+):
+    if not cv_files:
+        raise HTTPException(status_code=400, detail="No CV files uploaded")
+
+    await admit(request, "bulk", cost=comparator.estimated_calls(len(cv_files), top_k))
+    job_id = await create_job(cv_files, job_title, job_requirements, job_description, top_k)
+    return {"job_id": job_id, "status": "queued"}
+
+
+@router.get("/{job_id}", response_model=CompareJobStatus)
+async def read_compare_job(job_id: str):
+    job = await get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return to_status(job)
+
+
+@router.get("/{job_id}/stream")
+async def stream_compare_job(job_id: str):
+    """NDJSON stream: one line per scored CV as it finishes, then a final status line."""
+    job = await get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    async def lines():
+        sent = set()
+        while True:
+            current = await get_job(job_id)
+            if current is None:
+                # Deleted or expired while the client was watching it
+                yield json.dumps({"event": "error", "detail": "Job not found"}) + "\n"
+                return
+            for result in current.get("results", []):
+                if result["cv_index"] not in sent:
+                    sent.add(result["cv_index"])
+                    yield json.dumps({"event": "result", "result": result}) + "\n"
+
+            if current["status"] in ("completed", "failed"):
+                yield json.dumps({"event": "done", "job": to_status(current).model_dump()}) + "\n"
+                return
+            yield json.dumps({"event": "progress", "progress": current["progress"]}) + "\n"
+            await asyncio.sleep(STREAM_POLL_INTERVAL)
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
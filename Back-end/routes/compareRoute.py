@@ -1,74 +1,71 @@
-from fastapi import APIRouter, UploadFile, File, Form, HTTPException
-from typing import List
-from services.compare_service import CVComparator
-from schemas.compare import CVCompareRequest, CVCompareResponse
-import json
-import io
+from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Request
+from typing import List, Optional
+from services.compare_service import comparator
+from schemas.compare import CVCompareRequest, CVCompareResponse, CompareCandidate
+from services.candidate_store import get_candidate
 import traceback
-from routes.interviewRoute import extract_text_from_pdf_bytes, extract_text_from_docx_bytes
+from services.extraction_service import extract_many
+from services.job_postings import resolve_job
+from services.llm_scheduler import admit
 
 router = APIRouter(prefix="/compare", tags=["CV Comparison"])
-comparator = CVComparator()
 
 @router.post("/", response_model=CVCompareResponse)
-async def compare_cvs(request: CVCompareRequest):
+async def compare_cvs(request: CVCompareRequest, http_request: Request):
     try:
         if not request.cv_texts:
             raise HTTPException(status_code=400, detail="No CV texts provided")
-            
-        comparisons = await comparator.compare_cvs(
+        job = await resolve_job(request.job_id, request.job_title, request.job_requirements, request.job_description)
+
+        await admit(http_request, "bulk", cost=comparator.estimated_calls(len(request.cv_texts), request.top_k))
+
+        return await comparator.compare_cvs(
             request.cv_texts,
-            request.job_title,
-            request.job_requirements,
-            request.job_description
+            job.title,
+            job.requirements,
+            job.description,
+            top_k=request.top_k
         )
-        return {"comparisons": comparisons}
     except HTTPException:
         raise
     except Exception as e:
         print(f"Comparison error: {traceback.format_exc()}")
         raise HTTPException(status_code=500, detail=f"Comparison failed: {str(e)}")
 
-@router.post("/upload")
+@router.post("/upload", response_model=CVCompareResponse)
 async def compare_uploaded_cvs(
+    request: Request,
     cv_files: List[UploadFile] = File(...),
-    job_title: str = Form(...),
-    job_requirements: str = Form(...),
-    job_description: str = Form(...)
+    # A stored posting (see /jobs), or the three job fields
+    job_id: Optional[str] = Form(None),
+    job_title: Optional[str] = Form(None),
+    job_requirements: Optional[str] = Form(None),
+    job_description: Optional[str] = Form(None),
+    top_k: Optional[int] = Form(None)
 ):
     try:
         if not cv_files:
             raise HTTPException(status_code=400, detail="No CV files uploaded")
+        job = await resolve_job(job_id, job_title, job_requirements, job_description)
+
+        # Charge the rate limit before doing any work
+        await admit(request, "bulk", cost=comparator.estimated_calls(len(cv_files), top_k))
 
-        cv_texts = []
-        for file in cv_files:
-            if not file.filename:
-                continue
-                
-            file_bytes = await file.read()
-            
-            if file.filename.lower().endswith(".pdf"):
-                text = extract_text_from_pdf_bytes(file_bytes)
-            elif file.filename.lower().endswith(".docx"):
-                text = extract_text_from_docx_bytes(file_bytes)
-            else:
-                continue
-                
-            if text:
-                cv_texts.append(text)
+        # Parse all CVs in parallel in the extraction pool
+        extracted = await extract_many(cv_files)
 
-        if not cv_texts:
+        if not extracted:
             raise HTTPException(status_code=400, detail="No valid CV content found")
 
-        comparisons = await comparator.compare_cvs(
-            cv_texts,
-            job_title,
-            job_requirements,
-            job_description
+        return await comparator.compare_cvs(
+            [text for _, text in extracted],
+            job.title,
+            job.requirements,
+            job.description,
+            top_k=top_k,
+            filenames=[filename for filename, _ in extracted]
         )
         
-        return {"comparisons": comparisons}
-        
     except HTTPException:
         raise
     except Exception as e:
@@ -76,4 +73,12 @@ async def compare_uploaded_cvs(
         raise HTTPException(
             status_code=500, 
             detail=f"CV comparison failed: {str(e)}"
-        )
\ No newline at end of file
+        )
+
+@router.get("/candidates/{candidate_id}", response_model=CompareCandidate)
+async def read_candidate(candidate_id: str):
+    """Full CV text behind a candidate_id from a comparison result."""
+    candidate = await get_candidate(candidate_id)
+    if candidate is None:
+        raise HTTPException(status_code=404, detail="Candidate not found")
+    return CompareCandidate(candidate_id=candidate["_id"], filename=candidate.get("filename"), text=candidate["text"])
@@ -0,0 +1,100 @@
+from fastapi import APIRouter, HTTPException, Query, Request
+from bson import ObjectId
+from bson.errors import InvalidId
+from datetime import datetime
+from typing import Optional
+from database.connection import cv_results
+from schemas.history import InterviewHistoryPage, InterviewSession, InterviewSessionSummary
+from utils.http_cache import etag_response
+import base64
+import json
+
+router = APIRouter(prefix="/interview/history", tags=["interview"])
+
+SUMMARY_PROJECTION = {
+    "job_title": 1,
+    "created_at": 1,
+    "question_count": {"$size": {"$ifNull": ["$AIResponse", []]}},
+}
+FULL_PROJECTION = {"job_title": 1, "created_at": 1, "AIResponse": 1}
+SORT = [("created_at", -1), ("_id", -1)]
+
+
+# ---- Keyset cursor ----
+# A cursor is the (created_at, _id) of the last session on the previous page.
+# Sessions saved before created_at existed sort last and page by _id alone.
+
+def encode_cursor(doc: dict) -> str:
+    created_at = doc.get("created_at")
+    payload = {"t": created_at.isoformat() if created_at else None, "id": str(doc["_id"])}
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+
+def decode_cursor(cursor: str) -> dict:
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        last_id = ObjectId(payload["id"])
+        created_at = datetime.fromisoformat(payload["t"]) if payload["t"] else None
+    except (ValueError, KeyError, TypeError, InvalidId):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    if created_at is None:
+        return {"created_at": None, "_id": {"$lt": last_id}}
+    return {"$or": [
+        {"created_at": {"$lt": created_at}},
+        {"created_at": created_at, "_id": {"$lt": last_id}},
+        {"created_at": None},
+    ]}
+
+
+# ---- API Endpoints ----
+
+@router.get("/", response_model=InterviewHistoryPage)
+async def list_interview_history(
+    request: Request,
+    user_id: str = Query(...),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None),
+    full: bool = Query(False)
+):
+    query = {"user_id": user_id}
+    if cursor:
+        query.update(decode_cursor(cursor))
+
+    projection = dict(SUMMARY_PROJECTION, **({"AIResponse": 1} if full else {}))
+    docs = await cv_results.find(query, projection).sort(SORT).limit(limit + 1).to_list(length=limit + 1)
+
+    page = docs[:limit]
+    sessions = [
+        InterviewSessionSummary(
+            id=str(doc["_id"]),
+            job_title=doc.get("job_title"),
+            created_at=doc.get("created_at"),
+            question_count=doc.get("question_count", 0),
+            items=doc.get("AIResponse") if full else None,
+        )
+        for doc in page
+    ]
+    next_cursor = encode_cursor(page[-1]) if len(docs) > limit else None
+    return etag_response(request, InterviewHistoryPage(sessions=sessions, next_cursor=next_cursor))
+
+
+@router.get("/{session_id}", response_model=InterviewSession)
+async def read_interview_session(request: Request, session_id: str, user_id: str = Query(...)):
+    try:
+        oid = ObjectId(session_id)
+    except InvalidId:
+        raise HTTPException(status_code=404, detail="Session not found")
+
+    doc = await cv_results.find_one({"_id": oid, "user_id": user_id}, FULL_PROJECTION)
+    if doc is None:
+        raise HTTPException(status_code=404, detail="Session not found")
+
+    session = InterviewSession(
+        id=str(doc["_id"]),
+        user_id=user_id,
+        job_title=doc.get("job_title"),
+        created_at=doc.get("created_at"),
+        items=doc.get("AIResponse", []),
+    )
+    return etag_response(request, session)
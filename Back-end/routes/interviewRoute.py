@@ -101,97 +101,245 @@ async def generate_from_uploaded_cv(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Generation failed: {e}")"""
 
-from fastapi import APIRouter, UploadFile, File, Form, HTTPException
-from schemas.interview import InterviewQnAResponse
-from services.llm import chain
-from database.connection import cv_results
+from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+from schemas.interview import InterviewQnAResponse, QAItem
+import services.llm  # Registers the "interview" and "interview_topup" chains
+from services.llm_registry import registry
+from services.llm_cache import fallback_tracking, llm_cache, model_settings
+from services.result_writer import result_writer
+from services.extraction_service import extract_upload, is_supported
+from services.cv_preprocess import compact_cv
+from services.job_postings import resolve_job
+from services.llm_scheduler import admit
+from services.question_bank import QUESTION_BANK_SET_SIZE, bank_profile, question_bank
+from utils.llm_json import JSONItemScanner, parse_llm_items
+from utils.metrics import count_parse_failures, stage
+from datetime import datetime
+from typing import Optional
 import json
-import fitz
-import docx
-import io
-import re
-import traceback
+import logging
+import time
 
 router = APIRouter(prefix="/interview", tags=["interview"])
+logger = logging.getLogger(__name__)
 
 
 # ---- Utility Functions ----
 
-def extract_text_from_pdf_bytes(file_bytes: bytes) -> str:
-    try:
-        doc = fitz.open(stream=file_bytes, filetype="pdf")
-        text = ""
-        for page in doc:
-            text += str(page.get_text())  # Modern PyMuPDF extraction
-        return text
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"PDF parse error: {e}")
+async def save_result(user_id: str, job_title: str, items: list):
+    # Write-behind: batched insert_many off the request path
+    result_writer.submit({
+        "user_id": user_id,
+        "job_title": job_title,
+        "AIResponse": items,
+        "created_at": datetime.utcnow()
+    })
 
 
-def extract_text_from_docx_bytes(file_bytes: bytes) -> str:
-    try:
-        file_stream = io.BytesIO(file_bytes)
-        document = docx.Document(file_stream)
-        return "\n".join([para.text for para in document.paragraphs])
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"DOCX parse error: {e}")
+def topup_inputs(inputs: dict, banked: list) -> dict:
+    """Prompt inputs asking only for the questions the bank could not supply."""
+    return {
+        **inputs,
+        "count": QUESTION_BANK_SET_SIZE - len(banked),
+        "asked": "\n".join(f"- {item['question']}" for item in banked),
+    }
 
 
-def strip_json_fence(text: str) -> str:
-    """Remove ```json ... ``` or ``` ... ``` fences."""
-    cleaned = re.sub(r"```(?:json)?(.*?)```", r"\1", text, flags=re.DOTALL)
-    return cleaned.strip()
+def format_event(event: str, data: dict, sse: bool) -> str:
+    if sse:
+        return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+    return json.dumps({"event": event, **data}) + "\n"
 
 
 # ---- API Endpoint ----
 
 @router.post("/upload", response_model=InterviewQnAResponse)
 async def generate_from_uploaded_cv(
+    request: Request,
+    response: Response,
     cv_file: UploadFile = File(...),
     user_id: str = Form(...),
-    job_title: str = Form(...),
-    job_requirements: str = Form(...),
-    job_description: str = Form(...)
+    # A stored posting (see /jobs), or the three job fields
+    job_id: Optional[str] = Form(None),
+    job_title: Optional[str] = Form(None),
+    job_requirements: Optional[str] = Form(None),
+    job_description: Optional[str] = Form(None)
 ):
     try:
+        job = await resolve_job(job_id, job_title, job_requirements, job_description)
         filename = cv_file.filename
         if not filename:
             raise HTTPException(status_code=400, detail="No file uploaded")
 
-        file_bytes = await cv_file.read()
-
-        # Extract text depending on file type
-        if filename.lower().endswith(".pdf"):
-            cv_text = extract_text_from_pdf_bytes(file_bytes)
-        elif filename.lower().endswith(".docx"):
-            cv_text = extract_text_from_docx_bytes(file_bytes)
-        else:
+        if not is_supported(filename):
             raise HTTPException(status_code=400, detail="Unsupported file type")
 
-        # Call LLM
-        raw_response = await chain.ainvoke({
-            "cv_text": cv_text,
-            "job_title": job_title,
-            "job_requirements": job_requirements,
-            "job_description": job_description
-        })
+        # Charged once the request is known to be valid, as /upload/stream does
+        await admit(request, "interactive")
 
-        cleaned = strip_json_fence(raw_response)
+        # Extract text in the process pool so the event loop stays free
+        cv_text = await extract_upload(cv_file)
 
-        try:
-            items = json.loads(cleaned)
-        except json.JSONDecodeError:
-            raise HTTPException(status_code=500, detail=f"Invalid JSON from LLM: {raw_response}")
+        # Fit the CV into the prompt token budget
+        compact = compact_cv(cv_text)
+        response.headers.update(compact.headers())
+        cv_text = compact.text
+
+        inputs = {
+            "cv_text": cv_text,
+            "job_title": job.title,
+            "job_requirements": job.requirements,
+            "job_description": job.description
+        }
+
+        llm = await registry.aget("interview")
+        profile = bank_profile(job.title, job.requirements, cv_text)
+
+        async def generate():
+            # Questions generated for similar jobs and CVs first; the LLM writes only the shortfall
+            started = time.perf_counter()
+            with stage("question_bank"):
+                banked = await question_bank.lookup(profile)
+            items = list(banked.items)
+            # The bank never fills a set (QUESTION_BANK_MAX_ITEMS < QUESTION_BANK_SET_SIZE)
+            chain, chain_inputs = llm.chain, inputs
+            if items:
+                chain, chain_inputs = (await registry.aget("interview_topup")).chain, topup_inputs(inputs, items)
+            raw_response = await chain.ainvoke(chain_inputs)
+            parsed = parse_llm_items(raw_response, QAItem)
+            if parsed.dropped:
+                print("Dropped items in /interview/upload:", parsed.report()["dropped"])
+            if not parsed.items:
+                raise HTTPException(status_code=500, detail=f"Invalid JSON from LLM: {raw_response}")
+            # A top-up answer longer than asked for is cut to the shortfall
+            wanted = QUESTION_BANK_SET_SIZE - len(items) if items else None
+            generated = [item.model_dump() for item in parsed.items][:wanted]
+            await question_bank.add(profile, job.title, generated)
+            items += generated
+            question_bank.record(banked, len(generated), started)
+            return items
+
+        # Call LLM (identical inputs are served from the response cache)
+        model_name, temperature = model_settings(llm.model)
+        items = await llm_cache.get_or_compute("interview", inputs, model_name, temperature, generate)
 
         # Save to DB
-        await cv_results.insert_one({
-            "user_id": user_id,
-            "AIResponse": items
-        })
+        await save_result(user_id, job.title, items)
 
         return {"items": items}
 
+    except HTTPException as e:
+        if e.status_code < 500 or e.status_code in (503, 504):
+            raise  # Bad uploads, LLM capacity and parse deadlines keep their status (and Retry-After)
+        logger.exception("Error in /interview/upload")
+        raise HTTPException(status_code=500, detail=f"Generation failed: {e}")
     except Exception as e:
-        print("Error in /interview/upload:", traceback.format_exc())
+        logger.exception("Error in /interview/upload")
         raise HTTPException(status_code=500, detail=f"Generation failed: {e}")
 
+
+
+@router.post("/upload/stream")
+async def stream_from_uploaded_cv(
+    request: Request,
+    cv_file: UploadFile = File(...),
+    user_id: str = Form(...),
+    # A stored posting (see /jobs), or the three job fields
+    job_id: Optional[str] = Form(None),
+    job_title: Optional[str] = Form(None),
+    job_requirements: Optional[str] = Form(None),
+    job_description: Optional[str] = Form(None)
+):
+    """
+    Same as /upload, but each QAItem is sent as soon as the model has finished
+    writing it. NDJSON by default, SSE when the client accepts text/event-stream.
+    """
+    filename = cv_file.filename
+    if not filename:
+        raise HTTPException(status_code=400, detail="No file uploaded")
+    if not is_supported(filename):
+        raise HTTPException(status_code=400, detail="Unsupported file type")
+
+    job = await resolve_job(job_id, job_title, job_requirements, job_description)
+    await admit(request, "interactive")
+    compact = compact_cv(await extract_upload(cv_file))
+    cv_text = compact.text
+    inputs = {
+        "cv_text": cv_text,
+        "job_title": job.title,
+        "job_requirements": job.requirements,
+        "job_description": job.description
+    }
+    llm = await registry.aget("interview")
+    model_name, temperature = model_settings(llm.model)
+    profile = bank_profile(job.title, job.requirements, cv_text)
+    sse = "text/event-stream" in request.headers.get("accept", "")
+
+    async def events():
+        cached = await llm_cache.get("interview", inputs, model_name, temperature)
+        if cached is not None:
+            for item in cached:
+                yield format_event("item", {"item": item}, sse)
+            await save_result(user_id, job.title, cached)
+            yield format_event("done", {"count": len(cached), "cached": True}, sse)
+            return
+
+        # Banked questions go out at once, then the model streams the shortfall
+        started = time.perf_counter()
+        banked = await question_bank.lookup(profile)
+        items = list(banked.items)
+        for item in items:
+            yield format_event("item", {"item": item}, sse)
+
+        chain, chain_inputs = llm.chain, inputs
+        wanted = None
+        if items:
+            chain, chain_inputs = (await registry.aget("interview_topup")).chain, topup_inputs(inputs, items)
+            wanted = QUESTION_BANK_SET_SIZE - len(items)
+        generated = []
+        dropped = 0
+        scanner = JSONItemScanner()
+        try:
+            with fallback_tracking() as fallbacks:
+                async for chunk in chain.astream(chain_inputs):
+                    for obj in scanner.feed(chunk):
+                        try:
+                            item = QAItem(**obj).model_dump()
+                        except ValidationError:
+                            dropped += 1
+                            continue
+                        if wanted is not None and len(generated) >= wanted:
+                            break
+                        generated.append(item)
+                        yield format_event("item", {"item": item}, sse)
+                    if wanted is not None and len(generated) >= wanted:
+                        break  # Stop reading (and paying for) a top-up that runs long
+        except Exception as e:
+            logger.exception("Error in /interview/upload/stream")
+            yield format_event("error", {"detail": f"Generation failed: {e}"}, sse)
+            return
+
+        if not generated:
+            yield format_event("error", {"detail": "Invalid JSON from LLM"}, sse)
+            return
+
+        # Persist only the validated set, once the stream is complete
+        items += generated
+        await question_bank.add(profile, job.title, generated)
+        question_bank.record(banked, len(generated), started)
+        if not fallbacks:
+            # Keyed by the primary model; a fallback's answer is not stored under it
+            await llm_cache.put("interview", inputs, model_name, temperature, items)
+        await save_result(user_id, job.title, items)
+        count_parse_failures("validation", dropped)
+        count_parse_failures("invalid_json", len(scanner.malformed))
+        # A top-up cut short is not a truncated answer
+        truncated = int(scanner.truncated and len(generated) != wanted)
+        count_parse_failures("truncated", truncated)
+        dropped += len(scanner.malformed) + truncated
+        yield format_event("done", {"count": len(items), "dropped": dropped, "banked": len(banked.items)}, sse)
+
+    media_type = "text/event-stream" if sse else "application/x-ndjson"
+    return StreamingResponse(events(), media_type=media_type, headers=compact.headers())
@@ -1,20 +1,27 @@
-from fastapi import APIRouter, HTTPException, UploadFile, File, Form
+from fastapi import APIRouter, HTTPException, UploadFile, File, Form, Request, Response
 from pydantic import BaseModel
-from langchain_groq import ChatGroq
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.messages import SystemMessage, HumanMessage
-from langchain_core.output_parsers import StrOutputParser
+from typing import List, Optional
+from services.extraction_service import extract_upload
+from services.cv_preprocess import compact_cv
+from services.llm_cache import llm_cache, model_settings
+from services.llm_registry import LLMChain, registry
+from services.job_postings import resolve_job
+from services.llm_scheduler import admit
+from schemas.interview import QAItem
+from utils.llm_json import is_complete_answer, parse_llm_items
 from dotenv import load_dotenv
+import asyncio
 import os
-import json
 
 load_dotenv()
 
 router = APIRouter()
 
-# Initialize model + parser
-model = ChatGroq(model="llama-3.3-70b-versatile")
-parser = StrOutputParser()
+QUESTION_TYPES = ["technical", "behavioral", "scenario", "project"]
+
+# Shared by every request so a burst of multi-type requests cannot flood the provider
+TYPE_GENERATION_CONCURRENCY = int(os.getenv("TYPE_GENERATION_CONCURRENCY", "4"))
+_generation_slots = asyncio.Semaphore(TYPE_GENERATION_CONCURRENCY)
 
 # Request schema (if needed for other endpoints)
 class InterviewTypeRequest(BaseModel):
@@ -24,70 +31,125 @@ class InterviewTypeRequest(BaseModel):
     job_description: str
     type: str  # technical, behavioral, scenario, project
 
-# ✅ Updated ChatPromptTemplate for LangChain 0.2+
-prompt = ChatPromptTemplate.from_messages([
-    SystemMessage(
-        content=(
-            "You are a senior technical recruiter and interviewer with deep industry experience.\n"
-            "Given the candidate's CV, job title, job requirements, and job description:\n"
-            "- Generate 8–12 interview questions that are ONLY of type: {type}\n"
-            "- Each item must include:\n"
-            "    • 'question': A clearly phrased question\n"
-            "    • 'answer': A plausible answer\n"
-            "    • 'type': must be '{type}'\n"
-            "    • 'difficulty': one of ['easy', 'medium', 'hard']\n\n"
-            "Return ONLY valid JSON array like:\n"
-            "[{\"question\": str, \"answer\": str, \"type\": str, \"difficulty\": str}]"
-        )
+# Role/content tuples (not SystemMessage objects) so {type}, {cv_text}, ... are filled in
+PROMPT_MESSAGES = [
+    ("system",
+        "You are a senior technical recruiter and interviewer with deep industry experience.\n"
+        "Given the candidate's CV, job title, job requirements, and job description:\n"
+        "- Generate 8–12 interview questions that are ONLY of type: {type}\n"
+        "- Each item must include:\n"
+        "    • 'question': A clearly phrased question\n"
+        "    • 'answer': A plausible answer\n"
+        "    • 'type': must be '{type}'\n"
+        "    • 'difficulty': one of ['easy', 'medium', 'hard']\n\n"
+        "Return ONLY valid JSON array like:\n"
+        "[{{\"question\": str, \"answer\": str, \"type\": str, \"difficulty\": str}}]"
     ),
-    HumanMessage(
-        content=(
-            "CV Text:\n{cv_text}\n\n"
-            "Job Title: {job_title}\n"
-            "Requirements: {job_requirements}\n"
-            "Description: {job_description}\n\n"
-            "Generate only '{type}' questions."
-        )
+    ("human",
+        "CV Text:\n{cv_text}\n\n"
+        "Job Title: {job_title}\n"
+        "Requirements: {job_requirements}\n"
+        "Description: {job_description}\n\n"
+        "Generate only '{type}' questions."
     ),
-])
+]
+
 
-chain = prompt | model | parser
+@registry.register("interview_type")
+def build_chain() -> LLMChain:
+    from langchain_core.output_parsers import StrOutputParser
+    from langchain_core.prompts import ChatPromptTemplate
+    from services.llm_gateway import make_gateway
+
+    model = make_gateway(validate=is_complete_answer)
+    prompt = ChatPromptTemplate.from_messages(PROMPT_MESSAGES)
+    return LLMChain(chain=prompt | model | StrOutputParser(), model=model)
 
 
 # ----------------------------- ROUTE --------------------------------
 
+async def generate_for_type(cv_text: str, job_title: str, job_requirements: str, job_description: str, type: str) -> list:
+    inputs = {
+        "cv_text": cv_text,
+        "job_title": job_title,
+        "job_requirements": job_requirements,
+        "job_description": job_description,
+        "type": type,
+    }
+
+    llm = await registry.aget("interview_type")
+
+    async def generate():
+        async with _generation_slots:
+            output = await llm.chain.ainvoke(inputs)
+        parsed = parse_llm_items(output, QAItem)
+        if parsed.dropped:
+            print(f"Dropped items ({type}):", parsed.report()["dropped"])
+        if not parsed.items:
+            raise ValueError(f"No valid questions in LLM output for type '{type}'")
+        return [item.model_dump() for item in parsed.items]
+
+    model_name, temperature = model_settings(llm.model)
+    return await llm_cache.get_or_compute("interview_type", inputs, model_name, temperature, generate)
+
+
 @router.post("/interview/generate-type")
 async def generate_by_type_upload(
+    request: Request,
+    response: Response,
     cv_file: UploadFile = File(...),
-    job_title: str = Form(...),
-    job_requirements: str = Form(...),
-    job_description: str = Form(...),
-    type: str = Form(...)
+    # A stored posting (see /jobs), or the three job fields
+    job_id: Optional[str] = Form(None),
+    job_title: Optional[str] = Form(None),
+    job_requirements: Optional[str] = Form(None),
+    job_description: Optional[str] = Form(None),
+    type: Optional[str] = Form(None),
+    # Plain List: FastAPI 0.109 does not collect repeated form fields into an Optional[List]
+    types: List[str] = Form([])
 ):
-    if type not in ["technical", "behavioral", "scenario", "project"]:
+    """
+    Generate questions for one `type` or several `types` (repeated field or
+    comma-separated). Types run concurrently; a failing type is reported in
+    `errors` without discarding the others.
+    """
+    requested = []
+    for value in (types or []) + ([type] if type else []):
+        for t in value.split(","):
+            t = t.strip()
+            if t and t not in requested:
+                requested.append(t)
+
+    if not requested or any(t not in QUESTION_TYPES for t in requested):
         raise HTTPException(status_code=400, detail="Invalid type specified")
+    job = await resolve_job(job_id, job_title, job_requirements, job_description)
+
+    # One LLM call per type
+    await admit(request, "interactive", cost=len(requested))
+
+    # Read uploaded CV (cached by content hash, parsed off the event loop)
+    # and fit it into the prompt token budget
+    compact = compact_cv(await extract_upload(cv_file))
+    response.headers.update(compact.headers())
+    cv_text = compact.text
+
+    results = await asyncio.gather(
+        *(generate_for_type(cv_text, job.title, job.requirements, job.description, t) for t in requested),
+        return_exceptions=True,
+    )
+
+    by_type = {}
+    errors = {}
+    for t, result in zip(requested, results):
+        if isinstance(result, BaseException):
+            errors[t] = f"Error processing model response: {str(result)}"
+        else:
+            by_type[t] = result
+
+    if not by_type:
+        overloaded = [r for r in results if isinstance(r, HTTPException) and r.status_code == 503]
+        if overloaded:
+            raise overloaded[0]
+        raise HTTPException(status_code=500, detail="; ".join(errors.values()))
 
-    # Read uploaded CV
-    try:
-        contents = await cv_file.read()
-        cv_text = contents.decode("utf-8", errors="ignore")
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=f"Could not read CV: {str(e)}")
-
-    # Run model
-    try:
-        output = chain.invoke({
-            "cv_text": cv_text,
-            "job_title": job_title,
-            "job_requirements": job_requirements,
-            "job_description": job_description,
-            "type": type,
-        })
-
-        print("LLM Output:", output)
-
-        items = json.loads(output)
-        return {"items": items}
-
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error processing model response: {str(e)}")
+    items = [item for t in requested for item in by_type.get(t, [])]
+    return {"items": items, "by_type": by_type, "errors": errors}
@@ -0,0 +1,95 @@
+from fastapi import APIRouter, File, HTTPException, Query, Request, UploadFile
+from typing import List
+from database.connection import job_postings
+from schemas.job import JobPosting, JobPostingCreate, JobRanking, RankingUpdate
+from services.extraction_service import extract_many
+from services.job_postings import create_job_posting, get_job_posting
+from services.llm_scheduler import admit
+from services.ranking_service import add_candidates, count_ranked, rubric_scorer, top_candidates
+from utils.http_cache import etag_response
+
+router = APIRouter(prefix="/jobs", tags=["Jobs"])
+
+
+def to_posting(doc: dict) -> JobPosting:
+    return JobPosting(
+        job_id=doc["_id"],
+        job_title=doc["title"],
+        job_requirements=doc["requirements"],
+        job_description=doc["description"],
+        profile=doc["profile"],
+        created_at=doc.get("created_at"),
+    )
+
+
+@router.post("/", response_model=JobPosting, status_code=201)
+async def create_posting(request: JobPostingCreate):
+    """
+    Store a job posting and its requirement profile. Pass the returned job_id
+    instead of the job fields to the interview and compare endpoints.
+    """
+    if not request.job_title.strip():
+        raise HTTPException(status_code=400, detail="job_title is required")
+    posting = await create_job_posting(
+        request.job_title, request.job_requirements, request.job_description, request.user_id
+    )
+    return to_posting(posting)
+
+
+@router.get("/", response_model=List[JobPosting])
+async def list_postings(user_id: str = Query(...), limit: int = Query(20, ge=1, le=100)):
+    docs = await job_postings.find({"user_id": user_id}).sort("created_at", -1).limit(limit).to_list(length=limit)
+    return [to_posting(doc) for doc in docs]
+
+
+@router.get("/{job_id}", response_model=JobPosting)
+async def read_posting(request: Request, job_id: str):
+    return etag_response(request, to_posting(await posting_or_404(job_id)))
+
+
+async def posting_or_404(job_id: str) -> dict:
+    posting = await get_job_posting(job_id)
+    if posting is None:
+        raise HTTPException(status_code=404, detail="Job posting not found")
+    return posting
+
+
+@router.post("/{job_id}/candidates", response_model=RankingUpdate)
+async def add_posting_candidates(request: Request, job_id: str, cv_files: List[UploadFile] = File(...)):
+    """
+    Add CVs to the posting's ranking. Only CVs it has not seen are scored;
+    the rest of the ranking is left as it is.
+    """
+    posting = await posting_or_404(job_id)
+    if not cv_files:
+        raise HTTPException(status_code=400, detail="No CV files uploaded")
+
+    # Charged as if every CV were new; re-uploads are cheaper than that
+    await admit(request, "bulk", cost=rubric_scorer.estimated_calls(len(cv_files), top_k=len(cv_files)))
+    extracted = await extract_many(cv_files)
+    if not extracted:
+        raise HTTPException(status_code=400, detail="No valid CV content found")
+
+    update = await add_candidates(
+        posting, [text for _, text in extracted], [filename for filename, _ in extracted]
+    )
+    return RankingUpdate(
+        job_id=job_id,
+        added=update.added,
+        already_ranked=update.already_ranked,
+        unscored=update.unscored,
+        total=await count_ranked(job_id),
+    )
+
+
+@router.get("/{job_id}/ranking", response_model=JobRanking)
+async def read_ranking(
+    request: Request,
+    job_id: str,
+    limit: int = Query(20, ge=1, le=200),
+    skip: int = Query(0, ge=0)
+):
+    """Top candidates for a posting from the stored ranking; no LLM call."""
+    await posting_or_404(job_id)
+    total, docs = await top_candidates(job_id, limit, skip)
+    return etag_response(request, JobRanking(job_id=job_id, total=total, candidates=docs))
@@ -1,17 +1,74 @@
 from pydantic import BaseModel
-from typing import List
+from typing import List, Literal, Optional
 
 class CVCompareRequest(BaseModel):
     cv_texts: List[str]  # List of CV texts to compare
-    job_title: str
-    job_requirements: str
-    job_description: str
+    job_id: Optional[str] = None  # A stored posting (see /jobs), or the three job fields
+    job_title: Optional[str] = None
+    job_requirements: Optional[str] = None
+    job_description: Optional[str] = None
+    top_k: Optional[int] = None  # Only the top_k pre-ranked CVs are sent to the LLM
+
+class CVShardScore(BaseModel):
+    # What the model returns per CV; everything else is joined back in server-side
+    cv_index: int  # 1-based position of the CV within its prompt
+    score: float
+    strengths: List[str]
+    weaknesses: List[str]
 
 class CVScore(BaseModel):
-    cv_text: str
+    candidate_id: str  # Content hash; full text at GET /compare/candidates/{candidate_id}
+    cv_index: int  # Position of the CV in the request
+    filename: Optional[str] = None
     score: float
     strengths: List[str]
     weaknesses: List[str]
+    matched_keywords: List[str] = []
+    missing_keywords: List[str] = []
+    scored_by: Literal["llm", "prerank"] = "llm"
+    duplicate_of: Optional[int] = None  # cv_index of the near-duplicate this score was copied from
+
+class CVDuplicateCluster(BaseModel):
+    representative: int  # cv_index of the copy that was scored
+    members: List[int]  # Every cv_index in the cluster, representative first
+
+class CVTokenCounts(BaseModel):
+    before: int  # Estimated prompt tokens of the CVs as extracted
+    after: int  # ... and after compaction
 
 class CVCompareResponse(BaseModel):
-    comparisons: List[CVScore]
\ No newline at end of file
+    comparisons: List[CVScore]  # Ranked by score, highest first
+    unscored: List[int] = []  # Indexes of CVs the model could not score
+    prescreened: List[CVScore] = []  # CVs outside the shortlist, with keyword-only scores
+    cv_tokens: Optional[CVTokenCounts] = None
+    duplicates: List[CVDuplicateCluster] = []  # Near-duplicate CVs scored once for the whole cluster
+
+class CompareJobResult(BaseModel):
+    cv_index: int  # Position of the CV in the uploaded batch
+    filename: str
+    candidate_id: Optional[str] = None
+    score: float
+    strengths: List[str]
+    weaknesses: List[str]
+    matched_keywords: List[str] = []
+    missing_keywords: List[str] = []
+    scored_by: Literal["llm", "prerank"] = "llm"
+
+class CompareCandidate(BaseModel):
+    candidate_id: str
+    filename: Optional[str] = None
+    text: str
+
+class CompareJobProgress(BaseModel):
+    total: int
+    parsed: int = 0
+    scored: int = 0
+    failed: int = 0
+
+class CompareJobStatus(BaseModel):
+    job_id: str
+    status: Literal["queued", "running", "completed", "failed"]
+    progress: CompareJobProgress
+    results: List[CompareJobResult] = []  # Ranked by score once the job completes
+    unscored: List[int] = []
+    error: Optional[str] = None
@@ -0,0 +1,22 @@
+from pydantic import BaseModel
+from typing import List, Optional
+from datetime import datetime
+from schemas.interview import QAItem
+
+class InterviewSessionSummary(BaseModel):
+    id: str
+    job_title: Optional[str] = None
+    created_at: Optional[datetime] = None
+    question_count: int
+    items: Optional[List[QAItem]] = None  # Only with ?full=true
+
+class InterviewSession(BaseModel):
+    id: str
+    user_id: str
+    job_title: Optional[str] = None
+    created_at: Optional[datetime] = None
+    items: List[QAItem]
+
+class InterviewHistoryPage(BaseModel):
+    sessions: List[InterviewSessionSummary]
+    next_cursor: Optional[str] = None  # Pass back as ?cursor= for the next page
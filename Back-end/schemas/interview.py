@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import List
+from typing import List, Optional
 
 class InterviewQnARequest(BaseModel):
     user_id: str
@@ -12,6 +12,7 @@ class QAItem(BaseModel):
     question: str
     answer: str
     difficulty: str  # e.g. "easy", "medium", "hard"
+    type: Optional[str] = None  # e.g. "technical", "behavioral", "scenario", "project"
 
 class InterviewQnAResponse(BaseModel):
     items: List[QAItem]
\ No newline at end of file
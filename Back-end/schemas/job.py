@@ -0,0 +1,48 @@
+from pydantic import BaseModel
+from datetime import datetime
+from typing import List, Optional
+
+class JobPostingCreate(BaseModel):
+    job_title: str
+    job_requirements: str
+    job_description: str
+    user_id: Optional[str] = None
+
+class JobProfile(BaseModel):
+    skills: List[str]  # Normalized skill keywords, title first, then must-haves, then nice-to-haves
+    must_have: List[str]
+    nice_to_have: List[str]
+    summary: str  # Condensed description sent to the LLM in place of the full one
+    tokens_before: int  # Estimated prompt tokens of the requirements and description as posted
+    tokens_after: int  # ... and of the profile that replaces them
+
+class JobPosting(BaseModel):
+    job_id: str  # Send as job_id to /interview/upload, /interview/generate-type and /compare/upload
+    job_title: str
+    job_requirements: str
+    job_description: str
+    profile: JobProfile
+    created_at: Optional[datetime] = None
+
+class RankedCandidate(BaseModel):
+    candidate_id: str  # Full text at GET /compare/candidates/{candidate_id}
+    filename: Optional[str] = None
+    score: float
+    strengths: List[str]
+    weaknesses: List[str]
+    matched_keywords: List[str] = []
+    missing_keywords: List[str] = []
+    duplicate_of: Optional[str] = None  # candidate_id of the near-duplicate whose score this copies
+    scored_at: Optional[datetime] = None
+
+class RankingUpdate(BaseModel):
+    job_id: str
+    added: List[RankedCandidate]  # Scored by this upload, best first
+    already_ranked: List[str] = []  # candidate_ids that were in the ranking already and were not rescored
+    unscored: List[str] = []  # Filenames the model could not score; upload them again to retry
+    total: int  # Candidates in the ranking after this upload
+
+class JobRanking(BaseModel):
+    job_id: str
+    total: int
+    candidates: List[RankedCandidate]  # Best first
@@ -0,0 +1,48 @@
+import hashlib
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from pymongo import UpdateOne
+
+from database.connection import compare_candidates
+from services.cv_cache import normalize_cv_text
+from services.cv_parsers import PAGE_BREAK
+from utils.metrics import stage
+
+CANDIDATE_ID_LENGTH = 16
+
+
+def candidate_id(text: str) -> str:
+    """Stable id for a CV: the same content always maps to the same candidate, whatever the file."""
+    # Where the pages break is layout, not content
+    lines = [line for line in normalize_cv_text(text).split("\n") if line != PAGE_BREAK]
+    digest = hashlib.sha256("\n".join(lines).encode("utf-8")).hexdigest()
+    return digest[:CANDIDATE_ID_LENGTH]
+
+
+async def save_candidates(candidates: List[Tuple[str, str, Optional[str]]]):
+    """
+    Upsert (candidate_id, text, filename) triples so compare responses can
+    reference CVs by id while the full text stays fetchable on demand.
+    """
+    if not candidates:
+        return
+    now = datetime.utcnow()
+    operations = [
+        UpdateOne(
+            {"_id": cid},
+            {"$set": {"text": text, "filename": filename, "updated_at": now}},
+            upsert=True,
+        )
+        for cid, text, filename in candidates
+    ]
+    try:
+        with stage("mongo_insert"):
+            await compare_candidates.bulk_write(operations, ordered=False)
+    except Exception as e:
+        # The ranking is still valid without the stored text; only later lookups miss
+        print(f"Saving compare candidates failed: {e}")
+
+
+async def get_candidate(cid: str) -> Optional[dict]:
+    return await compare_candidates.find_one({"_id": cid})
@@ -0,0 +1,375 @@
+import asyncio
+import os
+import uuid
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+from bson import Binary
+from fastapi import HTTPException, UploadFile
+from pymongo import ReturnDocument
+
+from database.connection import compare_job_files, compare_jobs
+from services.candidate_store import candidate_id, save_candidates
+from services.compare_service import comparator
+from services.extraction_service import extract_text, is_supported
+from services.prerank_service import PRERANK_TOP_K, prerank, split_shortlist
+from services.cv_preprocess import compact_cv
+from services.llm_scheduler import WorkClass, current_work
+from services.uploads import read_upload
+
+COMPARE_JOB_WORKERS = int(os.getenv("COMPARE_JOB_WORKERS", "2"))
+COMPARE_JOB_LEASE = int(os.getenv("COMPARE_JOB_LEASE", "120"))
+COMPARE_JOB_SWEEP_INTERVAL = int(os.getenv("COMPARE_JOB_SWEEP_INTERVAL", "30"))
+
+# Job document lifecycle: queued -> running -> completed | failed.
+# A running job holds a lease; when its worker dies the lease expires and the
+# next sweep hands the job to another worker, which skips every finished stage.
+ACTIVE_STATUSES = ["queued", "running"]
+
+
+class LeaseLost(Exception):
+    """Another worker took the job over; this one must stop writing to it."""
+
+
+# ---- Job creation ----
+
+async def create_job(
+    files: List[UploadFile],
+    job_title: str,
+    job_requirements: str,
+    job_description: str,
+    top_k: Optional[int] = None,
+) -> str:
+    job_id = uuid.uuid4().hex
+    created_at = datetime.utcnow()
+    file_docs = []
+    for file in files:
+        if not is_supported(file.filename):
+            continue
+        file_docs.append({
+            "job_id": job_id,
+            "cv_index": len(file_docs),
+            "filename": file.filename,
+            "data": Binary(await read_upload(file)),
+            "text": None,
+            "error": None,
+            "created_at": created_at,
+        })
+
+    if not file_docs:
+        raise HTTPException(status_code=400, detail="No valid CV files uploaded")
+
+    await compare_job_files.insert_many(file_docs)
+    await compare_jobs.insert_one({
+        "_id": job_id,
+        "status": "queued",
+        "created_at": created_at,
+        "job_title": job_title,
+        "job_requirements": job_requirements,
+        "job_description": job_description,
+        "top_k": top_k,
+        "progress": {"total": len(file_docs), "parsed": 0, "scored": 0, "failed": 0},
+        "shards": None,
+        "results": [],
+        "unscored": [],
+        "error": None,
+        "lease_until": None,
+    })
+    job_workers.enqueue(job_id)
+    return job_id
+
+
+async def get_job(job_id: str) -> Optional[dict]:
+    return await compare_jobs.find_one({"_id": job_id}, {"shards": 0, "lease_until": 0, "lease_owner": 0})
+
+
+# ---- Job processing stages ----
+
+async def _parse_files(job_id: str):
+    """Extract text for every file not parsed yet, dropping the raw bytes once done."""
+    pending = await compare_job_files.find(
+        {"job_id": job_id, "text": None, "error": None},
+        {"cv_index": 1, "filename": 1, "data": 1},
+    ).to_list(length=None)
+
+    async def parse(doc):
+        try:
+            text = await extract_text(doc["filename"], bytes(doc["data"]))
+            update, counter = {"text": text or "", "error": None if text else "No text found"}, "parsed"
+        except HTTPException as e:
+            update, counter = {"text": None, "error": e.detail}, "failed"
+        # Only the first worker to finish a file counts it, should two ever parse it
+        stored = await compare_job_files.update_one(
+            {"_id": doc["_id"], "text": None, "error": None}, {"$set": update, "$unset": {"data": ""}}
+        )
+        if stored.modified_count:
+            await _update_owned(job_id, {"$inc": {f"progress.{counter}": 1}})
+
+    await asyncio.gather(*(parse(doc) for doc in pending))
+
+
+async def _plan_shards(job: dict, files: List[dict]) -> List[dict]:
+    """Pre-rank once, store the prescreened results and the LLM shards on the job."""
+    if job.get("shards") is not None:
+        return job["shards"]
+
+    texts = [f["text"] for f in files]
+    ids = [candidate_id(text) for text in texts]
+    await save_candidates([(cid, f["text"], f["filename"]) for cid, f in zip(ids, files)])
+    ranking = prerank(texts, job["job_title"], job["job_requirements"], job["job_description"])
+    top_k = job["top_k"] or PRERANK_TOP_K
+    shortlist, rest = split_shortlist(ranking, top_k)
+
+    prescreened = [
+        {
+            "cv_index": files[i]["cv_index"],
+            "filename": files[i]["filename"],
+            "candidate_id": ids[i],
+            "score": ranking.scores[i],
+            "strengths": [],
+            "weaknesses": [],
+            "matched_keywords": ranking.matched[i],
+            "missing_keywords": ranking.missing[i],
+            "scored_by": "prerank",
+        }
+        for i in rest
+    ]
+    shards = [
+        {
+            "cv_indexes": [files[i]["cv_index"] for i in shortlist[start:start + comparator.batch_size]],
+            "status": "pending",
+        }
+        for start in range(0, len(shortlist), comparator.batch_size)
+    ]
+    keywords = {
+        files[i]["cv_index"]: {"matched_keywords": ranking.matched[i], "missing_keywords": ranking.missing[i]}
+        for i in shortlist
+    }
+    update = {"$set": {"shards": shards, "keywords": {str(k): v for k, v in keywords.items()}}}
+    if prescreened:
+        update["$push"] = {"results": {"$each": prescreened}}
+        update["$inc"] = {"progress.scored": len(prescreened)}
+    await _update_owned(job["_id"], update, {"shards": None})
+    return shards
+
+
+async def _score_shards(job: dict, shards: List[dict], files: List[dict]):
+    by_index = {f["cv_index"]: f for f in files}
+    keywords = (await compare_jobs.find_one({"_id": job["_id"]}, {"keywords": 1})).get("keywords", {})
+    semaphore = asyncio.Semaphore(comparator.max_concurrency)
+
+    async def score(shard_no: int, shard: dict):
+        if shard["status"] != "pending":
+            return
+        members = [by_index[i] for i in shard["cv_indexes"]]
+        texts = [compact_cv(m["text"]).text for m in members]
+        # Same rescoring of left-out CVs as the synchronous /compare path
+        scores = await comparator.score_shard_or_singles(
+            texts,
+            semaphore,
+            job["job_title"],
+            job["job_requirements"],
+            job["job_description"],
+        )
+        # A shard is written once, and only by the lease holder, so a worker that
+        # overran its lease can never push the same candidates a second time
+        pending = {f"shards.{shard_no}.status": "pending"}
+        if not scores:
+            await _update_owned(job["_id"], {
+                "$set": {f"shards.{shard_no}.status": "failed"},
+                "$push": {"unscored": {"$each": shard["cv_indexes"]}},
+                "$inc": {"progress.failed": len(members)},
+            }, pending)
+            return
+
+        results = []
+        for s in scores:
+            member = members[s.cv_index - 1]
+            result = s.model_dump()
+            result.update(keywords.get(str(member["cv_index"]), {}))
+            result.update({
+                "cv_index": member["cv_index"],
+                "filename": member["filename"],
+                "candidate_id": candidate_id(member["text"]),
+                "scored_by": "llm",
+            })
+            results.append(result)
+        # CVs that could not be scored even on their own
+        scored = {r["cv_index"] for r in results}
+        missing = [i for i in shard["cv_indexes"] if i not in scored]
+        await _update_owned(job["_id"], {
+            "$set": {f"shards.{shard_no}.status": "done"},
+            "$push": {"results": {"$each": results}, "unscored": {"$each": missing}},
+            "$inc": {"progress.scored": len(results), "progress.failed": len(missing)},
+        }, pending)
+
+    await asyncio.gather(*(score(i, shard) for i, shard in enumerate(shards)))
+
+
+async def _drop_files(job_id: str):
+    """The raw uploads are only needed until the job ends; candidate texts live on in CompareCandidates."""
+    try:
+        await compare_job_files.delete_many({"job_id": job_id})
+    except Exception as e:
+        print(f"Could not delete the files of compare job {job_id}: {e}")
+
+
+async def _finish(job_id: str):
+    job = await compare_jobs.find_one({"_id": job_id}, {"results": 1})
+    ranked = sorted(job["results"], key=lambda r: (r["scored_by"] != "llm", -r["score"]))
+    await _update_owned(
+        job_id,
+        {"$set": {"status": "completed", "results": ranked, "finished_at": datetime.utcnow(), "lease_until": None}},
+    )
+    await _drop_files(job_id)
+
+
+async def process_job(job: dict):
+    job_id = job["_id"]
+    # Bulk priority, and no queue timeout: nobody is waiting on the connection
+    current_work.set(WorkClass("bulk", queue_timeout=None))
+    heartbeat = asyncio.create_task(_keep_lease(job_id))
+    try:
+        await _parse_files(job_id)
+        files = await compare_job_files.find(
+            {"job_id": job_id, "text": {"$nin": [None, ""]}},
+            {"cv_index": 1, "filename": 1, "text": 1},
+        ).sort("cv_index", 1).to_list(length=None)
+        if not files:
+            raise ValueError("No valid CV content found")
+
+        shards = await _plan_shards(job, files)
+        await _score_shards(job, shards, files)
+        await _finish(job_id)
+    except LeaseLost:
+        print(f"Compare job {job_id} was taken over by another worker; stopping here")
+    except Exception as e:
+        print(f"Compare job {job_id} failed: {e}")
+        failed = await compare_jobs.update_one(
+            {"_id": job_id, "lease_owner": _worker_id},
+            {"$set": {"status": "failed", "error": str(e), "finished_at": datetime.utcnow(), "lease_until": None}},
+        )
+        if failed.modified_count:
+            await _drop_files(job_id)
+    finally:
+        heartbeat.cancel()
+
+
+# ---- Leases ----
+
+_worker_id = uuid.uuid4().hex
+
+
+async def _claim(job_id: str) -> Optional[dict]:
+    now = datetime.utcnow()
+    return await compare_jobs.find_one_and_update(
+        {
+            "_id": job_id,
+            "status": {"$in": ACTIVE_STATUSES},
+            "$or": [{"lease_until": None}, {"lease_until": {"$lt": now}}],
+        },
+        {"$set": {
+            "status": "running",
+            "lease_owner": _worker_id,
+            "lease_until": now + timedelta(seconds=COMPARE_JOB_LEASE),
+        }},
+        return_document=ReturnDocument.AFTER,
+    )
+
+
+async def _renew_lease(job_id: str) -> bool:
+    """Extend this worker's lease; False once another worker owns the job."""
+    renewed = await compare_jobs.update_one(
+        {"_id": job_id, "lease_owner": _worker_id, "status": "running"},
+        {"$set": {"lease_until": datetime.utcnow() + timedelta(seconds=COMPARE_JOB_LEASE)}},
+    )
+    return renewed.matched_count > 0
+
+
+async def _keep_lease(job_id: str):
+    """
+    Heartbeat for the whole run of a job: one shard can wait in the bulk queue
+    and retry for longer than a lease, so renewing between stages is not enough.
+    """
+    while True:
+        await asyncio.sleep(COMPARE_JOB_LEASE / 3)
+        try:
+            if not await _renew_lease(job_id):
+                return
+        except Exception as e:
+            print(f"Lease renewal failed for compare job {job_id}: {e}")
+
+
+async def _update_owned(job_id: str, update: dict, condition: Optional[dict] = None):
+    """Apply a job update only while this worker holds the lease (and `condition` holds)."""
+    result = await compare_jobs.update_one({"_id": job_id, "lease_owner": _worker_id, **(condition or {})}, update)
+    if result.matched_count:
+        return
+    owner = await compare_jobs.find_one({"_id": job_id}, {"lease_owner": 1})
+    if owner is None or owner.get("lease_owner") != _worker_id:
+        raise LeaseLost(job_id)
+    # Still ours: the condition failed because an earlier run of this worker already wrote it
+
+
+# ---- Worker pool ----
+
+class CompareJobWorkers:
+    """Background workers that claim queued or orphaned jobs and run them to completion."""
+
+    def __init__(self, concurrency: int = COMPARE_JOB_WORKERS):
+        self.concurrency = concurrency
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+
+    def enqueue(self, job_id: str):
+        if self._queue is not None:
+            self._queue.put_nowait(job_id)
+
+    async def _sweep(self):
+        """Re-enqueue jobs left behind by a restart or by a worker that lost its lease."""
+        while True:
+            try:
+                cursor = compare_jobs.find(
+                    {
+                        "status": {"$in": ACTIVE_STATUSES},
+                        "$or": [{"lease_until": None}, {"lease_until": {"$lt": datetime.utcnow()}}],
+                    },
+                    {"_id": 1},
+                )
+                async for job in cursor:
+                    self.enqueue(job["_id"])
+            except Exception as e:
+                print(f"Compare job sweep failed: {e}")
+            await asyncio.sleep(COMPARE_JOB_SWEEP_INTERVAL)
+
+    async def _work(self):
+        while True:
+            job_id = await self._queue.get()
+            try:
+                job = await _claim(job_id)
+                if job is not None:
+                    await process_job(job)
+            except Exception as e:
+                print(f"Compare job worker error for {job_id}: {e}")
+            finally:
+                self._queue.task_done()
+
+    def start(self):
+        self._queue = asyncio.Queue()
+        self._tasks = [asyncio.create_task(self._work()) for _ in range(self.concurrency)]
+        self._tasks.append(asyncio.create_task(self._sweep()))
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._queue = None
+        # Hand unfinished jobs back immediately instead of waiting for the lease to expire
+        await compare_jobs.update_many(
+            {"lease_owner": _worker_id, "status": "running"},
+            {"$set": {"lease_until": None}},
+        )
+
+
+job_workers = CompareJobWorkers()
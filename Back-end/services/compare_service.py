@@ -1,92 +1,292 @@
 import os
-from langchain_groq import ChatGroq
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.output_parsers import StrOutputParser
-import json
-from typing import List
-from schemas.compare import CVScore
-import re
-import os
+import asyncio
+import math
+from dataclasses import replace
+from fastapi import HTTPException
+from typing import Dict, List, Optional, Tuple
+from schemas.compare import CVDuplicateCluster, CVScore, CVShardScore, CVCompareResponse, CVTokenCounts
+from services.candidate_store import candidate_id, save_candidates
+from services.dedup_service import find_duplicates
+from services.llm_cache import llm_cache, model_settings
+from services.llm_registry import LLMChain, registry
+from services.prerank_service import PRERANK_TOP_K, prerank, split_shortlist
+from services.cv_preprocess import compact_cv
+from utils.llm_json import is_complete_answer, parse_llm_items
+from utils.metrics import stage
+
+# CVs per LLM call, concurrent calls per comparison, and retries per shard. The
+# LLM gateway already retries and falls back between models on every call, so
+# a shard is retried at most once on top of that (and not at all by default)
+COMPARE_BATCH_SIZE = int(os.getenv("COMPARE_BATCH_SIZE", "5"))
+COMPARE_MAX_CONCURRENCY = int(os.getenv("COMPARE_MAX_CONCURRENCY", "16"))
+COMPARE_MAX_RETRIES = min(1, int(os.getenv("COMPARE_MAX_RETRIES", "0")))
+
+# Bumped whenever the shape of the model's answer changes, so stale cached answers are never read
+COMPARE_CACHE_NAMESPACE = "compare:v2"
+
+
+# The system message carries the job, the human message the batch of CVs
+PROMPT_MESSAGES = [
+    ("system",
+     "You are an expert recruiter. Score each CV independently against the job requirements on an "
+     "absolute scale, so scores stay comparable across separate requests, and "
+     "provide scores (0-100) with strengths/weaknesses. Return ONLY a single JSON array with one item per CV, "
+     "where each item contains:\n"
+     "- cv_index: The number from the CV's header line\n"
+     "- score: Match score (0-100)\n"
+     "- strengths: 3 key strengths\n"
+     "- weaknesses: 3 key weaknesses\n"
+     "Do not repeat the CV text in your answer.\n\n"
+     "Job Title: {job_title}\n"
+     "Requirements: {job_requirements}\n"
+     "Description: {job_description}"),
+    ("human", "CVs to compare:\n{cv_texts}")
+]
+
+
+async def gather_or_cancel(*aws):
+    """asyncio.gather that cancels the remaining tasks once one of them raises."""
+    tasks = [asyncio.ensure_future(aw) for aw in aws]
+    try:
+        return await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+
+
+@registry.register("compare")
+def build_chain() -> LLMChain:
+    from langchain_core.output_parsers import StrOutputParser
+    from langchain_core.prompts import ChatPromptTemplate
+    from services.llm_gateway import make_gateway
+
+    model = make_gateway(temperature=0.3, validate=is_complete_answer)
+    prompt = ChatPromptTemplate.from_messages(PROMPT_MESSAGES)
+    return LLMChain(chain=prompt | model | StrOutputParser(), model=model)
+
 
 class CVComparator:
-    def __init__(self):
-        self.chain = self._create_chain()
-    print("DEBUG GROQ KEY:", os.getenv("GROQ_API_KEY"))
-
-
-    def _create_chain(self):
-        prompt = ChatPromptTemplate.from_messages([
-            ("system", 
-             "You are an expert recruiter. Compare multiple CVs against job requirements and "
-             "provide scores (0-100) with strengths/weaknesses. Return ONLY a single JSON array, where each item contains:\n"
-             "- cv_text: The original CV text\n"
-             "- score: Match score (0-100)\n"
-             "- strengths: 3 key strengths\n"
-             "- weaknesses: 3 key weaknesses\n\n"
-             "Job Title: {job_title}\n"
-             "Requirements: {job_requirements}\n"
-             "Description: {job_description}"),
-            ("human", "CVs to compare:\n{cv_texts}")
-        ])
-
-        model = ChatGroq(model="llama-3.3-70b-versatile", temperature=0.3)
-        return prompt | model | StrOutputParser()
-
-    def extract_json_objects(self, text: str) -> List[dict]:
+    def __init__(
+        self,
+        batch_size: int = COMPARE_BATCH_SIZE,
+        max_concurrency: int = COMPARE_MAX_CONCURRENCY,
+        max_retries: int = COMPARE_MAX_RETRIES,
+        chain: str = "compare",
+        cache_namespace: str = COMPARE_CACHE_NAMESPACE,
+    ):
+        self.batch_size = max(1, batch_size)
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_retries = min(1, max(0, max_retries))
+        # Any registered chain taking the same inputs and answering with CVShardScores
+        self.chain = chain
+        self.cache_namespace = cache_namespace
+
+    def estimated_calls(self, cv_count: int, top_k: Optional[int] = None) -> int:
+        """LLM calls a comparison of `cv_count` CVs will make, charged against the caller's rate limit."""
+        shortlisted = min(cv_count, PRERANK_TOP_K if top_k is None else max(1, top_k))
+        return max(1, math.ceil(shortlisted / self.batch_size))
+
+    async def _score_shard_once(self, shard: List[str], job_title: str, job_requirements: str, job_description: str) -> List[CVShardScore]:
+        """Score one small batch of CVs with a single LLM call."""
+        inputs = {
+            "cv_texts": "\n\n---\n\n".join(f"CV {i + 1}:\n{text}" for i, text in enumerate(shard)),
+            "job_title": job_title,
+            "job_requirements": job_requirements,
+            "job_description": job_description
+        }
+
+        llm = await registry.aget(self.chain)
+
+        async def score():
+            result = await llm.chain.ainvoke(inputs)
+            parsed = parse_llm_items(result, CVShardScore)
+            if parsed.dropped:
+                print(f"Dropped scores in shard of {len(shard)}:", parsed.report()["dropped"])
+            # With a complete answer a bad cv_index can still be resolved by position
+            complete = len(parsed.items) == len(shard) and not parsed.dropped
+
+            scores = {}
+            for position, item in enumerate(parsed.items):
+                index = item.cv_index
+                if not 1 <= index <= len(shard) or index in scores:
+                    if not complete or position + 1 in scores:
+                        continue
+                    index = position + 1
+                item.cv_index = index
+                scores[index] = item.model_dump()
+            if not scores:
+                raise ValueError(f"No valid scores in model output for {len(shard)} CVs")
+            # Only validated scores are cached; CVs missing from a partial answer are rescored on their own
+            return [scores[index] for index in sorted(scores)]
+
+        model_name, temperature = model_settings(llm.model)
+        scores = await llm_cache.get_or_compute(self.cache_namespace, inputs, model_name, temperature, score)
+        return [CVShardScore(**obj) for obj in scores]
+
+    async def score_shard(
+        self,
+        shard: List[str],
+        semaphore: asyncio.Semaphore,
+        job_title: str,
+        job_requirements: str,
+        job_description: str,
+    ) -> Optional[List[CVShardScore]]:
+        """
+        Score a shard, retrying it on its own; returns None once retries are exhausted.
+        Each score's cv_index is the 1-based position of its CV within the shard.
+        """
+        last_error = None
+        for attempt in range(self.max_retries + 1):
+            async with semaphore:
+                try:
+                    return await self._score_shard_once(shard, job_title, job_requirements, job_description)
+                except HTTPException:
+                    raise  # Overloaded (LLM queue full or timed out); retrying here would only add load
+                except Exception as e:
+                    last_error = e
+            if attempt < self.max_retries:
+                await asyncio.sleep(0.5 * 2 ** attempt)
+        print(f"Shard of {len(shard)} CVs failed after {self.max_retries + 1} attempts: {last_error}")
+        return None
+
+    async def score_shard_or_singles(
+        self,
+        shard: List[str],
+        semaphore: asyncio.Semaphore,
+        job_title: str,
+        job_requirements: str,
+        job_description: str,
+    ) -> List[CVShardScore]:
         """
-        Extracts JSON objects from LLM output.
-        Handles both a single JSON array or multiple objects inside a markdown block.
+        Score a shard, then rescore one by one the CVs it could not: all of them
+        when the shard failed, or those the model left out of a partial answer.
+        Scores are ordered and indexed (1-based cv_index) by position within the
+        shard; CVs missing from the result stayed unscored.
         """
-        # Try to extract a full JSON array first
-        array_match = re.search(r"\[\s*{.*?}\s*]", text, re.DOTALL)
-        if array_match:
-            try:
-                return json.loads(array_match.group(0))
-            except json.JSONDecodeError:
-                pass  # Fallback to individual object parsing
-
-        # Fallback: extract markdown JSON block
-        block_match = re.search(r"```json\s*(.*?)\s*```", text, re.DOTALL)
-        if not block_match:
-            raise ValueError("No JSON block found in model output")
-
-        json_block = block_match.group(1)
-
-        # Extract individual objects from the block
-        object_strings = re.findall(r'{[^{}]*?(?:(?R)|[^{}])*}', json_block, re.DOTALL)
-        parsed = []
-        for obj_str in object_strings:
-            try:
-                parsed_obj = json.loads(obj_str)
-                parsed.append(parsed_obj)
-            except json.JSONDecodeError:
-                print(f"⚠️ Failed to decode block: {obj_str[:100]}...")
-                continue
-
-        if not parsed:
-            raise ValueError("All extracted blocks failed to parse as JSON")
-
-        return parsed
+        scores = await self.score_shard(shard, semaphore, job_title, job_requirements, job_description)
+        scored = {s.cv_index: s for s in scores or []}
+        missing = [i for i in range(1, len(shard) + 1) if i not in scored]
+        if len(shard) > 1 and missing:
+            singles = await gather_or_cancel(*(
+                self.score_shard([shard[i - 1]], semaphore, job_title, job_requirements, job_description)
+                for i in missing
+            ))
+            for index, single in zip(missing, singles):
+                if single is not None:
+                    single[0].cv_index = index
+                    scored[index] = single[0]
+        return [scored[index] for index in sorted(scored)]
 
     async def compare_cvs(
+        self, 
+        cv_texts: List[str], 
+        job_title: str, 
+        job_requirements: str, 
+        job_description: str,
+        top_k: Optional[int] = None,
+        filenames: Optional[List[str]] = None
+    ) -> CVCompareResponse:
+        """
+        Pre-rank the CVs locally with BM25 and send only the top_k to the LLM.
+        The rest come back in `prescreened` with their keyword coverage score.
+        Near-duplicate CVs (the same candidate uploaded twice) take one slot:
+        the first copy is scored and its score is copied to the others.
+        Results reference CVs by candidate_id; the texts are stored for lookup.
+        """
+        top_k = PRERANK_TOP_K if top_k is None else max(1, top_k)
+        filenames = filenames or [None] * len(cv_texts)
+        ids = [candidate_id(text) for text in cv_texts]
+        await save_candidates(list(zip(ids, cv_texts, filenames)))
+
+        with stage("dedup"):
+            # MinHash is CPU-bound; large batches would otherwise stall the event loop
+            dedup = await asyncio.to_thread(find_duplicates, cv_texts)
+        members = dedup.members()
+
+        ranking = prerank(cv_texts, job_title, job_requirements, job_description)
+        shortlist, rest = split_shortlist(replace(ranking, order=[i for i in ranking.order if i in members]), top_k)
+
+        def results(representative: int, **fields) -> List[CVScore]:
+            return [
+                CVScore(
+                    candidate_id=ids[i],
+                    cv_index=i,
+                    filename=filenames[i],
+                    matched_keywords=ranking.matched[i],
+                    missing_keywords=ranking.missing[i],
+                    duplicate_of=None if i == representative else representative,
+                    **fields,
+                )
+                for i in members[representative]
+            ]
+
+        # Only the shortlisted CVs reach the prompt, so only they are compacted
+        compacted = [compact_cv(cv_texts[i]) for i in shortlist]
+        scored, unscored = await self.score_pool(
+            [c.text for c in compacted], job_title, job_requirements, job_description
+        )
+
+        comparisons = [
+            score
+            for position, s in scored.items()
+            for score in results(shortlist[position], score=s.score, strengths=s.strengths, weaknesses=s.weaknesses)
+        ]
+        # Stable, so copies stay next to the CV they were scored through
+        comparisons.sort(key=lambda c: c.score, reverse=True)
+
+        return CVCompareResponse(
+            comparisons=comparisons,
+            unscored=sorted(i for position in unscored for i in members[shortlist[position]]),
+            prescreened=[
+                score
+                for i in rest
+                for score in results(i, score=ranking.scores[i], strengths=[], weaknesses=[], scored_by="prerank")
+            ],
+            duplicates=[
+                CVDuplicateCluster(representative=cluster[0], members=cluster) for cluster in dedup.clusters
+            ],
+            cv_tokens=CVTokenCounts(
+                before=sum(c.tokens_before for c in compacted),
+                after=sum(c.tokens_after for c in compacted),
+            ),
+        )
+
+    async def score_pool(
         self, 
         cv_texts: List[str], 
         job_title: str, 
         job_requirements: str, 
         job_description: str
-    ) -> List[CVScore]:
-        try:
-            result = await self.chain.ainvoke({
-                "cv_texts": "\n\n---\n\n".join(cv_texts),
-                "job_title": job_title,
-                "job_requirements": job_requirements,
-                "job_description": job_description
-            })
-
-            print("Raw model output:", repr(result))  # Debug: Show full output
-
-            parsed_objects = self.extract_json_objects(result)
-            return [CVScore(**obj) for obj in parsed_objects]
-
-        except Exception as e:
-            raise ValueError(f"Comparison failed: {str(e)}")
+    ) -> Tuple[Dict[int, CVShardScore], List[int]]:
+        """
+        Fan the CVs out in fixed-size shards scored concurrently, then merge them
+        into one ranking. A shard that fails is split into single CVs so one
+        malformed answer only costs the CVs it actually covered; CVs left out of
+        an otherwise valid answer are rescored the same way (score_shard_or_singles).
+        Returns the scores keyed by position in `cv_texts`, and the positions left unscored.
+        """
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        starts = list(range(0, len(cv_texts), self.batch_size))
+        shards = [cv_texts[start:start + self.batch_size] for start in starts]
+
+        # An HTTPException (LLM capacity) fails the comparison; the other shards stop with it
+        results = await gather_or_cancel(*(
+            self.score_shard_or_singles(shard, semaphore, job_title, job_requirements, job_description)
+            for shard in shards
+        ))
+
+        scored: Dict[int, CVShardScore] = {}
+        unscored: List[int] = []
+        for start, shard, scores in zip(starts, shards, results):
+            scored.update((start + s.cv_index - 1, s) for s in scores)
+            unscored.extend(i for i in range(start, start + len(shard)) if i not in scored)
+
+        if not scored:
+            raise ValueError("Comparison failed: no CV could be scored")
+
+        return scored, sorted(unscored)
+
+
+comparator = CVComparator()
@@ -0,0 +1,109 @@
+import os
+import re
+import unicodedata
+from collections import OrderedDict
+from datetime import datetime
+from typing import Optional, Tuple
+
+from database.connection import cv_text_cache
+from services.cv_parsers import PAGE_BREAK
+from utils.metrics import count_cache
+
+# Memory tier bound, in UTF-8 bytes of cached text; Mongo entries expire per database.indexes
+CV_CACHE_MAX_BYTES = int(os.getenv("CV_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+
+_SPACES = re.compile(r"[ \t\f\v ]+")
+_BLANK_LINES = re.compile(r"\n{3,}")
+
+
+def normalize_cv_text(text: str) -> str:
+    """
+    Canonical form stored in the cache: NFKC, collapsed spaces, at most one
+    blank line, and each PDF page break kept as a line of its own.
+    """
+    text = unicodedata.normalize("NFKC", text).replace("\r\n", "\n").replace("\r", "\n")
+    pages = []
+    for page in text.split(PAGE_BREAK):
+        lines = [_SPACES.sub(" ", line).strip() for line in page.split("\n")]
+        pages.append(_BLANK_LINES.sub("\n\n", "\n".join(lines)).strip())
+    return f"\n{PAGE_BREAK}\n".join(page for page in pages if page)
+
+
+class CVTextCache:
+    """
+    Two-tier cache of extracted CV text keyed by the SHA-256 of the uploaded bytes.
+    The memory tier is an LRU bounded by the total size of the cached text;
+    the Mongo tier is shared by every worker and survives restarts.
+    """
+
+    def __init__(self, collection, max_bytes: int = CV_CACHE_MAX_BYTES):
+        self.collection = collection
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, Tuple[str, int]]" = OrderedDict()  # digest -> (text, bytes)
+        self._size = 0
+        self.memory_hits = 0
+        self.mongo_hits = 0
+        self.misses = 0
+
+    def _remember(self, digest: str, text: str):
+        if digest in self._entries:
+            self._size -= self._entries.pop(digest)[1]
+        # Characters undercount non-ASCII text, which is most CVs outside English
+        size = len(text.encode())
+        if size > self.max_bytes:
+            return
+        self._entries[digest] = (text, size)
+        self._size += size
+        while self._size > self.max_bytes:
+            _, (_, evicted) = self._entries.popitem(last=False)
+            self._size -= evicted
+
+    async def get(self, digest: str) -> Optional[str]:
+        entry = self._entries.get(digest)
+        if entry is not None:
+            self._entries.move_to_end(digest)
+            self.memory_hits += 1
+            count_cache("cv_text", "memory_hit")
+            return entry[0]
+
+        try:
+            doc = await self.collection.find_one({"_id": digest}, {"text": 1})
+        except Exception as e:
+            print(f"CV cache lookup failed: {e}")
+            doc = None
+
+        if doc is not None:
+            self.mongo_hits += 1
+            count_cache("cv_text", "mongo_hit")
+            self._remember(digest, doc["text"])
+            return doc["text"]
+
+        self.misses += 1
+        count_cache("cv_text", "miss")
+        return None
+
+    async def put(self, digest: str, text: str):
+        self._remember(digest, text)
+        try:
+            await self.collection.update_one(
+                {"_id": digest},
+                {"$set": {"text": text, "updated_at": datetime.utcnow()}},
+                upsert=True,
+            )
+        except Exception as e:
+            print(f"CV cache write failed: {e}")
+
+    def stats(self) -> dict:
+        lookups = self.memory_hits + self.mongo_hits + self.misses
+        return {
+            "memory_hits": self.memory_hits,
+            "mongo_hits": self.mongo_hits,
+            "misses": self.misses,
+            "hit_rate": (self.memory_hits + self.mongo_hits) / lookups if lookups else 0.0,
+            "entries": len(self._entries),
+            "bytes": self._size,
+            "max_bytes": self.max_bytes,
+        }
+
+
+cv_cache = CVTextCache(cv_text_cache)
@@ -0,0 +1,64 @@
+# Parsers executed inside the extraction worker processes.
+# Kept free of app imports so spawned workers do not open Mongo or LLM clients.
+# PyMuPDF and python-docx are imported on first use: only the workers need
+# them, and the API process imports this module for the function references.
+import io
+import time
+from typing import Optional
+
+
+# Written between PDF pages so cv_preprocess can tell page headers and footers from content
+PAGE_BREAK = "\f"
+
+
+class ExtractionTimeout(Exception):
+    pass
+
+
+def preload():
+    """Import the parser libraries now rather than on the first CV (see extraction_service.warm_up_pool)."""
+    import docx  # noqa: F401
+    import fitz  # noqa: F401
+
+
+def _pdf_text(doc, deadline: Optional[float]) -> str:
+    pages = []
+    for page in doc:
+        if deadline is not None and time.time() > deadline:
+            raise ExtractionTimeout("PDF extraction exceeded its deadline")
+        pages.append(str(page.get_text()))
+    return PAGE_BREAK.join(pages)
+
+
+def _docx_text(document) -> str:
+    return "\n".join(para.text for para in document.paragraphs)
+
+
+def parse_pdf_bytes(file_bytes: bytes, deadline: Optional[float] = None) -> str:
+    """Extract text from a PDF, giving up once the wall-clock deadline passes."""
+    import fitz  # PyMuPDF
+
+    with fitz.open(stream=file_bytes, filetype="pdf") as doc:
+        return _pdf_text(doc, deadline)
+
+
+def parse_docx_bytes(file_bytes: bytes, deadline: Optional[float] = None) -> str:
+    import docx
+
+    return _docx_text(docx.Document(io.BytesIO(file_bytes)))
+
+
+# Path variants for spooled uploads: the worker reads pages and zip members
+# from disk on demand instead of receiving the whole file through a pipe.
+
+def parse_pdf_file(path: str, deadline: Optional[float] = None) -> str:
+    import fitz
+
+    with fitz.open(path, filetype="pdf") as doc:
+        return _pdf_text(doc, deadline)
+
+
+def parse_docx_file(path: str, deadline: Optional[float] = None) -> str:
+    import docx
+
+    return _docx_text(docx.Document(path))
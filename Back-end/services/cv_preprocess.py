@@ -0,0 +1,201 @@
+import math
+import os
+import re
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+
+from services.cv_cache import normalize_cv_text
+from services.cv_parsers import PAGE_BREAK
+
+CV_TOKEN_BUDGET = int(os.getenv("CV_TOKEN_BUDGET", "2000"))
+CHARS_PER_TOKEN = 4  # Close enough for English prose with Llama tokenizers
+
+# Higher keeps longer; sections at priority 1 are dropped first when over budget
+SECTION_PRIORITIES = {
+    "header": 3,
+    "summary": 3,
+    "experience": 3,
+    "skills": 3,
+    "projects": 3,
+    "education": 2,
+    "certifications": 2,
+    "awards": 2,
+    "publications": 2,
+    "languages": 2,
+    "volunteering": 1,
+    "interests": 1,
+    "references": 1,
+}
+
+SECTION_HEADINGS = {
+    "summary": ("summary", "profile", "objective", "about me", "professional summary", "career objective"),
+    "experience": ("experience", "work experience", "professional experience", "employment", "work history", "career history"),
+    "skills": ("skills", "technical skills", "core skills", "competencies", "core competencies", "technologies", "tech stack"),
+    "projects": ("projects", "personal projects", "key projects", "selected projects"),
+    "education": ("education", "academic background", "qualifications", "academic qualifications"),
+    "certifications": ("certifications", "certificates", "licenses", "courses", "training"),
+    "awards": ("awards", "achievements", "honors", "honours", "accomplishments"),
+    "publications": ("publications", "research", "papers"),
+    "languages": ("languages",),
+    "volunteering": ("volunteering", "volunteer experience", "volunteer", "extracurricular activities", "activities"),
+    "interests": ("interests", "hobbies", "hobbies and interests", "personal interests"),
+    "references": ("references", "referees"),
+}
+_HEADING_LOOKUP = {alias: name for name, aliases in SECTION_HEADINGS.items() for alias in aliases}
+
+_PAGE_FURNITURE = re.compile(r"^(page\s*)?\d{1,3}(\s*(of|/)\s*\d{1,3})?$", re.IGNORECASE)
+# Lines at the top and bottom of a page that may be a running header or footer
+PAGE_EDGE_LINES = 3
+_HEADING_CLEAN = re.compile(r"[^a-z ]+")
+
+
+# Running totals across requests, reported on /stats
+compaction_totals = {"cvs": 0, "tokens_before": 0, "tokens_after": 0}
+
+
+def estimate_tokens(text: str) -> int:
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+@dataclass
+class Section:
+    name: str
+    lines: List[str] = field(default_factory=list)
+
+    @property
+    def priority(self) -> int:
+        return SECTION_PRIORITIES.get(self.name, 2)
+
+    def text(self) -> str:
+        return "\n".join(self.lines)
+
+
+@dataclass
+class CompactCV:
+    text: str
+    tokens_before: int
+    tokens_after: int
+    sections: List[str]
+    dropped_sections: List[str]
+
+    def headers(self) -> dict:
+        return {"X-CV-Tokens-Before": str(self.tokens_before), "X-CV-Tokens-After": str(self.tokens_after)}
+
+
+def _heading_name(line: str) -> Optional[str]:
+    if len(line) > 40:
+        return None
+    key = _HEADING_CLEAN.sub("", line.lower().replace("&", " and ")).strip()
+    key = " ".join(key.split())
+    return _HEADING_LOOKUP.get(key)
+
+
+def _edge_lines(lines: List[str]) -> List[Tuple[int, str]]:
+    """
+    (index, key) for the first and last PAGE_EDGE_LINES lines with content,
+    page numbers aside. The key holds the line's offset from its edge, since
+    a running header or footer sits at the same place on every page.
+    """
+    content = [i for i, line in enumerate(lines) if line and not _PAGE_FURNITURE.match(line)]
+    top = [(i, f"top {n} {lines[i].lower()}") for n, i in enumerate(content[:PAGE_EDGE_LINES])]
+    bottom = [(i, f"bottom {n} {lines[i].lower()}") for n, i in enumerate(reversed(content[-PAGE_EDGE_LINES:]))]
+    return top + bottom
+
+
+def page_furniture(pages: List[List[str]]) -> set:
+    """
+    Edge keys (see _edge_lines) shared by at least half the pages, and two at
+    least: running headers and footers. A line repeated in the body, such as
+    the same job title under two roles, is not one of them.
+    """
+    if len(pages) < 2:
+        return set()
+    counts = Counter()
+    for lines in pages:
+        counts.update({key for _, key in _edge_lines(lines)})
+    needed = max(2, math.ceil(len(pages) / 2))
+    return {key for key, seen_on in counts.items() if seen_on >= needed}
+
+
+def clean_lines(text: str) -> List[str]:
+    """Normalize, then drop page numbers and the headers/footers repeated at page edges."""
+    pages = [page.strip("\n").split("\n") for page in normalize_cv_text(text).split(PAGE_BREAK)]
+    furniture = page_furniture(pages)
+    seen = set()
+    cleaned = []
+    for lines in pages:
+        repeated = {i for i, key in _edge_lines(lines) if key in furniture}
+        for i, line in enumerate(lines):
+            if _PAGE_FURNITURE.match(line):
+                continue
+            # The first copy stays: a running header usually carries the candidate's name
+            if i in repeated:
+                key = line.lower()
+                if key in seen:
+                    continue
+                seen.add(key)
+            # Collapse runs of blank lines left behind by removed furniture
+            if not line and (not cleaned or not cleaned[-1]):
+                continue
+            cleaned.append(line)
+    return cleaned
+
+
+def split_sections(lines: List[str]) -> List[Section]:
+    sections = [Section("header")]
+    for line in lines:
+        name = _heading_name(line) if line else None
+        if name is not None:
+            sections.append(Section(name, [line]))
+        else:
+            sections[-1].lines.append(line)
+    return [s for s in sections if any(s.lines)]
+
+
+def compact_cv(text: str, budget: int = CV_TOKEN_BUDGET) -> CompactCV:
+    """
+    Fit a CV into `budget` tokens: clean it, then drop low-value sections,
+    then trim the tail of the least important sections (later roles,
+    older entries), and only as a last resort cut the text itself.
+    """
+    tokens_before = estimate_tokens(text)
+    sections = split_sections(clean_lines(text))
+    dropped = []
+    # Running character count, so trimming stays linear in the CV length
+    chars = len("\n".join(s.text() for s in sections))
+    limit = budget * CHARS_PER_TOKEN
+
+    if chars > limit:
+        for section in sorted([s for s in sections if s.priority == 1], key=lambda s: -len(s.text())):
+            sections.remove(section)
+            dropped.append(section.name)
+            chars -= len(section.text()) + 1
+            if chars <= limit:
+                break
+
+    for priority in (2, 3):
+        if chars <= limit:
+            break
+        for section in sorted([s for s in sections if s.priority == priority], key=lambda s: -len(s.text())):
+            # Keep the heading and the first entry so the model still sees the section exists
+            while len(section.lines) > 2 and chars > limit:
+                chars -= len(section.lines.pop()) + 1
+            if chars <= limit:
+                break
+
+    compacted = "\n".join(s.text() for s in sections).strip()
+    if estimate_tokens(compacted) > budget:
+        compacted = compacted[:budget * CHARS_PER_TOKEN]
+
+    tokens_after = estimate_tokens(compacted)
+    compaction_totals["cvs"] += 1
+    compaction_totals["tokens_before"] += tokens_before
+    compaction_totals["tokens_after"] += tokens_after
+    return CompactCV(
+        text=compacted,
+        tokens_before=tokens_before,
+        tokens_after=tokens_after,
+        sections=[s.name for s in sections],
+        dropped_sections=dropped,
+    )
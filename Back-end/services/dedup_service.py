@@ -0,0 +1,129 @@
+import os
+import re
+from dataclasses import dataclass
+from typing import Dict, List
+
+import numpy as np
+
+# Estimated Jaccard similarity of word shingles above which two CVs count as the same candidate
+DEDUP_THRESHOLD = float(os.getenv("DEDUP_THRESHOLD", "0.8"))
+DEDUP_SHINGLE_WORDS = int(os.getenv("DEDUP_SHINGLE_WORDS", "5"))
+# 16 bands of 8 rows: a pair at Jaccard 0.8 shares a bucket with p ~ 0.95 and at 0.9 with p > 0.999,
+# one at 0.5 with p ~ 0.06, so most unrelated pairs are never compared
+DEDUP_NUM_PERM = int(os.getenv("DEDUP_NUM_PERM", "128"))
+DEDUP_BANDS = int(os.getenv("DEDUP_BANDS", "16"))
+DEDUP_SEED = 1
+
+_WORD = re.compile(r"\w+")
+
+
+@dataclass
+class DedupResult:
+    representative: List[int]  # Per CV, the index of the CV scored in its place (itself when unique)
+    compared: int  # Candidate pairs whose signatures were compared
+
+    @property
+    def unique(self) -> List[int]:
+        return [i for i, r in enumerate(self.representative) if r == i]
+
+    def members(self) -> Dict[int, List[int]]:
+        """Representative -> every CV it stands for, itself first."""
+        groups: Dict[int, List[int]] = {}
+        for i, r in enumerate(self.representative):
+            groups.setdefault(r, []).append(i)
+        return groups
+
+    @property
+    def clusters(self) -> List[List[int]]:
+        """Groups of two or more near-duplicates, representative first."""
+        return [members for members in self.members().values() if len(members) > 1]
+
+
+def shingles(text: str, words: int = DEDUP_SHINGLE_WORDS) -> np.ndarray:
+    """
+    Hashes of the distinct runs of `words` consecutive words; layout and case do
+    not matter. Words go through the built-in str hash, which is salted per
+    process: fine here, as signatures are only compared within one call.
+    """
+    tokens = _WORD.findall(text.lower())
+    if not tokens:
+        return np.empty(0, dtype=np.uint64)
+    hashes = np.fromiter(map(hash, tokens), dtype=np.int64, count=len(tokens)).view(np.uint64)
+    k = min(words, len(hashes))
+    shingle = np.zeros(len(hashes) - k + 1, dtype=np.uint64)
+    for offset in range(k):
+        # Polynomial hash of the word hashes, wrapping at 64 bits
+        shingle *= np.uint64(1000003)
+        shingle += hashes[offset:offset + len(shingle)]
+    return np.unique(shingle)
+
+
+class MinHasher:
+    def __init__(self, num_perm: int = DEDUP_NUM_PERM, seed: int = DEDUP_SEED):
+        rng = np.random.default_rng(seed)
+        max_value = np.iinfo(np.uint64).max
+        # Odd multipliers, as multiply-shift requires
+        self.a = rng.integers(1, max_value, size=(num_perm, 1), dtype=np.uint64, endpoint=True) | np.uint64(1)
+        self.b = rng.integers(0, max_value, size=(num_perm, 1), dtype=np.uint64, endpoint=True)
+
+    def signature(self, shingle_hashes: np.ndarray) -> np.ndarray:
+        # Multiply-shift hashing, one function per permutation, keeping each one's minimum.
+        # uint64 arithmetic wraps, so there is no modulo; in place, as this is the hot loop
+        hashed = self.a * shingle_hashes[None, :]
+        hashed += self.b
+        hashed >>= np.uint64(32)
+        return hashed.min(axis=1)
+
+
+_hasher = MinHasher()
+
+
+def find_duplicates(
+    cv_texts: List[str],
+    threshold: float = DEDUP_THRESHOLD,
+    bands: int = DEDUP_BANDS,
+) -> DedupResult:
+    """
+    Cluster near-duplicate CVs with MinHash and LSH banding. Only CVs that share
+    a band bucket are compared, so the cost grows with the number of CVs rather
+    than the number of pairs. The first CV of each cluster, in request order,
+    is its representative.
+    """
+    parent = list(range(len(cv_texts)))
+
+    def root(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    sets = [shingles(text) for text in cv_texts]
+    # CVs without a single word are left alone: empty sets would all look identical
+    indexed = [i for i, s in enumerate(sets) if len(s)]
+    signatures = {i: _hasher.signature(sets[i]) for i in indexed}
+    rows = max(1, len(_hasher.a) // bands)
+
+    tried = set()
+    buckets: Dict[tuple, List[int]] = {}
+    for i in indexed:
+        for band in range(bands):
+            key = (band, signatures[i][band * rows:(band + 1) * rows].tobytes())
+            bucket = buckets.setdefault(key, [])
+            # A bucket holds one CV per cluster, so copies of the same CV do not pile up in it
+            joined = False
+            for other in {root(j) for j in bucket}:
+                if root(i) == other:
+                    joined = True
+                    continue
+                if (i, other) in tried:
+                    continue
+                tried.add((i, other))
+                if np.mean(signatures[i] == signatures[other]) >= threshold:
+                    # The lower index stays the root, so each cluster is led by its first CV
+                    first, later = sorted((root(i), other))
+                    parent[later] = first
+                    joined = True
+            if not joined:
+                bucket.append(i)
+
+    return DedupResult(representative=[root(i) for i in range(len(cv_texts))], compared=len(tried))
@@ -0,0 +1,173 @@
+import asyncio
+import hashlib
+import io
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import List, Optional, Tuple
+
+from fastapi import HTTPException, UploadFile
+
+from services.cv_cache import cv_cache, normalize_cv_text
+from services.cv_parsers import (
+    ExtractionTimeout,
+    parse_docx_bytes,
+    parse_docx_file,
+    parse_pdf_bytes,
+    parse_pdf_file,
+    preload,
+)
+from services.uploads import PDF_HEADER_WINDOW, SpooledUpload, detect_kind, spool_upload
+from utils.metrics import stage
+
+# ---- Configuration ----
+
+EXTRACTION_WORKERS = int(os.getenv("EXTRACTION_WORKERS", str(min(4, os.cpu_count() or 1))))
+EXTRACTION_MAX_PENDING = int(os.getenv("EXTRACTION_MAX_PENDING", str(EXTRACTION_WORKERS * 4)))
+EXTRACTION_TIMEOUT = float(os.getenv("EXTRACTION_TIMEOUT", "30"))
+
+SUPPORTED_EXTENSIONS = (".pdf", ".docx")
+
+# Chosen by the sniffed content type, not the extension
+BYTES_PARSERS = {"pdf": parse_pdf_bytes, "docx": parse_docx_bytes}
+FILE_PARSERS = {"pdf": parse_pdf_file, "docx": parse_docx_file}
+
+
+def is_supported(filename: Optional[str]) -> bool:
+    """Cheap pre-filter on the name; the content is checked when the file is read."""
+    return bool(filename) and filename.lower().endswith(SUPPORTED_EXTENSIONS)
+
+
+# ---- Process pool ----
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pending: Optional[asyncio.Semaphore] = None
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        # spawn keeps the workers free of the parent's event loop and Mongo client threads
+        _pool = ProcessPoolExecutor(
+            max_workers=EXTRACTION_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _pool
+
+
+def _get_pending() -> asyncio.Semaphore:
+    global _pending
+    if _pending is None:
+        _pending = asyncio.Semaphore(EXTRACTION_MAX_PENDING)
+    return _pending
+
+
+async def warm_up_pool():
+    """Start every worker and load its parser libraries, so the first uploads do not pay for it."""
+    pool = _get_pool()
+    loop = asyncio.get_running_loop()
+    # One task per worker makes the pool start all of them
+    await asyncio.gather(*(loop.run_in_executor(pool, preload) for _ in range(EXTRACTION_WORKERS)))
+
+
+def shutdown_extraction_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+def _discard_broken_pool(pool: ProcessPoolExecutor):
+    """Drop a pool whose worker died, so the next parse starts a fresh one."""
+    if _pool is pool:
+        print("Extraction worker died; restarting the process pool")
+        shutdown_extraction_pool()
+
+
+# ---- Async API ----
+
+async def _extract(digest: str, parser, filename: str, source, timeout: float) -> str:
+    """
+    Return the normalized text of a PDF/DOCX, served from the CV cache when the
+    same bytes were uploaded before and parsed in the process pool otherwise.
+    """
+    cached = await cv_cache.get(digest)
+    if cached is not None:
+        return cached
+
+    with stage("parse"):
+        text = normalize_cv_text(await _parse_in_pool(parser, filename, source, timeout))
+    if text:
+        await cv_cache.put(digest, text)
+    return text
+
+
+async def extract_text(filename: str, file_bytes: bytes, timeout: float = EXTRACTION_TIMEOUT) -> str:
+    """Extract from bytes already in memory, e.g. files stored with a compare job."""
+    kind = detect_kind(filename, file_bytes[:PDF_HEADER_WINDOW], io.BytesIO(file_bytes))
+    digest = hashlib.sha256(file_bytes).hexdigest()
+    return await _extract(digest, BYTES_PARSERS[kind], filename, file_bytes, timeout)
+
+
+async def extract_spooled(upload: SpooledUpload, timeout: float = EXTRACTION_TIMEOUT) -> str:
+    """Extract from a spooled upload; the worker opens it by path, so no bytes cross the pipe."""
+    return await _extract(upload.digest, FILE_PARSERS[upload.kind], upload.filename, upload.path, timeout)
+
+
+async def _parse_in_pool(parser, filename: str, source, timeout: float) -> str:
+    """
+    Work that has not started yet is cancelled on timeout; work already running
+    stops at its next page boundary because the deadline is passed to the worker.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = time.time() + timeout
+    async with _get_pending():
+        pool = _get_pool()
+        try:
+            future = loop.run_in_executor(pool, parser, source, deadline)
+            return await asyncio.wait_for(future, timeout=timeout)
+        except (asyncio.TimeoutError, ExtractionTimeout):
+            raise HTTPException(status_code=504, detail=f"Timed out extracting text from {filename}")
+        except BrokenProcessPool:
+            # A worker was killed (OOM, or a native crash on a malformed file); every
+            # other parse on this pool fails the same way, so replace it
+            _discard_broken_pool(pool)
+            raise HTTPException(
+                status_code=503,
+                detail=f"Text extraction was interrupted while reading {filename}; please retry",
+                headers={"Retry-After": "1"},
+            )
+        except HTTPException:
+            raise
+        except Exception as e:
+            kind = "PDF" if parser in (parse_pdf_bytes, parse_pdf_file) else "DOCX"
+            raise HTTPException(status_code=500, detail=f"{kind} parse error: {e}")
+
+
+async def extract_upload(file: UploadFile, timeout: float = EXTRACTION_TIMEOUT) -> str:
+    """Spool, validate and extract one upload; the parent never holds the whole file."""
+    with stage("file_read"):
+        upload = await spool_upload(file)
+    try:
+        return await extract_spooled(upload, timeout=timeout)
+    finally:
+        upload.cleanup()
+
+
+async def extract_many(files: List[UploadFile], timeout: float = EXTRACTION_TIMEOUT) -> List[Tuple[str, str]]:
+    """
+    Extract every supported upload in parallel, preserving upload order, as (filename, text) pairs.
+    Files without a .pdf/.docx name or without text are skipped; content that is
+    not really a PDF/DOCX is rejected. If one file fails, the others are cancelled.
+    """
+    supported = [f for f in files if is_supported(f.filename)]
+    tasks = [asyncio.ensure_future(extract_upload(f, timeout=timeout)) for f in supported]
+    try:
+        texts = await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        raise
+    return [(f.filename, text) for f, text in zip(supported, texts) if text]
@@ -0,0 +1,221 @@
+import os
+import re
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from fastapi import HTTPException
+
+from database.connection import job_postings
+from services.cv_preprocess import estimate_tokens
+from services.prerank_service import tokenize
+
+# Token budget for the condensed description that replaces the full one in prompts
+JOB_SUMMARY_TOKENS = int(os.getenv("JOB_SUMMARY_TOKENS", "120"))
+JOB_PROFILE_MAX_SKILLS = int(os.getenv("JOB_PROFILE_MAX_SKILLS", "25"))
+JOB_PROFILE_CACHE_SIZE = int(os.getenv("JOB_PROFILE_CACHE_SIZE", "512"))
+# Bumped whenever build_profile changes, so stored profiles are rebuilt on next read
+JOB_PROFILE_VERSION = 2
+
+# Spellings recruiters use interchangeably, folded into one keyword
+SKILL_ALIASES = {
+    "js": "javascript",
+    "ts": "typescript",
+    "k8s": "kubernetes",
+    "postgres": "postgresql",
+    "mongo": "mongodb",
+    "nodejs": "node.js",
+    "reactjs": "react",
+    "react.js": "react",
+}
+
+# Words of job-ad prose that tokenize() keeps but that name no skill
+_FILLER = frozenset("""
+professional familiarity familiar knowledge understanding proven solid hands-on production designing
+building developing tooling certification certified degree related similar other environment environments
+""".split())
+
+# A line made of one of these (optionally ending in ':'), or one of these before
+# a colon, switches the list that follows. Matched whole: "Bonus points for
+# Rust" and "Requirements gathering" are requirements, not headings
+_NICE_HEADINGS = re.compile(
+    r"(nice[\s-]to[\s-]haves?|preferred( qualifications| skills)?|bonus( points)?|desirable|pluses|good to have)",
+    re.IGNORECASE,
+)
+_MUST_HEADINGS = re.compile(
+    r"(must[\s-]haves?|requirements|required( qualifications| skills)?|minimum qualifications|essential)",
+    re.IGNORECASE,
+)
+# ... and these mark a single requirement as optional
+_NICE_MARKERS = re.compile(
+    r"\b(nice[\s-]to[\s-]have|preferred|is a plus|a plus|bonus|desirable|ideally|optional)\b", re.IGNORECASE
+)
+_BULLET = re.compile(r"^\s*(?:[-*•·▪◦–]|\d+[.)])\s*")
+_SENTENCE = re.compile(r"(?<=[.!?])\s+|\n+")
+_ITEM_BREAK = re.compile(r";\s*|(?<=[.!?])\s+")
+
+
+@dataclass
+class JobFields:
+    """What a prompt receives as {job_title}, {job_requirements} and {job_description}."""
+    title: str
+    requirements: str
+    description: str
+
+
+# ---- Profile ----
+
+def skill_keywords(text: str) -> List[str]:
+    """Normalized skill terms in order of first appearance; bare numbers such as '5+' are dropped."""
+    seen = []
+    for token in tokenize(text):
+        token = SKILL_ALIASES.get(token, token)
+        if token in _FILLER or not any(c.isalpha() for c in token):
+            continue
+        if token not in seen:
+            seen.append(token)
+    return seen
+
+
+def split_requirements(requirements: str) -> Tuple[List[str], List[str]]:
+    """(must-have, nice-to-have) requirement phrases, bullets and headings stripped."""
+    must, nice = [], []
+    optional_section = False
+    for line in requirements.splitlines():
+        line = _BULLET.sub("", line).strip()
+        if not line:
+            continue
+        heading, _, rest = line.partition(":")
+        if _NICE_HEADINGS.fullmatch(heading.strip()):
+            optional_section, line = True, rest.strip()
+        elif _MUST_HEADINGS.fullmatch(heading.strip()):
+            optional_section, line = False, rest.strip()
+        # A paragraph of requirements becomes one item per sentence or clause
+        for item in _ITEM_BREAK.split(line):
+            item = " ".join(item.split()).rstrip(".")
+            if not skill_keywords(item):
+                continue
+            target = nice if optional_section or _NICE_MARKERS.search(item) else must
+            if item not in target:
+                target.append(item)
+    return must, nice
+
+
+def condense_description(description: str, keywords: List[str], budget: int = JOB_SUMMARY_TOKENS) -> str:
+    """
+    Extractive summary: the sentences mentioning the most skill keywords, kept
+    in their original order, within `budget` tokens. Company boilerplate and
+    benefits rarely name a skill, so they are left out.
+    """
+    sentences = [" ".join(s.split()) for s in _SENTENCE.split(description) if s.strip()]
+    wanted = set(keywords)
+    hits = [len(wanted.intersection(skill_keywords(sentence))) for sentence in sentences]
+    ranked = sorted((i for i in range(len(sentences)) if hits[i]), key=lambda i: (-hits[i], i))
+    keep, used = set(), 0
+    for i in ranked:
+        tokens = estimate_tokens(sentences[i]) + 1
+        if used + tokens > budget:
+            continue
+        keep.add(i)
+        used += tokens
+    if not keep and sentences:
+        return sentences[0][:budget * 4]
+    return " ".join(sentences[i] for i in sorted(keep))
+
+
+def build_profile(title: str, requirements: str, description: str) -> dict:
+    must, nice = split_requirements(requirements)
+    skills = []
+    for keyword in skill_keywords(title) + skill_keywords("\n".join(must)) + skill_keywords("\n".join(nice)):
+        if keyword not in skills:
+            skills.append(keyword)
+    skills = skills[:JOB_PROFILE_MAX_SKILLS]
+    summary = condense_description(description, skills)
+    profile = {
+        "version": JOB_PROFILE_VERSION,
+        "skills": skills,
+        "must_have": must,
+        "nice_to_have": nice,
+        "summary": summary,
+    }
+    profile["tokens_before"] = estimate_tokens(requirements) + estimate_tokens(description)
+    fields = profile_fields(title, profile)
+    profile["tokens_after"] = estimate_tokens(fields.requirements) + estimate_tokens(fields.description)
+    return profile
+
+
+def profile_fields(title: str, profile: dict) -> JobFields:
+    lines = []
+    if profile["must_have"]:
+        lines.append("Must have: " + "; ".join(profile["must_have"]))
+    if profile["nice_to_have"]:
+        lines.append("Nice to have: " + "; ".join(profile["nice_to_have"]))
+    return JobFields(title=title, requirements="\n".join(lines), description=profile["summary"])
+
+
+# ---- Storage ----
+
+# Postings are immutable once created, so a plain LRU needs no invalidation
+_cache: "OrderedDict[str, dict]" = OrderedDict()
+
+
+def _remember(posting: dict):
+    _cache[posting["_id"]] = posting
+    _cache.move_to_end(posting["_id"])
+    while len(_cache) > JOB_PROFILE_CACHE_SIZE:
+        _cache.popitem(last=False)
+
+
+async def create_job_posting(title: str, requirements: str, description: str, user_id: Optional[str] = None) -> dict:
+    posting = {
+        "_id": uuid.uuid4().hex,
+        "user_id": user_id,
+        "title": title.strip(),
+        "requirements": requirements,
+        "description": description,
+        "profile": build_profile(title.strip(), requirements, description),
+        "created_at": datetime.utcnow(),
+    }
+    await job_postings.insert_one(posting)
+    _remember(posting)
+    return posting
+
+
+async def get_job_posting(job_id: str) -> Optional[dict]:
+    posting = _cache.get(job_id)
+    if posting is not None:
+        _cache.move_to_end(job_id)
+        return posting
+    posting = await job_postings.find_one({"_id": job_id})
+    if posting is None:
+        return None
+    if posting["profile"].get("version") != JOB_PROFILE_VERSION:
+        posting["profile"] = build_profile(posting["title"], posting["requirements"], posting["description"])
+        await job_postings.update_one({"_id": job_id}, {"$set": {"profile": posting["profile"]}})
+    _remember(posting)
+    return posting
+
+
+async def resolve_job(
+    job_id: Optional[str],
+    job_title: Optional[str],
+    job_requirements: Optional[str],
+    job_description: Optional[str],
+) -> JobFields:
+    """
+    The job a request is about: the stored posting's condensed profile when a
+    job_id is given, otherwise the three fields sent with the request.
+    """
+    if job_id:
+        posting = await get_job_posting(job_id)
+        if posting is None:
+            raise HTTPException(status_code=404, detail="Job posting not found")
+        return profile_fields(posting["title"], posting["profile"])
+    if not (job_title and job_requirements and job_description):
+        raise HTTPException(
+            status_code=400,
+            detail="Send a job_id, or job_title, job_requirements and job_description",
+        )
+    return JobFields(title=job_title, requirements=job_requirements, description=job_description)
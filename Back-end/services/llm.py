@@ -1,9 +1,6 @@
-from langchain_groq import ChatGroq
 from dotenv import load_dotenv
 from schemas.interview import InterviewQnARequest, InterviewQnAResponse
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.messages import SystemMessage, HumanMessage
-from langchain_core.output_parsers import StrOutputParser
+from services.llm_registry import LLMChain, registry
 
 
 import os
@@ -13,41 +10,75 @@ import json
 load_dotenv()
 groq_api_key = os.getenv("GROQ_API_KEY")
 
-# Initialize output parser
-parser = StrOutputParser()
-
-
-
-# Initialize the ChatGroq model
-model = ChatGroq(model="llama-3.3-70b-versatile")
-
-# Create the chat prompt
-prompt = ChatPromptTemplate.from_messages([
-    SystemMessage(
-        content=(
-            "You are a senior technical recruiter and interviewer with deep industry experience.\n"
-            "Given the candidate's CV, job title, job requirements, and job description:\n"
-            "- Generate 8–12 interview questions relevant to the job.\n"
-            "- Include a mix of scenario-based, behavioral, and project-specific questions.\n"
-            "- Each item must include:\n"
-            "    • 'question': A clearly phrased question\n"
-            "    • 'answer': A plausible answer\n"
-            "    • 'type': one of ['technical', 'behavioral', 'project','scenario']\n"
-            "    • 'difficulty': one of ['easy', 'medium', 'hard']\n\n"
-            "Return ONLY a valid JSON array like:\n"
-            "[{{\"question\": str, \"answer\": str, \"type\": str, \"difficulty\": str}}]"
-        )
+# Chat prompt messages (role tuples, so the {placeholders} are filled in)
+PROMPT_MESSAGES = [
+    ("system",
+        "You are a senior technical recruiter and interviewer with deep industry experience.\n"
+        "Given the candidate's CV, job title, job requirements, and job description:\n"
+        "- Generate 8–12 interview questions relevant to the job.\n"
+        "- Include a mix of scenario-based, behavioral, and project-specific questions.\n"
+        "- Technical questions and their answers must not mention the candidate, their CV or their employers.\n"
+        "- Each item must include:\n"
+        "    • 'question': A clearly phrased question\n"
+        "    • 'answer': A plausible answer\n"
+        "    • 'type': one of ['technical', 'behavioral', 'project','scenario']\n"
+        "    • 'difficulty': one of ['easy', 'medium', 'hard']\n\n"
+        "Return ONLY a valid JSON array like:\n"
+        "[{{\"question\": str, \"answer\": str, \"type\": str, \"difficulty\": str}}]"
     ),
-    HumanMessage(
-        content=(
-            "CV Text:\n{cv_text}\n\n"
-            "Job Title: {job_title}\n"
-            "Requirements: {job_requirements}\n"
-            "Description: {job_description}\n\n"
-            "Generate the Q&A set now."
-        )
+    ("human",
+        "CV Text:\n{cv_text}\n\n"
+        "Job Title: {job_title}\n"
+        "Requirements: {job_requirements}\n"
+        "Description: {job_description}\n\n"
+        "Generate the Q&A set now."
     )
-])
+]
 
-# Combine prompt, model, and parser into a chain
-chain = prompt | model | parser
+# Tops up a set served from the question bank (see services/question_bank.py):
+# only the missing questions, none repeating what the candidate gets already
+TOPUP_PROMPT_MESSAGES = [
+    ("system",
+        "You are a senior technical recruiter and interviewer with deep industry experience.\n"
+        "Given the candidate's CV, job title, job requirements, and job description:\n"
+        "- Generate exactly {count} interview questions relevant to the job.\n"
+        "- Include a mix of scenario-based, behavioral, and project-specific questions about this CV.\n"
+        "- Technical questions and their answers must not mention the candidate, their CV or their employers.\n"
+        "- Do not repeat or rephrase any of these questions, which the candidate is asked already:\n"
+        "{asked}\n"
+        "- Each item must include:\n"
+        "    • 'question': A clearly phrased question\n"
+        "    • 'answer': A plausible answer\n"
+        "    • 'type': one of ['technical', 'behavioral', 'project','scenario']\n"
+        "    • 'difficulty': one of ['easy', 'medium', 'hard']\n\n"
+        "Return ONLY a valid JSON array like:\n"
+        "[{{\"question\": str, \"answer\": str, \"type\": str, \"difficulty\": str}}]"
+    ),
+    PROMPT_MESSAGES[1]
+]
+
+
+@registry.register("interview")
+def build_chain() -> LLMChain:
+    # Imported here so the app starts without LangChain; see llm_registry
+    from langchain_core.output_parsers import StrOutputParser
+    from langchain_core.prompts import ChatPromptTemplate
+    from services.llm_gateway import make_gateway
+    from utils.llm_json import is_complete_answer
+
+    # Groq models behind the gateway: timeouts, retries and hedging (see LLM_MODELS)
+    model = make_gateway(validate=is_complete_answer)
+    prompt = ChatPromptTemplate.from_messages(PROMPT_MESSAGES)
+    return LLMChain(chain=prompt | model | StrOutputParser(), model=model)
+
+
+@registry.register("interview_topup")
+def build_topup_chain() -> LLMChain:
+    from langchain_core.output_parsers import StrOutputParser
+    from langchain_core.prompts import ChatPromptTemplate
+    from services.llm_gateway import make_gateway
+    from utils.llm_json import is_complete_answer
+
+    model = make_gateway(validate=is_complete_answer)
+    prompt = ChatPromptTemplate.from_messages(TOPUP_PROMPT_MESSAGES)
+    return LLMChain(chain=prompt | model | StrOutputParser(), model=model)
@@ -0,0 +1,251 @@
+import asyncio
+import hashlib
+import json
+import os
+import re
+import time
+import unicodedata
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from database.connection import llm_cache_collection
+from utils.metrics import count_cache
+
+LLM_CACHE_TTL = int(os.getenv("LLM_CACHE_TTL", "3600"))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "1024"))
+
+_WHITESPACE = re.compile(r"\s+")
+
+# Fallback models that answered in the current computation; see fallback_tracking()
+_fallback_answers: ContextVar[Optional[List[str]]] = ContextVar("llm_fallback_answers", default=None)
+
+
+def note_fallback_answer(model_name: str):
+    """Called by the LLM gateway when a model other than the primary produced the answer."""
+    answers = _fallback_answers.get()
+    if answers is not None:
+        answers.append(model_name)
+
+
+@contextmanager
+def fallback_tracking():
+    """
+    Collect the fallback models that answer inside the block. Cache keys name
+    the primary model, so a result built from a fallback's answer must not be
+    stored under them; callers check the list before put().
+    """
+    answers: List[str] = []
+    token = _fallback_answers.set(answers)
+    try:
+        yield answers
+    finally:
+        _fallback_answers.reset(token)
+
+
+def _normalize(value: Any) -> Any:
+    if isinstance(value, str):
+        return _WHITESPACE.sub(" ", unicodedata.normalize("NFKC", value)).strip().casefold()
+    if isinstance(value, (list, tuple)):
+        return [_normalize(v) for v in value]
+    if isinstance(value, dict):
+        return {k: _normalize(v) for k, v in value.items()}
+    return value
+
+
+def make_cache_key(namespace: str, inputs: Dict[str, Any], model_name: str, temperature: Optional[float]) -> str:
+    """Hash of the normalized prompt inputs plus the model settings that affect the answer."""
+    payload = json.dumps(
+        {"ns": namespace, "inputs": _normalize(inputs), "model": model_name, "temperature": temperature},
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class _LeaderCancelled(Exception):
+    """Set on an in-flight future whose computing request was cancelled; followers retry."""
+
+
+class LLMResponseCache:
+    """
+    Caches parsed LLM results in memory and in Mongo with a TTL, and coalesces
+    identical in-flight requests so concurrent callers share a single LLM call.
+    Failures are never cached.
+    """
+
+    def __init__(self, collection, ttl_seconds: int = LLM_CACHE_TTL, max_entries: int = LLM_CACHE_MAX_ENTRIES):
+        self.collection = collection
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.memory_hits = 0
+        self.mongo_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.fallbacks_skipped = 0
+
+    # ---- Memory tier ----
+
+    def _memory_get(self, key: str):
+        entry = self._memory.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.time():
+            del self._memory[key]
+            return None
+        self._memory.move_to_end(key)
+        return value
+
+    def _memory_put(self, key: str, value: Any, expires_at: float):
+        self._memory[key] = (expires_at, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    # ---- Mongo tier ----
+
+    async def _mongo_get(self, key: str):
+        try:
+            doc = await self.collection.find_one(
+                {"_id": key, "expires_at": {"$gt": datetime.utcnow()}},
+                {"value": 1, "expires_at": 1},
+            )
+        except Exception as e:
+            print(f"LLM cache lookup failed: {e}")
+            return None
+        if doc is None:
+            return None
+        # Mongo returns naive UTC datetimes
+        expires_at = (doc["expires_at"] - datetime(1970, 1, 1)).total_seconds()
+        self._memory_put(key, doc["value"], expires_at)
+        return doc["value"]
+
+    async def _mongo_put(self, key: str, namespace: str, value: Any):
+        try:
+            await self.collection.update_one(
+                {"_id": key},
+                {"$set": {
+                    "namespace": namespace,
+                    "value": value,
+                    "expires_at": datetime.utcnow() + timedelta(seconds=self.ttl_seconds),
+                }},
+                upsert=True,
+            )
+        except Exception as e:
+            print(f"LLM cache write failed: {e}")
+
+    # ---- Public API ----
+
+    async def get_or_compute(
+        self,
+        namespace: str,
+        inputs: Dict[str, Any],
+        model_name: str,
+        temperature: Optional[float],
+        compute: Callable[[], Awaitable[Any]],
+    ) -> Any:
+        """
+        Return the cached result for these prompt inputs, or run `compute` once.
+        `compute` must return a JSON/BSON-serializable value (lists and dicts).
+        Results answered by a fallback model are returned but not stored.
+        """
+        key = make_cache_key(namespace, inputs, model_name, temperature)
+
+        cache = f"llm:{namespace}"
+        value = self._memory_get(key)
+        if value is not None:
+            self.memory_hits += 1
+            count_cache(cache, "memory_hit")
+            return value
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self.coalesced += 1
+            count_cache(cache, "coalesced")
+        while inflight is not None:
+            try:
+                return await asyncio.shield(inflight)
+            except _LeaderCancelled:
+                # The first follower to wake takes over the computation, the rest follow it
+                inflight = self._inflight.get(key)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            value = await self._mongo_get(key)
+            if value is not None:
+                self.mongo_hits += 1
+                count_cache(cache, "mongo_hit")
+            else:
+                self.misses += 1
+                count_cache(cache, "miss")
+                with fallback_tracking() as fallbacks:
+                    value = await compute()
+                if fallbacks:
+                    self.fallbacks_skipped += 1
+                else:
+                    self._memory_put(key, value, time.time() + self.ttl_seconds)
+                    await self._mongo_put(key, namespace, value)
+            future.set_result(value)
+            return value
+        except asyncio.CancelledError:
+            # One client's disconnect must not fail the requests waiting on its result
+            future.set_exception(_LeaderCancelled())
+            future.exception()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Mark the exception retrieved when nobody else was waiting on it
+            future.exception()
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+    async def get(self, namespace: str, inputs: Dict[str, Any], model_name: str, temperature: Optional[float]) -> Any:
+        """Cache lookup without computing; used by streaming routes that produce results themselves."""
+        key = make_cache_key(namespace, inputs, model_name, temperature)
+        cache = f"llm:{namespace}"
+        value = self._memory_get(key)
+        if value is not None:
+            self.memory_hits += 1
+            count_cache(cache, "memory_hit")
+            return value
+        value = await self._mongo_get(key)
+        if value is not None:
+            self.mongo_hits += 1
+            count_cache(cache, "mongo_hit")
+        else:
+            self.misses += 1
+            count_cache(cache, "miss")
+        return value
+
+    async def put(self, namespace: str, inputs: Dict[str, Any], model_name: str, temperature: Optional[float], value: Any):
+        key = make_cache_key(namespace, inputs, model_name, temperature)
+        self._memory_put(key, value, time.time() + self.ttl_seconds)
+        await self._mongo_put(key, namespace, value)
+
+    def stats(self) -> dict:
+        lookups = self.memory_hits + self.mongo_hits + self.misses + self.coalesced
+        return {
+            "memory_hits": self.memory_hits,
+            "mongo_hits": self.mongo_hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "fallbacks_skipped": self.fallbacks_skipped,
+            "hit_rate": (lookups - self.misses) / lookups if lookups else 0.0,
+            "entries": len(self._memory),
+            "inflight": len(self._inflight),
+        }
+
+
+def model_settings(model) -> tuple:
+    """(model name, temperature) of a ChatGroq instance or LLMGateway, used in cache keys."""
+    return getattr(model, "model_name", str(model)), getattr(model, "temperature", None)
+
+
+llm_cache = LLMResponseCache(llm_cache_collection)
@@ -0,0 +1,317 @@
+import asyncio
+import os
+import random
+import time
+from collections import deque
+from typing import Any, AsyncIterator, Callable, Deque, Dict, List, Optional
+
+import groq
+from langchain_core.runnables import Runnable, RunnableConfig
+from langchain_groq import ChatGroq
+
+from services.llm_cache import note_fallback_answer
+from services.llm_registry import registry
+from services.llm_scheduler import llm_scheduler, percentile
+from utils.metrics import count_tokens, stage
+
+# Primary model first; later ones are hedges and fallbacks, in order. The default
+# secondary is the fast 8B model: a slightly weaker answer beats a stalled one.
+LLM_MODELS = [m.strip() for m in os.getenv("LLM_MODELS", "llama-3.3-70b-versatile,llama-3.1-8b-instant").split(",") if m.strip()]
+# Point every model at another OpenAI-compatible endpoint, e.g. the fake server in benchmarks/
+LLM_BASE_URL = os.getenv("LLM_BASE_URL") or None
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "30"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+LLM_RETRY_BASE_DELAY = float(os.getenv("LLM_RETRY_BASE_DELAY", "0.5"))
+# Off by default: every hedge is a second paid call. When on, a request is only
+# hedged once it has outlived the model's observed p95, so about 5% are sent twice
+LLM_HEDGE = os.getenv("LLM_HEDGE", "false").lower() in ("1", "true", "yes")
+# Calls a model must have answered before its p95 is trusted; no hedging until then
+LLM_HEDGE_MIN_SAMPLES = int(os.getenv("LLM_HEDGE_MIN_SAMPLES", "20"))
+LATENCY_WINDOW = 200
+
+TRANSIENT_ERRORS = (
+    asyncio.TimeoutError,
+    groq.APIConnectionError,  # Includes APITimeoutError
+    groq.RateLimitError,
+    groq.InternalServerError,
+    groq.ConflictError,
+)
+
+
+class InvalidAnswer(Exception):
+    """The model answered, but not with something the chain can use."""
+
+
+def is_transient(error: BaseException) -> bool:
+    if isinstance(error, TRANSIENT_ERRORS):
+        return True
+    return isinstance(error, groq.APIStatusError) and error.status_code >= 500
+
+
+class ModelRoute:
+    """One model behind the gateway, with the latencies of its recent successful calls."""
+
+    def __init__(self, model):
+        self.model = model
+        self.name = getattr(model, "model_name", str(model))
+        self.latencies: Deque[float] = deque(maxlen=LATENCY_WINDOW)
+        self.calls = 0
+        self.failures = 0
+        self.wins = 0
+
+    def hedge_delay(self) -> Optional[float]:
+        """Observed p95, or None (do not hedge) until there are enough samples."""
+        if len(self.latencies) < LLM_HEDGE_MIN_SAMPLES:
+            return None
+        return percentile(self.latencies, 0.95)
+
+    def stats(self) -> dict:
+        p50, p95 = percentile(self.latencies, 0.5), percentile(self.latencies, 0.95)
+        return {
+            "calls": self.calls,
+            "failures": self.failures,
+            "wins": self.wins,
+            "p50_ms": round(p50 * 1000) if p50 is not None else None,
+            "p95_ms": round(p95 * 1000) if p95 is not None else None,
+        }
+
+
+class LLMGateway(Runnable):
+    """
+    Drop-in replacement for a chat model in a chain (`prompt | gateway | parser`).
+
+    Every call gets a timeout, and transient provider errors are retried with
+    jittered exponential backoff. When the primary model has not answered by
+    its own observed p95, the same request is sent to the next model and the
+    first valid answer wins (see `validate`); a model that fails outright, or
+    answers with something unusable, falls through to the next one
+    immediately. Streams fall back between models but are neither hedged nor
+    validated, since chunks already sent to the client cannot be taken back.
+
+    Each call, hedge included, holds one slot of the shared llm_scheduler.
+    Answers from any model but the primary are reported to llm_cache, which
+    then does not store them under the primary model's key.
+    """
+
+    def __init__(
+        self,
+        models: List[Any],
+        timeout: float = LLM_TIMEOUT,
+        max_retries: int = LLM_MAX_RETRIES,
+        hedge: bool = LLM_HEDGE,
+        validate: Optional[Callable[[str], bool]] = None,
+    ):
+        if not models:
+            raise ValueError("LLMGateway needs at least one model")
+        self.routes = [ModelRoute(m) for m in models]
+        self.timeout = timeout
+        self.max_retries = max(0, max_retries)
+        self.hedge = hedge
+        self.validate = validate
+        self.retries = 0
+        self.timeouts = 0
+        self.hedges = 0
+        self.fallbacks = 0
+        self.invalid = 0
+
+    # Cache keys (see llm_cache.model_settings) follow the primary model
+    @property
+    def model_name(self) -> str:
+        return self.routes[0].name
+
+    @property
+    def temperature(self) -> Optional[float]:
+        return getattr(self.routes[0].model, "temperature", None)
+
+    # ---- Single model, with timeout and retries ----
+
+    async def _backoff(self, attempt: int):
+        # Full jitter, so callers that failed together do not retry together
+        self.retries += 1
+        await asyncio.sleep(random.uniform(0, LLM_RETRY_BASE_DELAY * 2 ** attempt))
+
+    async def _call(
+        self,
+        route: ModelRoute,
+        input: Any,
+        config: Optional[RunnableConfig],
+        sent: Optional[asyncio.Event] = None,
+        **kwargs,
+    ):
+        for attempt in range(self.max_retries + 1):
+            route.calls += 1
+            try:
+                # Per attempt, so backoff sleeps do not hold a slot
+                async with llm_scheduler.slot():
+                    if sent is not None:
+                        sent.set()
+                    start = time.perf_counter()
+                    message = await asyncio.wait_for(route.model.ainvoke(input, config, **kwargs), self.timeout)
+            except Exception as e:
+                route.failures += 1
+                if isinstance(e, asyncio.TimeoutError):
+                    self.timeouts += 1
+                if attempt < self.max_retries and is_transient(e):
+                    await self._backoff(attempt)
+                    continue
+                raise
+            count_tokens(route.name, getattr(message, "usage_metadata", None))
+            if not message.content or (self.validate is not None and not self.validate(message.content)):
+                route.failures += 1
+                self.invalid += 1
+                # Not retried on the same model: the next route (or a running hedge) gets its chance
+                raise InvalidAnswer(f"Unusable answer from {route.name}")
+            route.latencies.append(time.perf_counter() - start)
+            return message
+
+    # ---- Runnable interface ----
+
+    def invoke(self, input: Any, config: Optional[RunnableConfig] = None, **kwargs):
+        # Sync callers get plain fallback; hedging needs the event loop
+        error = None
+        for route in self.routes:
+            try:
+                return route.model.invoke(input, config, **kwargs)
+            except Exception as e:
+                error = e
+        raise error
+
+    async def ainvoke(self, input: Any, config: Optional[RunnableConfig] = None, **kwargs):
+        # Slots are taken per model call in _call, so a hedge counts against the cap too
+        with stage("llm"):
+            return await self._hedged(input, config, **kwargs)
+
+    async def _hedged(self, input: Any, config: Optional[RunnableConfig], **kwargs):
+        remaining = iter(self.routes)
+        running: Dict[asyncio.Task, ModelRoute] = {}
+        last: Optional[ModelRoute] = None
+        sent = asyncio.Event()  # Set once the last launched call holds a scheduler slot
+        errors = []
+
+        def launch() -> bool:
+            nonlocal last, sent
+            route = next(remaining, None)
+            if route is None:
+                return False
+            last, sent = route, asyncio.Event()
+            running[asyncio.create_task(self._call(route, input, config, sent, **kwargs))] = route
+            return True
+
+        launch()
+        try:
+            while running:
+                can_hedge = self.hedge and len(running) + len(errors) < len(self.routes)
+                delay = last.hedge_delay() if can_hedge else None
+                if delay is not None and not sent.is_set():
+                    # The p95 is of model time, so the hedge clock starts when the call leaves the queue
+                    waiter = asyncio.create_task(sent.wait())
+                    try:
+                        done, _ = await asyncio.wait([*running, waiter], return_when=asyncio.FIRST_COMPLETED)
+                    finally:
+                        waiter.cancel()
+                    done.discard(waiter)
+                    if not done:
+                        continue
+                else:
+                    done, _ = await asyncio.wait(running, timeout=delay, return_when=asyncio.FIRST_COMPLETED)
+                    if not done:
+                        self.hedges += 1
+                        launch()
+                        continue
+                for task in done:
+                    route = running.pop(task)
+                    if task.exception() is None:
+                        route.wins += 1
+                        if route is not self.routes[0]:
+                            note_fallback_answer(route.name)
+                        return task.result()
+                    errors.append(task.exception())
+                if not running and launch():
+                    self.fallbacks += 1
+        finally:
+            for task in running:
+                task.cancel()
+        raise errors[-1]
+
+    async def astream(self, input: Any, config: Optional[RunnableConfig] = None, **kwargs) -> AsyncIterator[Any]:
+        # Slots are taken per attempt in _stream_with_fallback, as in _call
+        with stage("llm"):
+            async for chunk in self._stream_with_fallback(input, config, **kwargs):
+                yield chunk
+
+    async def _stream_with_fallback(self, input: Any, config: Optional[RunnableConfig], **kwargs) -> AsyncIterator[Any]:
+        error: Optional[BaseException] = None
+        for position, route in enumerate(self.routes):
+            if position:
+                self.fallbacks += 1
+            for attempt in range(self.max_retries + 1):
+                route.calls += 1
+                started = finished = retry = False
+                # Per attempt, so backoff sleeps do not hold a slot
+                async with llm_scheduler.slot():
+                    start = time.perf_counter()
+                    stream = route.model.astream(input, config, **kwargs).__aiter__()
+                    try:
+                        while True:
+                            try:
+                                # The timeout bounds the wait for each chunk, not the whole answer
+                                chunk = await asyncio.wait_for(stream.__anext__(), self.timeout)
+                            except StopAsyncIteration:
+                                break
+                            started = True
+                            # The provider reports usage on the final chunk
+                            count_tokens(route.name, getattr(chunk, "usage_metadata", None))
+                            yield chunk
+                        finished = True
+                    except Exception as e:
+                        route.failures += 1
+                        if isinstance(e, asyncio.TimeoutError):
+                            self.timeouts += 1
+                        if started:
+                            raise
+                        error = e
+                        retry = attempt < self.max_retries and is_transient(e)
+                    finally:
+                        await stream.aclose()
+                if finished:
+                    route.latencies.append(time.perf_counter() - start)
+                    route.wins += 1
+                    if position:
+                        note_fallback_answer(route.name)
+                    return
+                if not retry:
+                    break
+                await self._backoff(attempt)
+        raise error
+
+    def stats(self) -> dict:
+        return {
+            "retries": self.retries,
+            "timeouts": self.timeouts,
+            "hedges": self.hedges,
+            "fallbacks": self.fallbacks,
+            "invalid_answers": self.invalid,
+            "models": {route.name: route.stats() for route in self.routes},
+        }
+
+
+# ---- Factory ----
+
+def make_gateway(
+    temperature: Optional[float] = None,
+    models: Optional[List[str]] = None,
+    validate: Optional[Callable[[str], bool]] = None,
+) -> LLMGateway:
+    """
+    Build the gateway a chain should use in place of a bare ChatGroq. Retries
+    are left to the gateway, so the client's own are turned off, and every
+    model shares the registry's pooled HTTP clients. `validate` checks the raw
+    answer text before it can win (see utils.llm_json.is_complete_answer).
+    """
+    http_client, http_async_client = registry.http_clients()
+    options = {"max_retries": 0, "http_client": http_client, "http_async_client": http_async_client}
+    if LLM_BASE_URL:
+        options["groq_api_base"] = LLM_BASE_URL
+    if temperature is not None:
+        options["temperature"] = temperature
+    return LLMGateway([ChatGroq(model=model, **options) for model in models or LLM_MODELS], validate=validate)
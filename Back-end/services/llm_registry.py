@@ -0,0 +1,104 @@
+import asyncio
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from utils.metrics import record
+
+# Build every chain (and start the extraction workers) in the lifespan hook
+# rather than on the first request that needs them
+LLM_WARMUP = os.getenv("LLM_WARMUP", "false").lower() in ("1", "true", "yes")
+# One connection pool for every chain and model, instead of one per ChatGroq
+LLM_HTTP_MAX_CONNECTIONS = int(os.getenv("LLM_HTTP_MAX_CONNECTIONS", "100"))
+LLM_HTTP_MAX_KEEPALIVE = int(os.getenv("LLM_HTTP_MAX_KEEPALIVE", "20"))
+LLM_HTTP_KEEPALIVE_EXPIRY = float(os.getenv("LLM_HTTP_KEEPALIVE_EXPIRY", "30"))
+
+
+@dataclass
+class LLMChain:
+    chain: Any  # prompt | gateway | parser
+    model: Any  # The gateway, whose settings key the response cache (see llm_cache.model_settings)
+
+
+class ChainRegistry:
+    """
+    Named LLM chains, each built on first use from a registered factory.
+
+    Modules register their factory at import time, which costs nothing: the
+    LangChain/Groq imports and client construction happen inside it, so the
+    app imports and starts without them. Chains share one pooled HTTP client.
+    """
+
+    def __init__(self):
+        self._factories: Dict[str, Callable[[], LLMChain]] = {}
+        self._built: Dict[str, LLMChain] = {}
+        self._build_ms: Dict[str, float] = {}
+        # Reentrant: factories ask for the shared clients while get() holds it
+        self._lock = threading.RLock()
+        self._clients: Optional[Tuple[Any, Any]] = None
+
+    def register(self, name: str):
+        def decorator(factory: Callable[[], LLMChain]):
+            self._factories[name] = factory
+            return factory
+        return decorator
+
+    def get(self, name: str) -> LLMChain:
+        built = self._built.get(name)
+        if built is not None:
+            return built
+        with self._lock:
+            if name not in self._built:
+                start = time.perf_counter()
+                self._built[name] = self._factories[name]()
+                elapsed = time.perf_counter() - start
+                self._build_ms[name] = round(elapsed * 1000, 1)
+                record("chain_build", elapsed)
+            return self._built[name]
+
+    async def aget(self, name: str) -> LLMChain:
+        built = self._built.get(name)
+        if built is None:
+            # The first build imports LangChain; keep that off the event loop
+            built = await asyncio.to_thread(self.get, name)
+        return built
+
+    def http_clients(self) -> Tuple[Any, Any]:
+        """The (sync, async) httpx clients every ChatGroq is given."""
+        with self._lock:
+            if self._clients is None:
+                import httpx
+
+                limits = httpx.Limits(
+                    max_connections=LLM_HTTP_MAX_CONNECTIONS,
+                    max_keepalive_connections=LLM_HTTP_MAX_KEEPALIVE,
+                    keepalive_expiry=LLM_HTTP_KEEPALIVE_EXPIRY,
+                )
+                self._clients = (httpx.Client(limits=limits), httpx.AsyncClient(limits=limits))
+        return self._clients
+
+    async def warm_up(self):
+        for name in self._factories:
+            await self.aget(name)
+
+    async def close(self):
+        if self._clients is not None:
+            sync_client, async_client = self._clients
+            self._clients = None
+            sync_client.close()
+            await async_client.aclose()
+        self._built.clear()
+
+    def stats(self) -> dict:
+        return {
+            "registered": sorted(self._factories),
+            "built": dict(self._build_ms),
+        }
+
+    def gateway_stats(self) -> dict:
+        return {name: built.model.stats() for name, built in list(self._built.items())}
+
+
+registry = ChainRegistry()
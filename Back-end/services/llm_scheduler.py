@@ -0,0 +1,262 @@
+import asyncio
+import json
+import math
+import os
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Deque, Dict, Optional, Tuple
+
+import jwt
+from fastapi import HTTPException, Request
+
+from utils.helpers import decode_access_token
+from utils.metrics import record
+
+# Concurrent LLM calls across all routes; size it to the provider quota
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+LLM_MAX_QUEUE = int(os.getenv("LLM_MAX_QUEUE", "200"))
+# How long a request with a client waiting on it may queue for a slot
+LLM_QUEUE_TIMEOUT = float(os.getenv("LLM_QUEUE_TIMEOUT", "20"))
+# When both queues are waiting, every Nth free slot goes to bulk work so it never starves
+LLM_BULK_SHARE = int(os.getenv("LLM_BULK_SHARE", "4"))
+
+PRIORITIES = ("interactive", "bulk")
+
+# (requests per minute, burst) per user type and priority; TENANT_RATE_LIMITS takes the same shape as JSON
+TENANT_RATE_LIMITS = {
+    "personal": {"interactive": [20, 10], "bulk": [10, 10]},
+    "enterprise": {"interactive": [60, 20], "bulk": [60, 60]},
+    "anonymous": {"interactive": [10, 5], "bulk": [5, 5]},
+}
+TENANT_RATE_LIMITS.update(json.loads(os.getenv("TENANT_RATE_LIMITS", "{}")))
+
+MAX_BUCKETS = 10000
+
+
+def percentile(samples, fraction: float) -> Optional[float]:
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def _ms(seconds: Optional[float]) -> Optional[int]:
+    return round(seconds * 1000) if seconds is not None else None
+
+
+# ---- Work classification ----
+
+@dataclass(frozen=True)
+class WorkClass:
+    priority: str = "interactive"
+    queue_timeout: Optional[float] = LLM_QUEUE_TIMEOUT  # None waits as long as it takes
+
+
+# Set once per request (or per background job) and inherited by every LLM call it makes
+current_work: ContextVar[WorkClass] = ContextVar("current_work", default=WorkClass())
+
+
+@dataclass(frozen=True)
+class Tenant:
+    key: str
+    user_type: str
+
+
+def tenant_from_request(request: Request) -> Tenant:
+    """
+    The user from a bearer token issued by /auth/login; clients without one are
+    limited per IP. So are clients whose token is expired or invalid: these
+    endpoints do not require a login, and the frontend sends whatever token it
+    last stored.
+    """
+    authorization = request.headers.get("authorization", "")
+    scheme, _, token = authorization.partition(" ")
+    claims = None
+    if scheme.lower() == "bearer" and token:
+        try:
+            claims = decode_access_token(token)
+        except jwt.PyJWTError:
+            pass
+    if claims is not None:
+        user_type = claims.get("user_type") if claims.get("user_type") in TENANT_RATE_LIMITS else "personal"
+        return Tenant(key=f"user:{claims.get('user_id') or claims.get('sub')}", user_type=user_type)
+    host = request.client.host if request.client else "unknown"
+    return Tenant(key=f"ip:{host}", user_type="anonymous")
+
+
+# ---- Admission: token buckets per tenant ----
+
+class TokenBucket:
+    def __init__(self, per_minute: float, burst: float):
+        self.rate = per_minute / 60
+        self.capacity = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def take(self, cost: float) -> float:
+        """Take `cost` tokens and return 0, or return the seconds until they will be available."""
+        self._refill()
+        cost = min(cost, self.capacity)  # An oversized request is admitted on a full bucket
+        if self.tokens >= cost:
+            self.tokens -= cost
+            return 0.0
+        return (cost - self.tokens) / self.rate
+
+    @property
+    def full(self) -> bool:
+        self._refill()
+        return self.tokens >= self.capacity
+
+
+class AdmissionController:
+    def __init__(self, limits: Dict[str, Dict[str, list]] = TENANT_RATE_LIMITS):
+        self.limits = limits
+        self._buckets: Dict[Tuple[str, str], TokenBucket] = {}
+        self.rejected: Dict[str, int] = {}
+
+    def _bucket(self, tenant: Tenant, priority: str) -> TokenBucket:
+        key = (tenant.key, priority)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            if len(self._buckets) >= MAX_BUCKETS:
+                # A full bucket carries no state worth keeping
+                self._buckets = {k: b for k, b in self._buckets.items() if not b.full}
+            per_minute, burst = self.limits[tenant.user_type][priority]
+            bucket = self._buckets[key] = TokenBucket(per_minute, burst)
+        return bucket
+
+    def charge(self, tenant: Tenant, priority: str, cost: float = 1):
+        wait = self._bucket(tenant, priority).take(cost)
+        if wait:
+            self.rejected[tenant.user_type] = self.rejected.get(tenant.user_type, 0) + 1
+            raise HTTPException(
+                status_code=429,
+                detail=f"Rate limit exceeded for {priority} requests",
+                headers={"Retry-After": str(math.ceil(wait))},
+            )
+
+
+# ---- Scheduling: global concurrency cap with priority queues ----
+
+class LLMScheduler:
+    """
+    Caps concurrent LLM calls across every route. Callers beyond the cap wait
+    in a queue per priority; a freed slot goes to interactive work first, except
+    that every LLM_BULK_SHARE-th grant goes to bulk work when both are waiting.
+    Time spent queued is recorded apart from time spent holding a slot (the LLM call).
+    """
+
+    def __init__(self, max_concurrency: int = LLM_MAX_CONCURRENCY, max_queue: int = LLM_MAX_QUEUE):
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_queue = max_queue
+        self._active = 0
+        self._waiters: Dict[str, Deque[asyncio.Future]] = {p: deque() for p in PRIORITIES}
+        self._grants = 0
+        self.wait_times: Dict[str, Deque[float]] = {p: deque(maxlen=500) for p in PRIORITIES}
+        self.hold_times: Deque[float] = deque(maxlen=500)
+        self.rejected = 0
+        self.timed_out = 0
+
+    def _waiting(self) -> int:
+        return sum(len(q) for q in self._waiters.values())
+
+    def _release(self):
+        self._grants += 1
+        order = ("bulk", "interactive") if self._grants % LLM_BULK_SHARE == 0 else ("interactive", "bulk")
+        for priority in order:
+            queue = self._waiters[priority]
+            while queue:
+                waiter = queue.popleft()
+                # Skip a waiter cancelled by its timeout but not yet removed by its own task
+                if not waiter.done():
+                    # Hand the slot straight over, so a new arrival cannot jump the queue
+                    waiter.set_result(None)
+                    return
+        self._active -= 1
+
+    def retry_after(self) -> int:
+        hold = percentile(self.hold_times, 0.5) or 5.0
+        return max(1, math.ceil(hold * (self._waiting() + 1) / self.max_concurrency))
+
+    async def _acquire(self, work: WorkClass):
+        if self._active < self.max_concurrency and not self._waiting():
+            self._active += 1
+            return
+        # Background work has no client to answer, so it always queues
+        if work.queue_timeout is not None and self._waiting() >= self.max_queue:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=503,
+                detail="LLM queue is full",
+                headers={"Retry-After": str(self.retry_after())},
+            )
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters[work.priority].append(waiter)
+        try:
+            await asyncio.wait_for(waiter, work.queue_timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if waiter.done() and not waiter.cancelled():
+                self._release()  # Granted just as we gave up; pass it on
+            elif waiter in self._waiters[work.priority]:
+                self._waiters[work.priority].remove(waiter)
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            self.timed_out += 1
+            raise HTTPException(
+                status_code=503,
+                detail="Timed out waiting for an LLM slot",
+                headers={"Retry-After": str(self.retry_after())},
+            )
+
+    @asynccontextmanager
+    async def slot(self):
+        work = current_work.get()
+        queued = time.perf_counter()
+        await self._acquire(work)
+        started = time.perf_counter()
+        self.wait_times[work.priority].append(started - queued)
+        record("llm_queue", started - queued)
+        try:
+            yield
+        finally:
+            self.hold_times.append(time.perf_counter() - started)
+            self._release()
+
+    def stats(self) -> dict:
+        return {
+            "active": self._active,
+            "max_concurrency": self.max_concurrency,
+            "waiting": {p: len(q) for p, q in self._waiters.items()},
+            "queue_wait_ms": {
+                p: {"p50": _ms(percentile(t, 0.5)), "p95": _ms(percentile(t, 0.95))}
+                for p, t in self.wait_times.items()
+            },
+            "llm_ms": {"p50": _ms(percentile(self.hold_times, 0.5)), "p95": _ms(percentile(self.hold_times, 0.95))},
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+            "rate_limited": dict(admission.rejected),
+        }
+
+
+admission = AdmissionController()
+llm_scheduler = LLMScheduler()
+
+
+async def admit(request: Request, priority: str, cost: float = 1, queue_timeout: Optional[float] = LLM_QUEUE_TIMEOUT) -> Tenant:
+    """
+    Charge the caller's bucket for `cost` LLM calls and tag the rest of the
+    request with its priority; raises 429 with Retry-After when over the limit.
+    """
+    tenant = tenant_from_request(request)
+    admission.charge(tenant, priority, cost)
+    current_work.set(WorkClass(priority, queue_timeout))
+    return tenant
@@ -0,0 +1,108 @@
+import asyncio
+import hashlib
+import os
+import secrets
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+from fastapi import HTTPException
+
+# Raising PASSWORD_HASH_ITERATIONS upgrades stored hashes the next time each user logs in
+PASSWORD_HASH_ITERATIONS = int(os.getenv("PASSWORD_HASH_ITERATIONS", "100000"))
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+PASSWORD_HASH_MAX_QUEUE = int(os.getenv("PASSWORD_HASH_MAX_QUEUE", "64"))
+
+SCHEME = "pbkdf2_sha256"
+LEGACY_ITERATIONS = 100000
+
+
+# --------------------------- Hash format ---------------------------
+# Current:  pbkdf2_sha256$<iterations>$<salt hex>$<hash hex>
+# Legacy:   <salt hex>$<hash hex>  (100,000 iterations)
+
+def _parse(hashed_password: str):
+    parts = hashed_password.split("$")
+    if len(parts) == 4 and parts[0] == SCHEME:
+        return int(parts[1]), bytes.fromhex(parts[2]), bytes.fromhex(parts[3])
+    if len(parts) == 2:
+        return LEGACY_ITERATIONS, bytes.fromhex(parts[0]), bytes.fromhex(parts[1])
+    raise ValueError("Unknown password hash format")
+
+
+def hash_password(password: str, iterations: int = PASSWORD_HASH_ITERATIONS) -> str:
+    """Hash password using PBKDF2 with SHA256."""
+    salt = secrets.token_bytes(32)
+    pwd_hash = hashlib.pbkdf2_hmac('sha256', password.encode(), salt, iterations)
+    return f"{SCHEME}${iterations}${salt.hex()}${pwd_hash.hex()}"
+
+
+def verify_password(plain_password: str, hashed_password: str) -> bool:
+    """Verify password against a stored hash in either format."""
+    try:
+        iterations, salt, stored_hash = _parse(hashed_password)
+        computed_hash = hashlib.pbkdf2_hmac('sha256', plain_password.encode(), salt, iterations)
+        # Compare hashes (constant time comparison)
+        return secrets.compare_digest(computed_hash, stored_hash)
+    except (ValueError, AttributeError):
+        return False
+
+
+def needs_rehash(hashed_password: str) -> bool:
+    try:
+        iterations, _, _ = _parse(hashed_password)
+    except (ValueError, AttributeError):
+        return False
+    return not hashed_password.startswith(SCHEME + "$") or iterations < PASSWORD_HASH_ITERATIONS
+
+
+# --------------------------- Bounded executor ---------------------------
+
+class PasswordHasher:
+    """
+    Runs PBKDF2 on a small dedicated thread pool (hashlib releases the GIL while
+    hashing) so logins never block the event loop. Requests beyond the workers
+    plus the queue limit are rejected with 503 instead of piling up.
+    """
+
+    def __init__(self, workers: int = PASSWORD_HASH_WORKERS, max_queue: int = PASSWORD_HASH_MAX_QUEUE):
+        self.workers = workers
+        self.capacity = workers + max_queue
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self.in_flight = 0
+        self.rejected = 0
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="pwd-hash")
+        return self._executor
+
+    async def _run(self, fn, *args):
+        if self.in_flight >= self.capacity:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=503,
+                detail="Authentication is busy, please retry shortly",
+                headers={"Retry-After": "1"},
+            )
+        self.in_flight += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._get_executor(), fn, *args)
+        finally:
+            self.in_flight -= 1
+
+    async def hash(self, password: str) -> str:
+        return await self._run(hash_password, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._run(verify_password, plain_password, hashed_password)
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    def stats(self) -> dict:
+        return {"in_flight": self.in_flight, "capacity": self.capacity, "rejected": self.rejected}
+
+
+password_hasher = PasswordHasher()
@@ -0,0 +1,125 @@
+import os
+import re
+from collections import Counter
+from dataclasses import dataclass
+from typing import Dict, List, Tuple
+
+import numpy as np
+from scipy import sparse
+
+PRERANK_TOP_K = int(os.getenv("PRERANK_TOP_K", "20"))
+BM25_K1 = 1.5
+BM25_B = 0.75
+MAX_KEYWORDS = 10
+
+# Keeps tokens such as "c++", "c#", "node.js" and "ci/cd" intact
+_TOKEN = re.compile(r"[a-z0-9][a-z0-9+#./-]*[a-z0-9+#]|[a-z0-9]")
+_STOPWORDS = frozenset("""
+a about above after all also an and any are as at be been being both but by can could did do does doing
+for from had has have having he her here hers him his how i if in into is it its itself just me more most
+my no nor not of off on once only or other our ours out over own same she should so some such than that
+the their theirs them then there these they this those through to too under until up very was we were what
+when where which while who whom why will with would you your yours able ability etc e.g i.e using use used
+work working experience years year strong good excellent knowledge skills skill required requirements
+preferred plus must nice role team teams candidate job responsibilities including within across
+""".split())
+
+
+def tokenize(text: str) -> List[str]:
+    return [t for t in _TOKEN.findall(text.lower()) if t not in _STOPWORDS and len(t) > 1]
+
+
+@dataclass
+class PrerankResult:
+    order: List[int]  # CV indexes, best first
+    scores: List[float]  # Cheap 0-100 score per CV (weighted keyword coverage)
+    matched: List[List[str]]
+    missing: List[List[str]]
+
+
+class BM25Index:
+    """BM25 over a sparse document-term matrix; scoring a query is one sparse mat-vec."""
+
+    def __init__(self, documents: List[str]):
+        vocabulary: Dict[str, int] = {}
+        indptr = [0]
+        indices: List[int] = []
+        counts: List[int] = []
+        for document in documents:
+            for term, count in Counter(tokenize(document)).items():
+                indices.append(vocabulary.setdefault(term, len(vocabulary)))
+                counts.append(count)
+            indptr.append(len(indices))
+
+        self.vocabulary = vocabulary
+        tf = sparse.csr_matrix(
+            (np.asarray(counts, dtype=np.float32), np.asarray(indices, dtype=np.int32), np.asarray(indptr)),
+            shape=(len(documents), max(1, len(vocabulary))),
+        )
+        self.presence = tf.copy()
+        self.presence.data[:] = 1.0
+
+        doc_lengths = np.asarray(tf.sum(axis=1)).ravel()
+        avg_length = doc_lengths.mean() if len(documents) else 0.0
+        doc_freq = np.bincount(tf.indices, minlength=tf.shape[1])
+        self.idf = np.log1p((len(documents) - doc_freq + 0.5) / (doc_freq + 0.5)).astype(np.float32)
+
+        # Precompute the BM25 term weights once so every query is a single mat-vec
+        norm = BM25_K1 * (1 - BM25_B + BM25_B * doc_lengths / max(avg_length, 1e-9))
+        row_norm = np.repeat(norm, np.diff(tf.indptr)).astype(np.float32)
+        weights = tf.copy()
+        weights.data = tf.data * (BM25_K1 + 1) / (tf.data + row_norm) * self.idf[tf.indices]
+        self.weights = weights
+
+    def query_vector(self, weighted_terms: Dict[str, float]) -> np.ndarray:
+        vector = np.zeros(self.weights.shape[1], dtype=np.float32)
+        for term, weight in weighted_terms.items():
+            column = self.vocabulary.get(term)
+            if column is not None:
+                vector[column] = weight
+        return vector
+
+    def score(self, weighted_terms: Dict[str, float]) -> np.ndarray:
+        return self.weights @ self.query_vector(weighted_terms)
+
+
+def job_query(job_title: str, job_requirements: str, job_description: str) -> Dict[str, float]:
+    """Query term weights: title terms count most, then requirements, then description."""
+    weights: Dict[str, float] = {}
+    for text, weight in ((job_title, 3.0), (job_requirements, 2.0), (job_description, 1.0)):
+        for term in set(tokenize(text)):
+            weights[term] = max(weights.get(term, 0.0), weight)
+    return weights
+
+
+def prerank(cv_texts: List[str], job_title: str, job_requirements: str, job_description: str) -> PrerankResult:
+    index = BM25Index(cv_texts)
+    query = job_query(job_title, job_requirements, job_description)
+    bm25 = index.score(query)
+    order = [int(i) for i in np.argsort(-bm25, kind="stable")]
+
+    # Keyword coverage: which query terms each CV mentions, weighted by query weight and rarity
+    terms = sorted(query)
+    columns = np.array([index.vocabulary.get(t, -1) for t in terms], dtype=np.int64)
+    known = columns >= 0
+    term_weight = np.array([query[t] for t in terms], dtype=np.float32)
+    term_weight *= np.where(known, index.idf[np.where(known, columns, 0)], index.idf.max(initial=1.0))
+    total_weight = float(term_weight.sum()) or 1.0
+
+    present = np.zeros((len(cv_texts), len(terms)), dtype=bool)
+    if known.any():
+        present[:, known] = index.presence[:, columns[known]].toarray() > 0
+
+    # Report the most important terms first
+    by_importance = np.argsort(-term_weight, kind="stable")
+    matched, missing, scores = [], [], []
+    for row in present:
+        scores.append(round(100.0 * float(term_weight[row].sum()) / total_weight, 1))
+        matched.append([terms[i] for i in by_importance if row[i]][:MAX_KEYWORDS])
+        missing.append([terms[i] for i in by_importance if not row[i]][:MAX_KEYWORDS])
+
+    return PrerankResult(order=order, scores=scores, matched=matched, missing=missing)
+
+
+def split_shortlist(result: PrerankResult, top_k: int) -> Tuple[List[int], List[int]]:
+    return result.order[:top_k], result.order[top_k:]
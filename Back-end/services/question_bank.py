@@ -0,0 +1,230 @@
+import os
+import re
+import time
+import uuid
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import numpy as np
+from scipy import sparse
+
+from database.connection import question_bank_collection
+from services.job_postings import skill_keywords
+from services.prerank_service import tokenize
+from utils.metrics import count_cache
+
+QUESTION_BANK_ENABLED = os.getenv("QUESTION_BANK_ENABLED", "true").lower() in ("1", "true", "yes")
+# Cosine similarity of two job + CV profiles above which their questions are interchangeable
+QUESTION_BANK_THRESHOLD = float(os.getenv("QUESTION_BANK_THRESHOLD", "0.6"))
+# Questions in a served set; the prompt asks the model for 8-12
+QUESTION_BANK_SET_SIZE = int(os.getenv("QUESTION_BANK_SET_SIZE", "10"))
+# Banked questions per set; the model writes the rest, so every candidate still
+# gets behavioral, scenario and project questions about their own CV. Kept below
+# the set size: a set is never served from the bank alone
+QUESTION_BANK_MAX_ITEMS = max(0, min(int(os.getenv("QUESTION_BANK_MAX_ITEMS", "4")), QUESTION_BANK_SET_SIZE - 1))
+# Stored sets pulled off the title/skill indexes and compared locally per lookup
+QUESTION_BANK_CANDIDATES = int(os.getenv("QUESTION_BANK_CANDIDATES", "200"))
+# Similar sets pooled into one answer, most similar first
+QUESTION_BANK_MAX_SETS = int(os.getenv("QUESTION_BANK_MAX_SETS", "5"))
+QUESTION_BANK_CV_TERMS = int(os.getenv("QUESTION_BANK_CV_TERMS", "30"))
+QUESTION_BANK_SKILLS = 20
+
+# The bank is shared by all users. Only technical questions are stored: the
+# prompts keep their answers off the CV, while behavioral, scenario and project
+# answers are written from one candidate's CV and must not reach anyone else
+REUSABLE_TYPES = ("technical",)
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+@dataclass
+class BankProfile:
+    """What a question set was generated for: the job, and the skills on the CV."""
+    title_key: str
+    skills: List[str]  # Indexed; candidate sets share the title or at least one of these
+    terms: Dict[str, float]  # Profile vector before IDF: title words and bigrams 3, requirements 2, CV 1
+
+
+@dataclass
+class BankLookup:
+    items: List[dict] = field(default_factory=list)  # Reusable questions from similar sets, best first
+    sets: int = 0  # Stored sets they came from
+    similarity: float = 0.0  # Of the most similar set
+
+
+def title_key(job_title: str) -> str:
+    return _WHITESPACE.sub(" ", job_title).strip().casefold()
+
+
+def bank_profile(job_title: str, job_requirements: str, cv_text: str) -> BankProfile:
+    terms: Dict[str, float] = {}
+
+    def add(term: str, weight: float):
+        terms[term] = max(terms.get(term, 0.0), weight)
+
+    title = tokenize(job_title)
+    # Bigrams tell "data engineer" from "data scientist" even though both share "data"
+    for term in title + [f"{a} {b}" for a, b in zip(title, title[1:])]:
+        add(term, 3.0)
+    requirements = skill_keywords(job_requirements)
+    for term in requirements:
+        add(term, 2.0)
+    cv_terms = Counter(term for term in tokenize(cv_text) if any(c.isalpha() for c in term))
+    for term, _ in cv_terms.most_common(QUESTION_BANK_CV_TERMS):
+        add(term, 1.0)
+
+    skills = []
+    for term in title + requirements:
+        if term not in skills:
+            skills.append(term)
+    return BankProfile(title_key=title_key(job_title), skills=skills[:QUESTION_BANK_SKILLS], terms=terms)
+
+
+def similarities(query: Dict[str, float], profiles: List[Dict[str, float]]) -> np.ndarray:
+    """
+    TF-IDF cosine of the query profile against each stored one. IDF comes from
+    the candidates themselves: a skill every candidate shares says little
+    about which of them is closest.
+    """
+    if not profiles:
+        return np.zeros(0, dtype=np.float32)
+    vocabulary: Dict[str, int] = {}
+    indptr = [0]
+    indices: List[int] = []
+    weights: List[float] = []
+    for terms in [query] + profiles:
+        for term, weight in terms.items():
+            indices.append(vocabulary.setdefault(term, len(vocabulary)))
+            weights.append(weight)
+        indptr.append(len(indices))
+
+    matrix = sparse.csr_matrix(
+        (np.asarray(weights, dtype=np.float32), np.asarray(indices, dtype=np.int32), np.asarray(indptr)),
+        shape=(len(profiles) + 1, max(1, len(vocabulary))),
+    )
+    doc_freq = np.bincount(matrix.indices, minlength=matrix.shape[1])
+    idf = np.log((1 + matrix.shape[0]) / (1 + doc_freq)) + 1
+    matrix.data *= idf[matrix.indices].astype(np.float32)
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    norms[norms == 0] = 1.0
+    scores = (matrix[1:] @ matrix[0].T).toarray().ravel()
+    return scores / (norms[1:] * norms[0])
+
+
+def pick_items(sets: List[List[dict]], count: int) -> List[dict]:
+    """
+    Up to `count` distinct questions from the sets (most similar first), taken
+    round-robin across question types so a served set keeps the usual mix.
+    """
+    by_type: Dict[str, List[dict]] = {t: [] for t in REUSABLE_TYPES}
+    seen = set()
+    for items in sets:
+        for item in items:
+            key = _WHITESPACE.sub(" ", item["question"]).strip().casefold()
+            if item.get("type") in by_type and key not in seen:
+                seen.add(key)
+                by_type[item["type"]].append(item)
+
+    picked: List[dict] = []
+    position = 0
+    while len(picked) < count and any(position < len(items) for items in by_type.values()):
+        for items in by_type.values():
+            if position < len(items) and len(picked) < count:
+                picked.append(items[position])
+        position += 1
+    return picked
+
+
+class QuestionBank:
+    """
+    Generated technical interview questions, kept per job + CV profile so a
+    similar request, from any user, needs fewer questions from the LLM.
+    """
+
+    def __init__(self, collection, threshold: float = QUESTION_BANK_THRESHOLD):
+        self.collection = collection
+        self.threshold = threshold
+        self.topups = 0  # Bank items plus a smaller generation
+        self.misses = 0
+        self.items_served = 0
+        self.items_generated = 0
+        self.saved_seconds = 0.0
+        self._generation_seconds: Optional[float] = None  # Moving average of a full generation
+
+    async def lookup(self, profile: BankProfile, count: int = QUESTION_BANK_MAX_ITEMS) -> BankLookup:
+        if not QUESTION_BANK_ENABLED or not profile.terms:
+            return BankLookup()
+        try:
+            docs = await self.collection.find(
+                {"$or": [{"title_key": profile.title_key}, {"skills": {"$in": profile.skills}}]},
+                {"terms": 1, "items": 1},
+            ).sort("created_at", -1).limit(QUESTION_BANK_CANDIDATES).to_list(length=QUESTION_BANK_CANDIDATES)
+        except Exception as e:
+            print(f"Question bank lookup failed: {e}")
+            return BankLookup()
+
+        # Terms are stored as pairs: Mongo keys cannot hold the dots of "node.js"
+        scores = similarities(profile.terms, [dict(doc["terms"]) for doc in docs])
+        similar = [i for i in np.argsort(-scores, kind="stable") if scores[i] >= self.threshold]
+        similar = similar[:QUESTION_BANK_MAX_SETS]
+        return BankLookup(
+            items=pick_items([docs[i]["items"] for i in similar], count),
+            sets=len(similar),
+            similarity=float(scores[similar[0]]) if similar else 0.0,
+        )
+
+    async def add(self, profile: BankProfile, job_title: str, items: List[dict]):
+        """Store the reusable (CV-independent) part of a freshly generated set under its profile."""
+        reusable = [item for item in items if item.get("type") in REUSABLE_TYPES]
+        if not QUESTION_BANK_ENABLED or not reusable:
+            return
+        try:
+            await self.collection.insert_one({
+                "_id": uuid.uuid4().hex,
+                "title_key": profile.title_key,
+                "job_title": job_title,
+                "skills": profile.skills,
+                "terms": sorted(profile.terms.items()),
+                "items": reusable,
+                "created_at": datetime.utcnow(),
+            })
+        except Exception as e:
+            print(f"Question bank write failed: {e}")
+
+    def record(self, lookup: BankLookup, generated: int, started: float):
+        """Count one request; `started` is its time.perf_counter() before the lookup."""
+        if not QUESTION_BANK_ENABLED:
+            return
+        elapsed = time.perf_counter() - started
+        served = len(lookup.items)
+        self.items_served += served
+        self.items_generated += generated
+        if not served:
+            self.misses += 1
+            count_cache("question_bank", "miss")
+            # Baseline for the savings of later top-ups
+            previous = self._generation_seconds
+            self._generation_seconds = elapsed if previous is None else 0.9 * previous + 0.1 * elapsed
+            return
+        self.topups += 1
+        count_cache("question_bank", "topup")
+        if self._generation_seconds is not None:
+            self.saved_seconds += max(0.0, self._generation_seconds - elapsed)
+
+    def stats(self) -> dict:
+        lookups = self.topups + self.misses
+        items = self.items_served + self.items_generated
+        return {
+            "enabled": QUESTION_BANK_ENABLED,
+            "topups": self.topups,
+            "misses": self.misses,
+            "topup_rate": self.topups / lookups if lookups else 0.0,
+            "item_hit_rate": self.items_served / items if items else 0.0,
+            "avg_generation_seconds": self._generation_seconds,
+            "latency_saved_seconds": round(self.saved_seconds, 3),
+        }
+
+
+question_bank = QuestionBank(question_bank_collection)
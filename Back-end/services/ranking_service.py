@@ -0,0 +1,161 @@
+import os
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from pymongo import UpdateOne
+
+from database.connection import job_rankings
+from services.candidate_store import candidate_id, save_candidates
+from services.compare_service import CVComparator
+from services.cv_preprocess import compact_cv
+from services.dedup_service import find_duplicates
+from services.job_postings import profile_fields
+from services.llm_registry import LLMChain, registry
+from services.prerank_service import prerank
+from utils.metrics import stage
+
+# Scores are only comparable under the same rubric: bumping this ranks every
+# posting afresh, as older entries drop out of the ranking and get rescored
+RANKING_RUBRIC_VERSION = 1
+RANK_CACHE_NAMESPACE = f"rank:v{RANKING_RUBRIC_VERSION}"
+# CVs per prompt. One keeps each score independent of whatever else was uploaded with it;
+# CVs trickle in a few at a time, so the extra calls are few
+RANK_BATCH_SIZE = int(os.getenv("RANK_BATCH_SIZE", "1"))
+
+# Fixed score bands against the posting's must-have / nice-to-have lists (see
+# job_postings.profile_fields), at temperature 0, so a CV added today lands
+# where it would have if it had come with the first batch
+RUBRIC_PROMPT_MESSAGES = [
+    ("system",
+     "You are an expert recruiter scoring CVs against a fixed rubric. Scores from different days are "
+     "ranked together, so score each CV on its own against the rubric and never relative to the other CVs.\n"
+     "Rubric (0-100):\n"
+     "- 90-100: meets every must-have and most nice-to-haves, with clear evidence\n"
+     "- 75-89: meets every must-have\n"
+     "- 60-74: misses one must-have, or only partly meets several\n"
+     "- 40-59: misses several must-haves but has clearly transferable experience\n"
+     "- 0-39: not a match for this role\n"
+     "Within a band, more directly relevant and more recent evidence scores higher.\n"
+     "Return ONLY a single JSON array with one item per CV, where each item contains:\n"
+     "- cv_index: The number from the CV's header line\n"
+     "- score: Rubric score (0-100)\n"
+     "- strengths: 3 key strengths\n"
+     "- weaknesses: 3 key weaknesses\n"
+     "Do not repeat the CV text in your answer.\n\n"
+     "Job Title: {job_title}\n"
+     "Requirements:\n{job_requirements}\n"
+     "Description: {job_description}"),
+    ("human", "CVs to score:\n{cv_texts}")
+]
+
+
+@registry.register("rank")
+def build_chain() -> LLMChain:
+    from langchain_core.output_parsers import StrOutputParser
+    from langchain_core.prompts import ChatPromptTemplate
+    from services.llm_gateway import make_gateway
+    from utils.llm_json import is_complete_answer
+
+    model = make_gateway(temperature=0, validate=is_complete_answer)
+    prompt = ChatPromptTemplate.from_messages(RUBRIC_PROMPT_MESSAGES)
+    return LLMChain(chain=prompt | model | StrOutputParser(), model=model)
+
+
+rubric_scorer = CVComparator(batch_size=RANK_BATCH_SIZE, chain="rank", cache_namespace=RANK_CACHE_NAMESPACE)
+
+
+@dataclass
+class RankingUpdate:
+    added: List[dict] = field(default_factory=list)  # New ranking entries, scored in this call
+    already_ranked: List[str] = field(default_factory=list)  # candidate_ids scored by an earlier call
+    unscored: List[str] = field(default_factory=list)  # Filenames the model could not score
+
+
+def _entry_id(job_id: str, cid: str) -> str:
+    return f"{job_id}:{cid}"
+
+
+async def add_candidates(posting: dict, cv_texts: List[str], filenames: List[Optional[str]]) -> RankingUpdate:
+    """
+    Score the CVs not yet ranked for this posting and insert them into its
+    ranking. CVs already in it (same content, same rubric) cost nothing, and
+    near-duplicates within the batch share one score.
+    """
+    job_id = posting["_id"]
+    ids = [candidate_id(text) for text in cv_texts]
+    await save_candidates(list(zip(ids, cv_texts, filenames)))
+
+    existing = await job_rankings.find(
+        {"_id": {"$in": [_entry_id(job_id, cid) for cid in set(ids)]}, "rubric_version": RANKING_RUBRIC_VERSION},
+        {"candidate_id": 1},
+    ).to_list(length=None)
+    update = RankingUpdate(already_ranked=sorted({doc["candidate_id"] for doc in existing}))
+
+    # First upload of each new candidate, in request order
+    fresh: List[int] = []
+    seen = set(update.already_ranked)
+    for i, cid in enumerate(ids):
+        if cid not in seen:
+            seen.add(cid)
+            fresh.append(i)
+    if not fresh:
+        return update
+
+    texts = [cv_texts[i] for i in fresh]
+    with stage("dedup"):
+        members = find_duplicates(texts).members()
+    representatives = list(members)
+
+    job = profile_fields(posting["title"], posting["profile"])
+    ranking = prerank(texts, job.title, job.requirements, job.description)
+    scored, unscored = await rubric_scorer.score_pool(
+        [compact_cv(texts[r]).text for r in representatives], job.title, job.requirements, job.description
+    )
+
+    now = datetime.utcnow()
+    for position, representative in enumerate(representatives):
+        if position not in scored:
+            update.unscored.extend(filenames[fresh[m]] or ids[fresh[m]] for m in members[representative])
+            continue
+        score = scored[position]
+        for m in members[representative]:
+            i = fresh[m]
+            update.added.append({
+                "_id": _entry_id(job_id, ids[i]),
+                "job_id": job_id,
+                "candidate_id": ids[i],
+                "filename": filenames[i],
+                "score": score.score,
+                "strengths": score.strengths,
+                "weaknesses": score.weaknesses,
+                "matched_keywords": ranking.matched[m],
+                "missing_keywords": ranking.missing[m],
+                "duplicate_of": None if m == representative else ids[fresh[representative]],
+                "rubric_version": RANKING_RUBRIC_VERSION,
+                "scored_at": now,
+            })
+
+    if update.added:
+        with stage("mongo_insert"):
+            await job_rankings.bulk_write(
+                [UpdateOne({"_id": doc["_id"]}, {"$set": doc}, upsert=True) for doc in update.added],
+                ordered=False,
+            )
+    update.added.sort(key=lambda doc: doc["score"], reverse=True)
+    return update
+
+
+def _ranking_query(job_id: str) -> dict:
+    return {"job_id": job_id, "rubric_version": RANKING_RUBRIC_VERSION}
+
+
+async def count_ranked(job_id: str) -> int:
+    return await job_rankings.count_documents(_ranking_query(job_id))
+
+
+async def top_candidates(job_id: str, limit: int, skip: int = 0) -> Tuple[int, List[dict]]:
+    """(total ranked, one page of the ranking, best first), read straight off the job_rubric_score index."""
+    cursor = job_rankings.find(_ranking_query(job_id)).sort([("score", -1), ("candidate_id", 1)])
+    docs = await cursor.skip(skip).limit(limit).to_list(length=limit)
+    return await count_ranked(job_id), docs
@@ -0,0 +1,183 @@
+import asyncio
+import os
+import time
+from typing import List, Optional, Set
+
+from bson import ObjectId, json_util
+from pymongo.errors import BulkWriteError
+
+from database.connection import cv_results
+from utils.metrics import stage
+
+RESULT_FLUSH_SIZE = int(os.getenv("RESULT_FLUSH_SIZE", "50"))
+RESULT_FLUSH_INTERVAL = float(os.getenv("RESULT_FLUSH_INTERVAL", "1.0"))
+RESULT_BUFFER_MAX = int(os.getenv("RESULT_BUFFER_MAX", "10000"))
+# Relative paths are taken from the Back-end directory, not the working directory
+_BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULT_SPILL_PATH = os.path.join(_BACKEND_DIR, os.getenv("RESULT_SPILL_PATH", "spill/cv_results.jsonl"))
+
+DUPLICATE_KEY = 11000
+
+
+class WriteBehindWriter:
+    """
+    Buffers documents in memory and writes them with insert_many once the batch
+    is full or the flush interval passes. Documents that cannot be written are
+    appended to a local JSONL spill file and replayed on the next start.
+    Every document gets its _id up front, so replays never create duplicates.
+    """
+
+    def __init__(
+        self,
+        collection,
+        flush_size: int = RESULT_FLUSH_SIZE,
+        flush_interval: float = RESULT_FLUSH_INTERVAL,
+        buffer_max: int = RESULT_BUFFER_MAX,
+        spill_path: str = RESULT_SPILL_PATH,
+    ):
+        self.collection = collection
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.buffer_max = buffer_max
+        self.spill_path = spill_path
+        self._buffer: List[dict] = []
+        self._wake = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._spills: Set[asyncio.Task] = set()  # Overflow spills still being written
+        self._flush_lock = asyncio.Lock()
+        self._stopping = False
+        self.written = 0
+        self.spilled = 0
+        self.replayed = 0
+        self.flushes = 0
+        self.last_flush_ms = 0.0
+        self.max_flush_ms = 0.0
+        self._total_flush_ms = 0.0
+
+    # ---- Producer side ----
+
+    def submit(self, doc: dict) -> ObjectId:
+        doc.setdefault("_id", ObjectId())
+        self._buffer.append(doc)
+        if len(self._buffer) >= self.buffer_max:
+            # Mongo is not keeping up; move the backlog to disk rather than grow without bound
+            batch, self._buffer = self._buffer, []
+            task = asyncio.get_running_loop().create_task(self._spill(batch))
+            self._spills.add(task)
+            task.add_done_callback(self._spill_done)
+        elif len(self._buffer) >= self.flush_size:
+            self._wake.set()
+        return doc["_id"]
+
+    # ---- Flushing ----
+
+    async def flush(self):
+        async with self._flush_lock:
+            while self._buffer:
+                batch, self._buffer = self._buffer[:self.flush_size], self._buffer[self.flush_size:]
+                await self._write(batch)
+
+    async def _write(self, batch: List[dict]):
+        start = time.perf_counter()
+        failed = []
+        try:
+            with stage("mongo_insert"):
+                await self.collection.insert_many(batch, ordered=False)
+        except BulkWriteError as e:
+            failed_indexes = {
+                err["index"] for err in e.details.get("writeErrors", []) if err.get("code") != DUPLICATE_KEY
+            }
+            failed = [doc for i, doc in enumerate(batch) if i in failed_indexes]
+            print(f"Write-behind flush partially failed: {len(failed)} of {len(batch)} documents")
+        except Exception as e:
+            failed = batch
+            print(f"Write-behind flush failed, spilling {len(batch)} documents: {e}")
+
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        self.flushes += 1
+        self.last_flush_ms = elapsed_ms
+        self.max_flush_ms = max(self.max_flush_ms, elapsed_ms)
+        self._total_flush_ms += elapsed_ms
+        self.written += len(batch) - len(failed)
+        if failed:
+            await self._spill(failed)
+
+    async def _run(self):
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            await self.flush()
+
+    # ---- Spill file ----
+
+    def _append_lines(self, batch: List[dict]):
+        os.makedirs(os.path.dirname(self.spill_path) or ".", exist_ok=True)
+        with open(self.spill_path, "a", encoding="utf-8") as f:
+            for doc in batch:
+                f.write(json_util.dumps(doc) + "\n")
+
+    def _spill_done(self, task: asyncio.Task):
+        self._spills.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            print(f"Write-behind spill failed: {task.exception()}")
+
+    async def _spill(self, batch: List[dict]):
+        await asyncio.to_thread(self._append_lines, batch)
+        self.spilled += len(batch)
+
+    async def replay_spill(self):
+        """Re-insert spilled documents; whatever still fails is spilled again."""
+        replaying = self.spill_path + ".replaying"
+        # A leftover .replaying file means the previous replay was interrupted
+        if not os.path.exists(replaying):
+            if not os.path.exists(self.spill_path):
+                return
+            os.replace(self.spill_path, replaying)
+        with open(replaying, encoding="utf-8") as f:
+            docs = [json_util.loads(line) for line in f if line.strip()]
+        for start in range(0, len(docs), self.flush_size):
+            await self._write(docs[start:start + self.flush_size])
+        os.remove(replaying)
+        self.replayed += len(docs)
+        print(f"Replayed {len(docs)} spilled documents")
+
+    # ---- Lifecycle ----
+
+    async def start(self):
+        self._stopping = False
+        try:
+            await self.replay_spill()
+        except Exception as e:
+            print(f"Spill replay failed: {e}")
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Drain the buffer before shutdown; called from the FastAPI lifespan hook."""
+        if self._task is not None:
+            self._stopping = True
+            self._wake.set()
+            await self._task
+            self._task = None
+        await self.flush()
+        # Overflow batches handed to the spill file must be on disk before exit
+        if self._spills:
+            await asyncio.gather(*self._spills, return_exceptions=True)
+
+    def stats(self) -> dict:
+        return {
+            "queue_depth": len(self._buffer),
+            "written": self.written,
+            "spilled": self.spilled,
+            "spills_in_progress": len(self._spills),
+            "replayed": self.replayed,
+            "flushes": self.flushes,
+            "last_flush_ms": round(self.last_flush_ms, 2),
+            "avg_flush_ms": round(self._total_flush_ms / self.flushes, 2) if self.flushes else 0.0,
+            "max_flush_ms": round(self.max_flush_ms, 2),
+        }
+
+
+result_writer = WriteBehindWriter(cv_results)
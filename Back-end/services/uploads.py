@@ -0,0 +1,162 @@
+import asyncio
+import hashlib
+import os
+import tempfile
+import zipfile
+from dataclasses import dataclass
+from typing import Optional
+
+from fastapi import HTTPException, UploadFile
+from fastapi.responses import JSONResponse
+
+# ---- Configuration ----
+
+UPLOAD_MAX_FILE_BYTES = int(os.getenv("UPLOAD_MAX_FILE_BYTES", str(10 * 1024 * 1024)))
+UPLOAD_MAX_REQUEST_BYTES = int(os.getenv("UPLOAD_MAX_REQUEST_BYTES", str(100 * 1024 * 1024)))
+UPLOAD_CHUNK_BYTES = int(os.getenv("UPLOAD_CHUNK_BYTES", str(1024 * 1024)))
+# Where uploads are spooled for the extraction workers; defaults to the system temp dir
+UPLOAD_SPOOL_DIR = os.getenv("UPLOAD_SPOOL_DIR") or None
+
+# PDF readers accept the header anywhere in the first KiB
+PDF_HEADER_WINDOW = 1024
+DOCX_MAIN_PART = "word/document.xml"
+
+
+def _too_large(what: str, limit: int) -> HTTPException:
+    size = f"{limit / (1024 * 1024):g} MB" if limit >= 1024 * 1024 else f"{limit // 1024} KB"
+    return HTTPException(status_code=413, detail=f"{what} exceeds the {size} limit")
+
+
+# ---- Content sniffing ----
+
+def sniff_kind(head: bytes) -> Optional[str]:
+    """'pdf' or 'docx' from the leading bytes of a file, whatever its name says."""
+    if b"%PDF-" in head[:PDF_HEADER_WINDOW]:
+        return "pdf"
+    if head.startswith(b"PK\x03\x04"):
+        return "docx"  # Confirmed against the zip directory once the whole file is there
+    return None
+
+
+def _is_docx(source) -> bool:
+    try:
+        with zipfile.ZipFile(source) as archive:
+            return DOCX_MAIN_PART in archive.namelist()
+    except zipfile.BadZipFile:
+        return False
+
+
+def detect_kind(filename: str, head: bytes, source) -> str:
+    """Validate a file by content; `source` is a path or file object for the docx zip check."""
+    kind = sniff_kind(head)
+    if kind == "docx" and not _is_docx(source):
+        kind = None
+    if kind is None:
+        raise HTTPException(status_code=400, detail=f"{filename} is not a valid PDF or DOCX file")
+    return kind
+
+
+# ---- Spooling ----
+
+@dataclass
+class SpooledUpload:
+    """An upload copied to a named temp file, so extraction workers can open it by path."""
+    filename: str
+    path: str
+    kind: str
+    size: int
+    digest: str  # SHA-256 of the content, the CV text cache key
+
+    def cleanup(self):
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+
+
+def _spool(source, filename: str, max_bytes: int) -> SpooledUpload:
+    digest = hashlib.sha256()
+    size = 0
+    head = b""
+    target = tempfile.NamedTemporaryFile(prefix="upload-", dir=UPLOAD_SPOOL_DIR, delete=False)
+    try:
+        with target:
+            source.seek(0)
+            while chunk := source.read(UPLOAD_CHUNK_BYTES):
+                size += len(chunk)
+                if size > max_bytes:
+                    raise _too_large(filename, max_bytes)
+                if len(head) < PDF_HEADER_WINDOW:
+                    head += chunk[:PDF_HEADER_WINDOW - len(head)]
+                digest.update(chunk)
+                target.write(chunk)
+        kind = detect_kind(filename, head, target.name)
+    except BaseException:
+        os.unlink(target.name)
+        raise
+    return SpooledUpload(filename=filename, path=target.name, kind=kind, size=size, digest=digest.hexdigest())
+
+
+async def spool_upload(file: UploadFile, max_bytes: int = UPLOAD_MAX_FILE_BYTES) -> SpooledUpload:
+    """
+    Copy an upload to disk chunk by chunk, hashing and size-checking as it goes
+    and validating its magic bytes. The caller must cleanup() the result.
+    """
+    filename = file.filename or ""
+    if file.size is not None and file.size > max_bytes:
+        raise _too_large(filename, max_bytes)
+    return await asyncio.to_thread(_spool, file.file, filename, max_bytes)
+
+
+def _read(source, filename: str, max_bytes: int) -> bytes:
+    source.seek(0)
+    data = source.read(max_bytes + 1)
+    if len(data) > max_bytes:
+        raise _too_large(filename, max_bytes)
+    detect_kind(filename, data, source)
+    return data
+
+
+async def read_upload(file: UploadFile, max_bytes: int = UPLOAD_MAX_FILE_BYTES) -> bytes:
+    """The whole upload as bytes, with the same size cap and content check as spool_upload."""
+    filename = file.filename or ""
+    if file.size is not None and file.size > max_bytes:
+        raise _too_large(filename, max_bytes)
+    return await asyncio.to_thread(_read, file.file, filename, max_bytes)
+
+
+# ---- Request size cap ----
+
+class UploadLimitMiddleware:
+    """
+    Rejects request bodies over UPLOAD_MAX_REQUEST_BYTES with 413: up front
+    from Content-Length, or as soon as a chunked body goes over while the
+    multipart parser is still spooling it.
+    """
+
+    def __init__(self, app, max_bytes: int = UPLOAD_MAX_REQUEST_BYTES):
+        self.app = app
+        self.max_bytes = max_bytes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        length = dict(scope["headers"]).get(b"content-length")
+        if length is not None and length.isdigit() and int(length) > self.max_bytes:
+            error = _too_large("Request body", self.max_bytes)
+            response = JSONResponse({"detail": error.detail}, status_code=error.status_code)
+            return await response(scope, receive, send)
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    raise _too_large("Request body", self.max_bytes)
+            return message
+
+        await self.app(scope, limited_receive, send)
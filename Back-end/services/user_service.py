@@ -1,57 +1,47 @@
 # --------------------------- user_service.py ---------------------------
 from datetime import datetime, timedelta
 from fastapi import HTTPException
+from pymongo.errors import DuplicateKeyError
 from database.connection import get_db
 from schemas.user import UserCreate, UserLogin
 from utils.helpers import create_access_token
-import hashlib
-import secrets
+from services.password_hasher import password_hasher, needs_rehash
 
 db = get_db()
 users_collection = db["users"]
 
-# --------------------------- Password helpers ---------------------------
-# Simple and reliable password hashing without passlib issues
-
-def hash_password(password: str) -> str:
-    """Hash password using PBKDF2 with SHA256."""
-    # Generate a random salt
-    salt = secrets.token_bytes(32)
-    # Use PBKDF2 with 100,000 iterations
-    pwd_hash = hashlib.pbkdf2_hmac('sha256', password.encode(), salt, 100000)
-    # Return salt + hash as a combined string (both hex-encoded)
-    return f"{salt.hex()}${pwd_hash.hex()}"
-
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """Verify password against stored hash."""
-    try:
-        salt_hex, pwd_hash_hex = hashed_password.split('$')
-        salt = bytes.fromhex(salt_hex)
-        stored_hash = bytes.fromhex(pwd_hash_hex)
-        # Recompute hash with the stored salt
-        computed_hash = hashlib.pbkdf2_hmac('sha256', plain_password.encode(), salt, 100000)
-        # Compare hashes (constant time comparison)
-        return secrets.compare_digest(computed_hash, stored_hash)
-    except (ValueError, AttributeError):
-        return False
+# Only the fields needed to check the password and build the token
+LOGIN_PROJECTION = {"email": 1, "password": 1, "username": 1, "user_type": 1}
 
 # --------------------------- Async functions ---------------------------
 async def create_user(user: UserCreate) -> str:
-    existing = await users_collection.find_one({"email": user.email})
-    if existing:
+    # Fallback for when the unique email index could not be built (see database.indexes)
+    if await users_collection.find_one({"email": user.email}, {"_id": 1}):
         raise HTTPException(status_code=400, detail="Email already registered")
 
     user_dict = user.dict()
-    user_dict["password"] = hash_password(user.password)
+    user_dict["password"] = await password_hasher.hash(user.password)
 
-    result = await users_collection.insert_one(user_dict)
+    # The unique email index settles concurrent registrations
+    try:
+        result = await users_collection.insert_one(user_dict)
+    except DuplicateKeyError:
+        raise HTTPException(status_code=400, detail="Email already registered")
     return str(result.inserted_id)
 
 async def authenticate_user(data: UserLogin) -> str:
-    user = await users_collection.find_one({"email": data.email})
-    if not user or not verify_password(data.password, user["password"]):
+    user = await users_collection.find_one({"email": data.email}, LOGIN_PROJECTION)
+    if not user or not await password_hasher.verify(data.password, user["password"]):
         raise HTTPException(status_code=401, detail="Invalid credentials")
 
+    # Transparently upgrade legacy or low-iteration hashes now that we know the password
+    if needs_rehash(user["password"]):
+        try:
+            new_hash = await password_hasher.hash(data.password)
+            await users_collection.update_one({"_id": user["_id"]}, {"$set": {"password": new_hash}})
+        except HTTPException:
+            pass  # Hasher saturated; upgrade on a later login
+
     token_data = {
         "sub": user["email"],
         "username": user.get("username"),
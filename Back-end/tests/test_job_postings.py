@@ -0,0 +1,26 @@
+"""Run from Back-end/: python -m pytest tests"""
+from services.job_postings import split_requirements
+
+
+def test_requirement_lines_starting_with_a_heading_word_are_kept():
+    must, nice = split_requirements(
+        "Requirements:\n"
+        "- 5+ years of Python\n"
+        "- Kubernetes in production\n"
+        "- Bonus points for Rust experience\n"
+        "- Strong SQL and PostgreSQL\n"
+        "- Requirements gathering with stakeholders in Jira\n"
+    )
+    assert must == [
+        "5+ years of Python",
+        "Kubernetes in production",
+        "Strong SQL and PostgreSQL",
+        "Requirements gathering with stakeholders in Jira",
+    ]
+    assert nice == ["Bonus points for Rust experience"]
+
+
+def test_headings_switch_sections():
+    must, nice = split_requirements("Nice to have: Go; Terraform\nRequired\n- Docker\nPreferred:\n- GraphQL")
+    assert must == ["Docker"]
+    assert nice == ["Go", "Terraform", "GraphQL"]
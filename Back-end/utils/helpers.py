@@ -21,3 +21,8 @@ def create_access_token(data: dict, expires_delta: timedelta = timedelta(hours=1
     expire = datetime.utcnow() + expires_delta
     to_encode.update({"exp": expire})
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+
+
+def decode_access_token(token: str) -> dict:
+    # Raises jwt.PyJWTError for bad signatures and expired tokens
+    return jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
@@ -0,0 +1,20 @@
+import hashlib
+import json
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+
+
+def etag_response(request: Request, payload) -> Response:
+    """
+    JSON response with a strong ETag over its body. A matching If-None-Match
+    gets an empty 304, so a client refreshing unchanged data downloads nothing.
+    """
+    body = json.dumps(jsonable_encoder(payload), separators=(",", ":"), sort_keys=True).encode()
+    etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+
+    if_none_match = request.headers.get("if-none-match", "")
+    if etag in [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")] or if_none_match.strip() == "*":
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
@@ -0,0 +1,244 @@
+import json
+import re
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, Generic, List, Optional, Type, TypeVar
+
+from pydantic import BaseModel, TypeAdapter, ValidationError
+
+from utils.metrics import count_parse_failures, stage
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+SNIPPET_LENGTH = 80
+
+# The scanner jumps between these characters instead of stepping through every one
+_OUTSIDE_OBJECT = re.compile(r"[{\[\]]")
+_INSIDE_OBJECT = re.compile(r'["{}\[\]]')
+_INSIDE_STRING = re.compile(r'["\\]')
+
+
+class JSONItemScanner:
+    """
+    Single-pass, bracket- and string-aware scanner for the JSON objects in LLM output.
+
+    Every object that is not nested inside another object is returned as soon as
+    its closing brace arrives, so a truncated array still yields the items it
+    completed. Prose, ```json fences and brackets outside objects are skipped;
+    quotes are only tracked inside objects, so apostrophes in prose are harmless.
+    Works incrementally on streamed chunks or once on a whole answer.
+    """
+
+    def __init__(self):
+        self._buffer = ""
+        self._pos = 0
+        self._array_depth = 0
+        self._array_items = 0
+        self._depth = 0
+        self._in_string = False
+        self._object_start = -1
+        self.done = False  # The first array holding objects has closed; the rest is ignored
+        self.malformed: List[str] = []  # Snippets of objects that were not valid JSON
+
+    @property
+    def truncated(self) -> bool:
+        """True while an object has been opened but not closed."""
+        return self._object_start >= 0
+
+    def feed(self, chunk: str) -> List[Any]:
+        self._buffer += chunk
+        items = []
+        buffer = self._buffer
+        end = len(buffer)
+        i = self._pos
+        while i < end and not self.done:
+            if self._in_string:
+                match = _INSIDE_STRING.search(buffer, i)
+                if match is None:
+                    i = end
+                    break
+                i = match.start()
+                if buffer[i] == "\\":
+                    if i + 1 == end:
+                        break  # The escaped character is in the next chunk
+                    i += 2
+                    continue
+                self._in_string = False
+                i += 1
+                continue
+
+            match = (_INSIDE_OBJECT if self._object_start >= 0 else _OUTSIDE_OBJECT).search(buffer, i)
+            if match is None:
+                i = end
+                break
+            i = match.start()
+            ch = buffer[i]
+            if self._object_start < 0:
+                if ch == "{":
+                    self._object_start = i
+                    self._depth = 1
+                elif ch == "[":
+                    self._array_depth += 1
+                elif self._array_depth:
+                    self._array_depth -= 1
+                    if self._array_depth == 0 and self._array_items:
+                        self.done = True
+            elif ch == '"':
+                self._in_string = True
+            elif ch in "{[":
+                self._depth += 1
+            else:
+                self._depth -= 1
+                if self._depth == 0:
+                    decoded = self._decode(buffer[self._object_start:i + 1])
+                    items.extend(decoded)
+                    if self._array_depth:
+                        self._array_items += len(decoded)
+                    self._object_start = -1
+            i += 1
+
+        # Drop everything already consumed unless we are inside an object
+        keep_from = self._object_start if self._object_start >= 0 else i
+        self._buffer = buffer[keep_from:]
+        if self._object_start >= 0:
+            self._object_start = 0
+        self._pos = i - keep_from
+        return items
+
+    def _decode(self, fragment: str) -> List[Any]:
+        # strict=False accepts raw newlines and tabs inside strings, which models emit often
+        try:
+            value = json.loads(fragment, strict=False)
+        except json.JSONDecodeError:
+            try:
+                value = json.loads(strip_trailing_commas(fragment), strict=False)
+            except json.JSONDecodeError:
+                self.malformed.append(fragment[:SNIPPET_LENGTH])
+                return []
+        return _unwrap(value)
+
+
+def _unwrap(value: Any) -> List[Any]:
+    """Unwrap {"items": [{...}, ...]}-style envelopes the model sometimes adds."""
+    if isinstance(value, dict) and len(value) == 1:
+        inner = next(iter(value.values()))
+        if isinstance(inner, list) and inner and all(isinstance(v, dict) for v in inner):
+            return inner
+    return [value]
+
+
+def strip_trailing_commas(fragment: str) -> str:
+    """Remove commas directly before a closing bracket, leaving string contents alone."""
+    out = []
+    in_string = escape = False
+    pending_comma = False
+    for ch in fragment:
+        if in_string:
+            if escape:
+                escape = False
+            elif ch == "\\":
+                escape = True
+            elif ch == '"':
+                in_string = False
+        elif ch == ",":
+            if pending_comma:
+                out.append(",")
+            pending_comma = True
+            continue
+        elif ch in " \t\r\n":
+            pass
+        else:
+            if pending_comma and ch not in "}]":
+                out.append(",")
+            pending_comma = False
+            if ch == '"':
+                in_string = True
+        out.append(ch)
+    return "".join(out)
+
+
+@dataclass
+class ExtractedItems:
+    items: List[Any]
+    malformed: List[str] = field(default_factory=list)
+    truncated: bool = False
+
+
+def extract_json_items(text: str) -> ExtractedItems:
+    scanner = JSONItemScanner()
+    items = scanner.feed(text)
+    return ExtractedItems(items=items, malformed=scanner.malformed, truncated=scanner.truncated)
+
+
+def is_complete_answer(text: str) -> bool:
+    """At least one JSON item and no object left open: an answer worth keeping, not a cut-off one."""
+    extracted = extract_json_items(text)
+    return bool(extracted.items) and not extracted.truncated
+
+
+# ---- Validation ----
+
+@dataclass
+class DroppedItem:
+    index: Optional[int]  # Position among the extracted items; None if it never parsed as JSON
+    reason: str
+    snippet: str = ""
+
+
+@dataclass
+class ParsedItems(Generic[ModelT]):
+    items: List[ModelT]
+    dropped: List[DroppedItem] = field(default_factory=list)
+    truncated: bool = False
+
+    def report(self) -> dict:
+        return {
+            "parsed": len(self.items),
+            "dropped": [d.__dict__ for d in self.dropped],
+            "truncated": self.truncated,
+        }
+
+
+@lru_cache(maxsize=None)
+def _list_adapter(model: Type[BaseModel]) -> TypeAdapter:
+    return TypeAdapter(List[model])
+
+
+def validate_items(items: List[Any], model: Type[ModelT]) -> ParsedItems[ModelT]:
+    """
+    Validate every item in one Pydantic call; when some fail, drop exactly
+    those (with the reason) and keep the rest in their original order.
+    """
+    adapter = _list_adapter(model)
+    try:
+        return ParsedItems(items=adapter.validate_python(items))
+    except ValidationError as e:
+        reasons = {}
+        for error in e.errors():
+            index, *path = error["loc"]
+            where = ".".join(map(str, path)) or "item"
+            reasons.setdefault(index, []).append(f"{where}: {error['msg']}")
+
+    keep = [item for i, item in enumerate(items) if i not in reasons]
+    dropped = [
+        DroppedItem(index=i, reason="; ".join(msgs), snippet=json.dumps(items[i], default=str)[:SNIPPET_LENGTH])
+        for i, msgs in sorted(reasons.items())
+    ]
+    return ParsedItems(items=adapter.validate_python(keep), dropped=dropped)
+
+
+def parse_llm_items(text: str, model: Type[ModelT]) -> ParsedItems[ModelT]:
+    """Extract the JSON objects from an LLM answer and validate them against `model`."""
+    with stage("json_parse"):
+        extracted = extract_json_items(text)
+        parsed = validate_items(extracted.items, model)
+    count_parse_failures("validation", len(parsed.dropped))
+    count_parse_failures("invalid_json", len(extracted.malformed))
+    count_parse_failures("truncated", int(extracted.truncated))
+    parsed.dropped.extend(
+        DroppedItem(index=None, reason="invalid JSON", snippet=snippet) for snippet in extracted.malformed
+    )
+    if extracted.truncated:
+        parsed.dropped.append(DroppedItem(index=None, reason="truncated output"))
+    parsed.truncated = extracted.truncated
+    return parsed
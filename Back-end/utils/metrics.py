@@ -0,0 +1,208 @@
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Seconds; spans a cache hit (~1 ms) to a slow multi-shard LLM call
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 40, 80)
+
+BACKGROUND = "background"  # Route label for work outside any request
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = tuple(str(labels.get(n, "")) for n in self.labelnames)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name}_total {self.documentation}", f"# TYPE {self.name}_total counter"]
+        for key, value in self._values.items():
+            lines.append(f"{self.name}_total{_format_labels(self.labelnames, key)} {value:g}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: [count per bucket (non-cumulative, last is +Inf), sum]
+        self._series: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, **labels):
+        key = tuple(str(labels.get(n, "")) for n in self.labelnames)
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        for key, (counts, total) in self._series.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = 'le="+Inf"' if bound == float("inf") else f'le="{bound:g}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {total:.6f}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+REQUEST_SECONDS = REGISTRY.register(Histogram(
+    "evaluno_request_seconds", "Time to the response headers, per route", ("route", "method", "status")
+))
+STAGE_SECONDS = REGISTRY.register(Histogram(
+    "evaluno_stage_seconds", "Time spent in each stage of request handling", ("route", "stage")
+))
+LLM_TOKENS = REGISTRY.register(Counter(
+    "evaluno_llm_tokens", "Tokens reported by the LLM provider", ("route", "model", "kind")
+))
+CACHE_LOOKUPS = REGISTRY.register(Counter(
+    "evaluno_cache_lookups", "Cache lookups by cache and outcome", ("route", "cache", "result")
+))
+PARSE_FAILURES = REGISTRY.register(Counter(
+    "evaluno_llm_parse_failures", "Items dropped while parsing LLM output", ("route", "reason")
+))
+
+
+# ---- Per-request stage timing ----
+
+class RequestTimings:
+    """Stages timed during one request, for the Server-Timing header and the route label."""
+
+    def __init__(self, scope: dict):
+        self.scope = scope
+        self.started = time.perf_counter()
+        self.stages: Dict[str, float] = {}
+
+    @property
+    def route(self) -> str:
+        route = self.scope.get("route")
+        return getattr(route, "path", None) or "unmatched"
+
+    def add(self, stage: str, seconds: float):
+        self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+
+    def server_timing(self) -> str:
+        parts = [f"{stage};dur={seconds * 1000:.1f}" for stage, seconds in self.stages.items()]
+        parts.append(f"app;dur={(time.perf_counter() - self.started) * 1000:.1f}")
+        return ", ".join(parts)
+
+
+current_timings: ContextVar[Optional[RequestTimings]] = ContextVar("current_timings", default=None)
+
+
+def current_route() -> str:
+    timings = current_timings.get()
+    return timings.route if timings is not None else BACKGROUND
+
+
+def record(name: str, seconds: float):
+    """Record a stage timed elsewhere; concurrent runs of one stage add up in Server-Timing."""
+    timings = current_timings.get()
+    if timings is not None:
+        timings.add(name, seconds)
+    STAGE_SECONDS.observe(seconds, route=current_route(), stage=name)
+
+
+@contextmanager
+def stage(name: str):
+    """Time a block as stage `name`."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, time.perf_counter() - start)
+
+
+def count_cache(cache: str, result: str):
+    CACHE_LOOKUPS.inc(route=current_route(), cache=cache, result=result)
+
+
+def count_parse_failures(reason: str, amount: int = 1):
+    if amount:
+        PARSE_FAILURES.inc(amount, route=current_route(), reason=reason)
+
+
+def count_tokens(model: str, usage: Optional[dict]):
+    """Count the usage_metadata of a LangChain AIMessage, when the provider reported it."""
+    if usage:
+        route = current_route()
+        LLM_TOKENS.inc(usage.get("input_tokens", 0), route=route, model=model, kind="input")
+        LLM_TOKENS.inc(usage.get("output_tokens", 0), route=route, model=model, kind="output")
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware (no response buffering, so streams pass through):
+    opens a RequestTimings for each request, adds Server-Timing to the
+    response headers and records the request histogram when they are sent.
+    Streamed responses only report the stages finished before the first byte.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        timings = RequestTimings(scope)
+        token = current_timings.set(timings)
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", timings.server_timing().encode()))
+                message = {**message, "headers": headers}
+                REQUEST_SECONDS.observe(
+                    time.perf_counter() - timings.started,
+                    route=timings.route,
+                    method=scope["method"],
+                    status=message["status"],
+                )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            current_timings.reset(token)
@@ -41,6 +41,7 @@ export default function ComparePage() {
     try {
       const response = await fetch("http://localhost:8000/compare/upload", {
         method: "POST",
+        headers: { Authorization: `Bearer ${localStorage.getItem("token") ?? ""}` },
         body: formData,
       });
 
@@ -173,7 +174,7 @@ export default function ComparePage() {
                   >
                     <div className="flex justify-between items-start mb-4">
                       <h3 className="text-xl font-semibold">
-                        CV #{index + 1} - Score:{" "}
+                        {result.filename ?? `CV #${index + 1}`} - Score:{" "}
                         <span
                           className={
                             result.score >= 75
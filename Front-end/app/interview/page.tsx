@@ -88,6 +88,7 @@ export default function Interview() {
     try {
       const response = await fetch("http://localhost:8000/interview/upload", {
         method: "POST",
+        headers: { Authorization: `Bearer ${localStorage.getItem("token") ?? ""}` },
         body: formData,
       });
 
@@ -58,6 +58,7 @@ export default function StartInterview() {
     try {
       const response = await fetch("http://localhost:8000/interview/upload", {
         method: "POST",
+        headers: { Authorization: `Bearer ${localStorage.getItem("token") ?? ""}` },
         body: formData,
       });
       if (!response.ok) throw new Error("Failed to generate Q&A");
@@ -90,6 +91,7 @@ export default function StartInterview() {
     try {
       const res = await fetch("http://localhost:8000/interview/generate-type", {
         method: "POST",
+        headers: { Authorization: `Bearer ${localStorage.getItem("token") ?? ""}` },
         body: formData,
       });
       const data = await res.json();